@@ -92,6 +92,13 @@ print(iamzero == 0.0)
 > True
 ```
 
+Long chains of operations can be evaluated lazily within the context `pe.lazy()`. In this case only the values and local derivatives of the individual operations are recorded and the fluctuations of the result are combined in a single pass as soon as they are needed, e.g. by the `gamma_method`:
+```python
+with pe.lazy():
+    my_ratio = (my_obs1 * my_obs2 + my_obs1) / my_obs2
+my_ratio.gamma_method()
+```
+
 ## Error estimation
 
 The error estimation within `pyerrors` is based on the gamma method introduced in [arXiv:hep-lat/0306017](https://arxiv.org/abs/hep-lat/0306017).
@@ -144,6 +151,11 @@ my_sum.details()
 
 For the full API see `pyerrors.obs.Obs.gamma_method`.
 
+The errors of many observables can be estimated in one go with `pyerrors.obs.gamma_method`, which accepts (nested) lists and arrays of `Obs` and processes all observables defined on the same replica with one stacked fft:
+```python
+pe.gamma_method([my_obs1, my_sum], S=3.0)
+```
+
 ## Multiple ensembles/replica
 
 Error propagation for multiple ensembles (Markov chains with different simulation parameters) is handled automatically. Ensembles are uniquely identified by their `name`.
@@ -190,6 +202,37 @@ pe.Obs.tau_exp_dict['ensemble3'] = 2.0
 In case the `gamma_method` is called without any parameters it will use the values specified in the dictionaries for the respective ensembles.
 Passing arguments to the `gamma_method` still dominates over the dictionaries.
 
+The dictionaries are shared by the whole process. Parameters which only apply to the current thread or asyncio task can be set with the context manager `pe.analysis_context`, which takes a value for all ensembles or a dictionary with values for individual ensembles and dominates over the global dictionaries.
+
+```python
+with pe.analysis_context(S=2.5, tau_exp={'ensemble2': 8.0}):
+    my_obs.gamma_method()
+```
+
+
+### Growing Monte Carlo chains
+
+The samples of running simulations can be accumulated in a `pe.StreamingObs`. Samples of new configurations are appended per replicum and the autocorrelation function is updated incrementally up to the lag `max_lag`, such that the error estimate only costs time proportional to the new data.
+
+```python
+stream = pe.StreamingObs(max_lag=1000)
+stream.append(samples, 'ensemble1|r01')
+stream.gamma_method()
+# Later on, only configurations which were not appended yet are read
+new_obs = pe.input.sfcf.read_sfcf(path, prefix, 'f_A', r_start=stream.next_configs(), ...)
+stream.append_obs(new_obs[0])
+my_obs = stream.to_obs()
+```
+
+### Datasets larger than memory
+
+Within the context `pe.memmap_deltas` the deltas of all newly created `Obs`, e.g. by input routines or derived observables, are stored in memory-mapped `.npy` files in the given directory. The samples are then only loaded into memory when they are accessed. Existing `Obs` can be moved to such files with `pe.to_memmap`.
+
+```python
+with pe.memmap_deltas('/scratch/spill'):
+    corr = pe.input.sfcf.read_sfcf(path, prefix, 'f_A', ...)
+    ratio = corr[1] / corr[0]
+```
 
 ## Irregular Monte Carlo chains
 
@@ -226,6 +269,17 @@ Make sure to check the autocorrelation time with e.g. `pyerrors.obs.Obs.plot_rho
 
 For the full API see `pyerrors.obs.Obs`.
 
+## Arrays of observables
+
+Large sets of observables defined on the same ensembles, e.g. the entries of many correlation functions, can be collected in a `pyerrors.obs.ObsArray`.
+An `ObsArray` stores the central values and the fluctuations of all entries in contiguous numpy arrays such that elementwise operations are evaluated at once instead of entry by entry.
+```python
+arr = pe.ObsArray(list_of_obs)
+new_arr = np.exp(-arr) * arr + 2.0
+new_arr[3]          # Obs valued entry
+new_arr.tolist()    # Conversion to a list of Obs
+```
+
 # Correlators
 When one is not interested in single observables but correlation functions, `pyerrors` offers the `Corr` class which simplifies the corresponding error propagation and provides the user with a set of standard methods. In order to initialize a `Corr` objects one needs to arrange the data as a list of `Obs`
 ```python
@@ -276,6 +330,7 @@ my_new_corr = 0.3 * my_corr[2] * my_corr * my_corr + 12 / my_corr
 - `Corr.reweight` reweights the correlator.
 
 `pyerrors` can also handle matrices of correlation functions and extract energy states from these matrices via a generalized eigenvalue problem (see `pyerrors.correlators.Corr.GEVP`).
+The eigenvalues of all states, with errors which take the fluctuations of the eigenvectors into account, are available via `pyerrors.correlators.Corr.GEVP_eigenvalues`.
 
 For the full API see `pyerrors.correlators.Corr`.
 
@@ -1,10 +1,11 @@
 import warnings
-from itertools import permutations
+import operator
 import numpy as np
 import autograd.numpy as anp
 import matplotlib.pyplot as plt
 import scipy.linalg
-from .obs import Obs, reweight, correlate, CObs
+import scipy.optimize
+from .obs import Obs, ObsArray, reweight, correlate, CObs, gamma_method, _batched_ufunc, _has_common_idl
 from .misc import dump_object, _assert_equal_properties
 from .fits import least_squares
 from .roots import find_root
@@ -21,9 +22,17 @@ class Corr:
     The correlator can have two types of content: An Obs at every timeslice OR a GEVP
     matrix at every timeslice. Other dependency (eg. spatial) are not supported.
 
+    Correlators which result from arithmetic operations, `symmetric`, `roll`,
+    `reverse`, `deriv`, `second_deriv`, `projected` and `item` are stored
+    densely as an ObsArray with the timeslices on its first axis together with
+    a boolean array which marks the defined timeslices. These operations are
+    then carried out with a single numpy call per replicum for all timeslices.
+    The list of timeslices `content` is only assembled when it is accessed.
+    Correlators given as list of timeslices keep their dense form as long as
+    their timeslices and the deltas and idl of their Obs are unchanged.
     """
 
-    __slots__ = ["content", "N", "T", "tag", "prange"]
+    __slots__ = ["_content", "_dense", "_dense_cache", "N", "T", "tag", "prange"]
 
     def __init__(self, data_input, padding=[0, 0], prange=None):
         """ Initialize a Corr object.
@@ -96,6 +105,138 @@ class Corr:
         self.T = len(self.content)
         self.prange = prange
 
+    @classmethod
+    def _from_dense(cls, arr, defined, prange=None):
+        """Create a Corr from an ObsArray of shape (T,) + shape of the timeslices and the boolean array of defined timeslices."""
+        if not np.any(defined):
+            return cls([None] * len(defined), prange=prange)
+        new = cls.__new__(cls)
+        new._content = None
+        new._dense = (arr, defined)
+        new._dense_cache = None
+        new.N = arr.shape[1]
+        new.T = len(defined)
+        new.tag = None
+        new.prange = prange
+        return new
+
+    @property
+    def content(self):
+        """List with one array of Obs per timeslice, None for undefined timeslices."""
+        if self._content is None:
+            arr, defined = self._dense
+            timeslices = np.flatnonzero(defined)
+            content = [None] * self.T
+            for t, item in zip(timeslices, np.asarray(arr[timeslices])):
+                content[t] = item
+            # The list may be modified in place, the dense content is thus only kept as cache.
+            self._content = content
+            self._dense_cache = (self._dense_key(), self._dense)
+            self._dense = None
+        return self._content
+
+    @content.setter
+    def content(self, content):
+        self._content = content
+        self._dense = None
+        self._dense_cache = None
+
+    def _dense_key(self):
+        """Return the Obs of all timeslices together with the versions of their deltas and idl.
+
+        None marks undefined timeslices. Returns None if the content contains
+        entries which are not Obs.
+        """
+        key = []
+        for item in self._content:
+            if _check_for_none(self, item):
+                key.append(None)
+                continue
+            for o in np.asarray(item).flat:
+                if not isinstance(o, Obs):
+                    return None
+                key.append((o, tuple(o.deltas.versions.values()), tuple(o.idl.versions.values())))
+        return key
+
+    def _dense_content(self):
+        """Return the content as ObsArray of shape (T,) + shape of the timeslices and a boolean array of the defined timeslices.
+
+        Undefined timeslices are filled with copies of defined ones. Returns None
+        if the correlator is undefined everywhere or its content does not
+        consist of Obs which share their idl.
+        """
+        if self._dense is not None:
+            return self._dense
+        key = self._dense_key()
+        if key is None:
+            return None
+        if self._dense_cache is not None and _same_dense_key(self._dense_cache[0], key):
+            return self._dense_cache[1]
+        defined = np.array([not _check_for_none(self, item) for item in self.content], dtype=bool)
+        if not np.any(defined):
+            return None
+        timeslices = np.flatnonzero(defined)
+        stacked = np.empty((len(timeslices),) + np.shape(self.content[timeslices[0]]), dtype=object)
+        for i, t in enumerate(timeslices):
+            stacked[i] = self.content[t]
+        if not _has_common_idl(stacked.ravel()):
+            return None
+        dense = _fill_undefined(ObsArray(stacked), defined), defined
+        self._dense_cache = (key, dense)
+        return dense
+
+    def _dense_binary(self, y, op):
+        """Evaluate op(self, y) on the dense content of self and y.
+
+        Returns the result and the defined timeslices or None if the operation
+        has to be carried out timeslice by timeslice.
+        """
+        dense = self._dense_content()
+        if dense is None:
+            return None
+        arr, defined = dense
+        if isinstance(y, Corr):
+            other = y._dense_content()
+            if other is None:
+                return None
+            y, y_defined = other
+            defined = defined & y_defined
+            if arr.ndim < y.ndim:
+                arr = arr[:, :, np.newaxis]
+            elif y.ndim < arr.ndim:
+                y = y[:, :, np.newaxis]
+        elif isinstance(y, np.ndarray):
+            if np.iscomplexobj(y) or (y.dtype == object and not all(isinstance(o, Obs) for o in y)):
+                return None
+            y = y.reshape((self.T,) + (1,) * (arr.ndim - 1))
+        elif isinstance(y, CObs):
+            return None
+        if not np.any(defined):
+            return None
+        # Only the defined timeslices are evaluated, the filled in ones could be ill-defined.
+        timeslices = np.flatnonzero(defined)
+        if isinstance(y, (ObsArray, np.ndarray)):
+            y = y[timeslices]
+        return _fill_undefined(op(arr[timeslices], y), defined), defined
+
+    def _dense_shifted(self, shifts):
+        """Return the dense content shifted by each of the shifts and the timeslices on which all shifted values are defined.
+
+        Returns None if the correlator is not stored densely.
+        """
+        dense = self._dense_content()
+        if dense is None:
+            return None
+        arr, defined = dense
+        t = np.arange(self.T)
+        valid = np.ones(self.T, dtype=bool)
+        shifted = []
+        for shift in shifts:
+            idx = np.clip(t + shift, 0, self.T - 1)
+            valid &= (t + shift >= 0) & (t + shift < self.T) & defined[idx]
+            shifted.append(arr[idx])
+        return shifted, valid
+
     def __getitem__(self, idx):
         """Return the content of timeslice idx"""
         if self.content[idx] is None:
@@ -117,14 +258,7 @@ class Corr:
 
     def gamma_method(self, **kwargs):
         """Apply the gamma method to the content of the Corr."""
-        for item in self.content:
-            if not (item is None):
-                if self.N == 1:
-                    item[0].gamma_method(**kwargs)
-                else:
-                    for i in range(self.N):
-                        for j in range(self.N):
-                            item[i, j].gamma_method(**kwargs)
+        gamma_method([item for item in self.content if item is not None], **kwargs)
 
     gm = gamma_method
 
@@ -156,6 +290,9 @@ class Corr:
                 raise Exception("Vectors are of wrong shape!")
             if normalize:
                 vector_l, vector_r = vector_l / np.sqrt((vector_l @ vector_l)), vector_r / np.sqrt(vector_r @ vector_r)
+            dense = self._dense_projected(vector_l, vector_r)
+            if dense is not None:
+                return dense
             newcontent = [None if _check_for_none(self, item) else np.asarray([vector_l.T @ item @ vector_r]) for item in self.content]
 
         else:
@@ -164,9 +301,39 @@ class Corr:
                 for t in range(self.T):
                     vector_l[t], vector_r[t] = vector_l[t] / np.sqrt((vector_l[t] @ vector_l[t])), vector_r[t] / np.sqrt(vector_r[t] @ vector_r[t])
 
+            dense = self._dense_projected(vector_l, vector_r)
+            if dense is not None:
+                return dense
             newcontent = [None if (_check_for_none(self, self.content[t]) or vector_l[t] is None or vector_r[t] is None) else np.asarray([vector_l[t].T @ self.content[t] @ vector_r[t]]) for t in range(self.T)]
         return Corr(newcontent)
 
+    def _dense_projected(self, vector_l, vector_r):
+        """Project the dense content with real vectors of shape (N,) or lists of such vectors, one per timeslice.
+
+        Returns None if the correlator is not stored densely or the vectors are not supported.
+        """
+        dense = self._dense_content()
+        if dense is None:
+            return None
+        arr, defined = dense
+        if isinstance(vector_l, list):
+            defined = defined & np.array([vl is not None and vr is not None for vl, vr in zip(vector_l, vector_r)])
+            vector_l = [np.zeros(self.N) if vl is None else vl for vl in vector_l]
+            vector_r = [np.zeros(self.N) if vr is None else vr for vr in vector_r]
+        vectors = []
+        for vector in (vector_l, vector_r):
+            if not all(np.shape(v) == (self.N,) for v in (vector if isinstance(vector, list) else [vector])):
+                return None
+            vector = np.asarray(vector)
+            if vector.dtype.kind not in 'biuf':
+                return None
+            vectors.append(np.broadcast_to(vector, (self.T, self.N)))
+
+        def project(x):
+            return np.einsum('ti,tij...,tj->t...', vectors[0], x, vectors[1])[:, np.newaxis]
+
+        return Corr._from_dense(arr._linear_map(lambda x: ([project(x)], lambda d: [project(d)]))[0], defined)
+
     def item(self, i, j):
         """Picks the element [i,j] from every matrix and returns a correlator containing one Obs per timeslice.
 
@@ -179,6 +346,9 @@ class Corr:
         """
         if self.N == 1:
             raise Exception("Trying to pick item from projected Corr")
+        dense = self._dense_content()
+        if dense is not None:
+            return Corr._from_dense(dense[0][:, i, j][:, np.newaxis], dense[1])
         newcontent = [None if (item is None) else item[i, j] for item in self.content]
         return Corr(newcontent)
 
@@ -203,6 +373,18 @@ class Corr:
         if self.T % 2 != 0:
             raise Exception("Can not symmetrize odd T")
 
+        dense = self._dense_content()
+        if dense is not None:
+            arr, defined = dense
+            if defined[0] and np.argmax(np.abs(np.where(defined, arr.value[:, 0], 0))) != 0:
+                warnings.warn("Correlator does not seem to be symmetric around x0=0.", RuntimeWarning)
+            # The timeslice 0 is mapped onto itself and thus left unchanged.
+            reflected = -np.arange(self.T) % self.T
+            defined = defined & defined[reflected]
+            if not np.any(defined):
+                raise Exception("Corr could not be symmetrized: No redundant values")
+            return Corr._from_dense(0.5 * (arr + arr[reflected]), defined, prange=self.prange)
+
         if self.content[0] is not None:
             if np.argmax(np.abs([o[0].value if o is not None else 0 for o in self.content])) != 0:
                 warnings.warn("Correlator does not seem to be symmetric around x0=0.", RuntimeWarning)
@@ -243,6 +425,17 @@ class Corr:
         """Checks whether a correlator matrices is symmetric on every timeslice."""
         if self.N == 1:
             raise Exception("Only works for correlator matrices.")
+        dense = self._dense_content()
+        if dense is not None:
+            # Compares the same single precision data which enters the hash of the individual Obs.
+            arr, defined = dense
+            data = [arr.value] + list(arr.deltas.values()) + list(arr.mask.values())
+            data += [np.einsum('...i,ij,...j->...', arr.grad[name], arr.cov[name], arr.grad[name]) for name in arr.grad]
+            for x in data:
+                x = x[defined].astype(np.float32)
+                if not np.array_equal(x, np.swapaxes(x, 1, 2)):
+                    return False
+            return True
         for t in range(self.T):
             if self[t] is None:
                 continue
@@ -274,10 +467,17 @@ class Corr:
         C.GEVP(t0=2)[:3]  # Vectors for the lowest three states
         ```
 
+        The GEVP is reduced to a standard eigenvalue problem via the Cholesky decomposition of $G(t_0)$
+        and solved for all timeslices in one batched step. Several values of t0 can be scanned at once
+        ```python
+        C.GEVP(t0=[1, 2, 3])  # List with the vectors for t0=1, 2 and 3
+        ```
+
         Parameters
         ----------
-        t0 : int
-            The time t0 for the right hand side of the GEVP according to $G(t)v_i=\lambda_i G(t_0)v_i$
+        t0 : int or list of int
+            The time t0 for the right hand side of the GEVP according to $G(t)v_i=\lambda_i G(t_0)v_i$.
+            If a list is given, a list with the result for every t0 is returned.
         ts : int
             fixed time $G(t_s)v_i=\lambda_i G(t_0)v_i$ if sort=None.
             If sort="Eigenvector" it gives a reference point for the sorting method.
@@ -295,8 +495,10 @@ class Corr:
 
         if self.N == 1:
             raise Exception("GEVP methods only works on correlator matrices and not single correlators.")
+        scan_t0 = isinstance(t0, (list, tuple, np.ndarray))
+        t0s = list(t0) if scan_t0 else [t0]
         if ts is not None:
-            if (ts <= t0):
+            if (ts <= max(t0s)):
                 raise Exception("ts has to be larger than t0.")
 
         if "sorted_list" in kwargs:
@@ -308,40 +510,39 @@ class Corr:
         else:
             symmetric_corr = self.matrix_symmetric()
 
-        G0 = np.vectorize(lambda x: x.value)(symmetric_corr[t0])
-        np.linalg.cholesky(G0)  # Check if matrix G0 is positive-semidefinite.
+        values, defined = _GEVP_values(symmetric_corr)
+        if not np.all(defined[t0s]):
+            raise Exception("Corr not defined at t0.")
+        # The Cholesky decomposition also checks whether the matrices G(t0) are positive-definite.
+        L_inv = np.linalg.inv(np.linalg.cholesky(values[t0s]))
 
         if sort is None:
             if (ts is None):
                 raise Exception("ts is required if sort=None.")
-            if (self.content[t0] is None) or (self.content[ts] is None):
+            if not defined[ts]:
                 raise Exception("Corr not defined at t0/ts.")
-            Gt = np.vectorize(lambda x: x.value)(symmetric_corr[ts])
-            reordered_vecs = _GEVP_solver(Gt, G0)
+            results = list(_GEVP_batched(values[ts], L_inv)[1])
 
         elif sort in ["Eigenvalue", "Eigenvector"]:
             if sort == "Eigenvalue" and ts is not None:
                 warnings.warn("ts has no effect when sorting by eigenvalue is chosen.", RuntimeWarning)
-            all_vecs = [None] * (t0 + 1)
-            for t in range(t0 + 1, self.T):
-                try:
-                    Gt = np.vectorize(lambda x: x.value)(symmetric_corr[t])
-                    all_vecs.append(_GEVP_solver(Gt, G0))
-                except Exception:
-                    all_vecs.append(None)
-            if sort == "Eigenvector":
-                if ts is None:
-                    raise Exception("ts is required for the Eigenvector sorting method.")
-                all_vecs = _sort_vectors(all_vecs, ts)
-
-            reordered_vecs = [[v[s] if v is not None else None for v in all_vecs] for s in range(self.N)]
+            if sort == "Eigenvector" and ts is None:
+                raise Exception("ts is required for the Eigenvector sorting method.")
+            vecs = _GEVP_batched(values[np.newaxis], L_inv[:, np.newaxis])[1]
+            results = []
+            for t0_i, t0_vecs in zip(t0s, vecs):
+                all_vecs = [t0_vecs[t] if defined[t] and t > t0_i else None for t in range(self.T)]
+                if sort == "Eigenvector":
+                    all_vecs = _sort_vectors(all_vecs, ts)
+                results.append([[v[s] if v is not None else None for v in all_vecs] for s in range(self.N)])
         else:
             raise Exception("Unkown value for 'sort'.")
 
         if "state" in kwargs:
-            return reordered_vecs[kwargs.get("state")]
-        else:
-            return reordered_vecs
+            results = [reordered_vecs[kwargs.get("state")] for reordered_vecs in results]
+        if scan_t0:
+            return results
+        return results[0]
 
     def Eigenvalue(self, t0, ts=None, state=0, sort="Eigenvalue"):
         """Determines the eigenvalue of the GEVP by solving and projecting the correlator
@@ -356,6 +557,71 @@ class Corr:
         vec = self.GEVP(t0, ts=ts, sort=sort)[state]
         return self.projected(vec)
 
+    def GEVP_eigenvalues(self, t0, ts=None, sort="Eigenvalue", state=None):
+        r"""Determines the eigenvalues $\lambda_n(t, t_0)$ of the GEVP for all states including the fluctuations of the eigenvectors.
+
+        The fluctuations of the eigenvalues are propagated to first order via the
+        Hellmann-Feynman theorem,
+        $d\lambda_n = v_n^T\left(dG(t) - \lambda_n dG(t_0)\right)v_n$
+        with the eigenvectors normalized to $v_n^T G(t_0) v_n = 1$. This is carried out for all
+        states and timeslices in a single step. In contrast to `Corr.Eigenvalue`, which projects the
+        correlator with fixed eigenvectors, the fluctuations of $G(t_0)$ are taken into account.
+        Energies can subsequently be obtained via `Corr.m_eff`.
+
+        Parameters
+        ----------
+        t0 : int
+            The time t0 for the right hand side of the GEVP according to $G(t)v_i=\lambda_i G(t_0)v_i$
+        ts : int
+            Reference timeslice for sort="Eigenvector".
+        sort : string
+            Sorting method of the states, see `Corr.GEVP`. Default: "Eigenvalue".
+        state : int
+            If specified, only the Corr for this state is returned. The lowest state is zero.
+
+        Returns
+        -------
+        list of Corr or Corr
+            One Corr per state, ordered by energy, which is defined for the timeslices t > t0.
+        """
+        if sort is None:
+            raise Exception("GEVP_eigenvalues requires a sorting method, sort=None is not supported.")
+        if self.N == 1:
+            raise Exception("GEVP methods only works on correlator matrices and not single correlators.")
+        if self.is_matrix_symmetric():
+            symmetric_corr = self
+        else:
+            symmetric_corr = self.matrix_symmetric()
+        vecs = symmetric_corr.GEVP(t0, ts=ts, sort=sort)
+
+        dense = symmetric_corr._dense_content()
+        if dense is None:
+            G0 = Corr([symmetric_corr.content[t0]] * self.T)
+            eigenvalues = [symmetric_corr.projected(vecs[s]) / G0.projected(vecs[s]) for s in range(self.N)]
+        else:
+            arr, defined = dense
+            defined = defined & np.array([vecs[0][t] is not None for t in range(self.T)])
+            # The eigenvalues are only evaluated on the timeslices with eigenvectors.
+            timeslices = np.flatnonzero(defined)
+            V = np.array([[vecs[s][t] for s in range(self.N)] for t in timeslices]).reshape(len(timeslices), self.N, self.N)
+
+            def numerator(x):
+                return np.einsum('tsi,tij...,tsj->ts...', V, x[timeslices], V)
+
+            def denominator(x):
+                return np.einsum('tsi,ij...,tsj->ts...', V, x[t0], V)
+
+            norm = denominator(arr.value)
+            lam = numerator(arr.value) / norm
+            lam_arr = arr._linear_map(lambda x: ([numerator(x) / denominator(x)],
+                                                 lambda d: [(numerator(d) - lam[..., np.newaxis] * denominator(d)) / norm[..., np.newaxis]]))[0]
+            lam_arr = _fill_undefined(lam_arr, defined)
+            eigenvalues = [Corr._from_dense(lam_arr[:, s:s + 1], defined) for s in range(self.N)]
+
+        if state is not None:
+            return eigenvalues[state]
+        return eigenvalues
+
     def Hankel(self, N, periodic=False):
         """Constructs an NxN Hankel matrix
 
@@ -405,10 +671,17 @@ class Corr:
         dt : int
             number of timeslices
         """
-        return Corr(list(np.roll(np.array(self.content, dtype=object), dt)))
+        dense = self._dense_content()
+        if dense is not None:
+            idx = (np.arange(self.T) - dt) % self.T
+            return Corr._from_dense(dense[0][idx], dense[1][idx])
+        return Corr(list(np.roll(np.array(self.content, dtype=object), dt, axis=0)))
 
     def reverse(self):
         """Reverse the time ordering of the Corr"""
+        dense = self._dense_content()
+        if dense is not None:
+            return Corr._from_dense(dense[0][::-1], dense[1][::-1])
         return Corr(self.content[:: -1])
 
     def thin(self, spacing=2, offset=0):
@@ -522,6 +795,9 @@ class Corr:
         """
         if self.N != 1:
             raise Exception("deriv only implemented for one-dimensional correlators.")
+        dense = self._dense_deriv(variant)
+        if dense is not None:
+            return dense
         if variant == "symmetric":
             newcontent = []
             for t in range(1, self.T - 1):
@@ -587,6 +863,9 @@ class Corr:
         """
         if self.N != 1:
             raise Exception("second_deriv only implemented for one-dimensional correlators.")
+        dense = self._dense_deriv(variant, second=True)
+        if dense is not None:
+            return dense
         if variant == "symmetric":
             newcontent = []
             for t in range(1, self.T - 1):
@@ -621,6 +900,43 @@ class Corr:
         else:
             raise Exception("Unknown variant.")
 
+    def _dense_deriv(self, variant, second=False):
+        """Evaluate the finite differences of deriv and second_deriv on the dense content.
+
+        Returns None if the correlator is not stored densely or the variant is unknown.
+        """
+        if variant == 'log':
+            dense = self._dense_content()
+            if dense is None:
+                return None
+            arr, defined = dense
+            defined = defined & (arr.value[:, 0] > 0)
+            if not np.any(defined):
+                raise Exception("Log is undefined at all timeslices")
+            logcorr = Corr._from_dense(_fill_undefined(arr[np.flatnonzero(defined)].log(), defined), defined)
+            if second:
+                return self * (logcorr.second_deriv('symmetric') + (logcorr.deriv('symmetric'))**2)
+            return self * logcorr.deriv('symmetric')
+
+        if second:
+            stencils = {"symmetric": ([-1, 0, 1], lambda xm, x, xp: xp - 2 * x + xm),
+                        "improved": ([-2, -1, 0, 1, 2], lambda xm2, xm, x, xp, xp2: (1 / 12) * (-xp2 + 16 * xp - 30 * x + 16 * xm - xm2))}
+        else:
+            stencils = {"symmetric": ([-1, 1], lambda xm, xp: 0.5 * (xp - xm)),
+                        "forward": ([0, 1], lambda x, xp: xp - x),
+                        "backward": ([-1, 0], lambda xm, x: x - xm),
+                        "improved": ([-2, -1, 1, 2], lambda xm2, xm, xp, xp2: (1 / 12) * (xm2 - 8 * xm + 8 * xp - xp2))}
+        if variant not in stencils:
+            return None
+        shifts, stencil = stencils[variant]
+        dense = self._dense_shifted(shifts)
+        if dense is None:
+            return None
+        shifted, defined = dense
+        if not np.any(defined):
+            raise Exception("Derivative is undefined at all timeslices")
+        return Corr._from_dense(stencil(*shifted), defined)
+
     def m_eff(self, variant='log', guess=1.0):
         """Returns the effective mass of the correlator as correlator object
 
@@ -675,6 +991,40 @@ class Corr:
             def root_function(x, d):
                 return func(x * (t - self.T / 2)) / func(x * (t + 1 - self.T / 2)) - d
 
+            dense = self._dense_content()
+            if dense is not None:
+                arr, defined = dense
+                values = arr.value[:, 0]
+                timeslices = np.arange(self.T - 1)
+                valid = defined[:-1] & defined[1:] & (values[1:] != 0)
+                # Fill the two timeslices in the middle of the lattice with their predecessors
+                middle = np.isin(timeslices, [self.T / 2, self.T / 2 - 1]) if variant == 'sinh' else np.zeros(self.T - 1, dtype=bool)
+                valid &= middle | (values[:-1] * values[1:] >= 0)
+                solved = valid & ~middle
+                source = timeslices.copy()
+                for t in np.flatnonzero(middle & valid):
+                    source[t] = source[t - 1]
+                    valid[t] = valid[t - 1]
+                if not np.any(valid):
+                    raise Exception('m_eff is undefined at all timeslices')
+                m_eff = _m_eff_dense(arr, np.flatnonzero(solved), self.T, variant == 'sinh')
+                if m_eff is not None:
+                    result = Corr._from_dense(m_eff[np.maximum(np.cumsum(solved) - 1, 0)[np.append(source, 0)]], np.append(valid, False))
+                    if np.all(np.isfinite(m_eff.value)):
+                        return result
+                    # Timeslices on which no root could be bracketed are solved individually.
+                    newcontent = []
+                    for t, item in enumerate(result.content[:-1]):
+                        if item is None:
+                            newcontent.append(None)
+                        elif source[t] != t:
+                            newcontent.append(newcontent[source[t]])
+                        elif np.isnan(item[0].value):
+                            newcontent.append(np.abs(find_root(self.content[t][0] / self.content[t + 1][0], root_function, guess=guess)))
+                        else:
+                            newcontent.append(item[0])
+                    return Corr(newcontent, padding=[0, 1])
+
             newcontent = []
             for t in range(self.T - 1):
                 if (self.content[t] is None) or (self.content[t + 1] is None) or (self.content[t + 1][0].value == 0):
@@ -1002,6 +1352,9 @@ class Corr:
         if isinstance(y, Corr):
             if ((self.N != y.N) or (self.T != y.T)):
                 raise Exception("Addition of Corrs with different shape")
+            dense = self._dense_binary(y, operator.add)
+            if dense is not None:
+                return Corr._from_dense(*dense)
             newcontent = []
             for t in range(self.T):
                 if _check_for_none(self, self.content[t]) or _check_for_none(y, y.content[t]):
@@ -1011,6 +1364,9 @@ class Corr:
             return Corr(newcontent)
 
         elif isinstance(y, (Obs, int, float, CObs)):
+            dense = self._dense_binary(y, operator.add)
+            if dense is not None:
+                return Corr._from_dense(*dense, prange=self.prange)
             newcontent = []
             for t in range(self.T):
                 if _check_for_none(self, self.content[t]):
@@ -1020,6 +1376,9 @@ class Corr:
             return Corr(newcontent, prange=self.prange)
         elif isinstance(y, np.ndarray):
             if y.shape == (self.T,):
+                dense = self._dense_binary(y, operator.add)
+                if dense is not None:
+                    return Corr._from_dense(*dense)
                 return Corr(list((np.array(self.content).T + y).T))
             else:
                 raise ValueError("operands could not be broadcast together")
@@ -1030,6 +1389,9 @@ class Corr:
         if isinstance(y, Corr):
             if not ((self.N == 1 or y.N == 1 or self.N == y.N) and self.T == y.T):
                 raise Exception("Multiplication of Corr object requires N=N or N=1 and T=T")
+            dense = self._dense_binary(y, operator.mul)
+            if dense is not None:
+                return Corr._from_dense(*dense)
             newcontent = []
             for t in range(self.T):
                 if _check_for_none(self, self.content[t]) or _check_for_none(y, y.content[t]):
@@ -1039,6 +1401,9 @@ class Corr:
             return Corr(newcontent)
 
         elif isinstance(y, (Obs, int, float, CObs)):
+            dense = self._dense_binary(y, operator.mul)
+            if dense is not None:
+                return Corr._from_dense(*dense, prange=self.prange)
             newcontent = []
             for t in range(self.T):
                 if _check_for_none(self, self.content[t]):
@@ -1048,6 +1413,9 @@ class Corr:
             return Corr(newcontent, prange=self.prange)
         elif isinstance(y, np.ndarray):
             if y.shape == (self.T,):
+                dense = self._dense_binary(y, operator.mul)
+                if dense is not None:
+                    return Corr._from_dense(*dense)
                 return Corr(list((np.array(self.content).T * y).T))
             else:
                 raise ValueError("operands could not be broadcast together")
@@ -1058,6 +1426,13 @@ class Corr:
         if isinstance(y, Corr):
             if not ((self.N == 1 or y.N == 1 or self.N == y.N) and self.T == y.T):
                 raise Exception("Multiplication of Corr object requires N=N or N=1 and T=T")
+            dense = self._dense_binary(y, operator.truediv)
+            if dense is not None:
+                arr, defined = dense
+                defined = defined & ~np.isnan(arr.value.reshape(self.T, -1).sum(axis=1))
+                if not np.any(defined):
+                    raise Exception("Division returns completely undefined correlator")
+                return Corr._from_dense(_fill_undefined(arr[np.flatnonzero(defined)], defined), defined)
             newcontent = []
             for t in range(self.T):
                 if _check_for_none(self, self.content[t]) or _check_for_none(y, y.content[t]):
@@ -1082,6 +1457,9 @@ class Corr:
                 if y.is_zero():
                     raise Exception('Division by zero will return undefined correlator')
 
+            dense = self._dense_binary(y, operator.truediv)
+            if dense is not None:
+                return Corr._from_dense(*dense, prange=self.prange)
             newcontent = []
             for t in range(self.T):
                 if _check_for_none(self, self.content[t]):
@@ -1093,6 +1471,9 @@ class Corr:
         elif isinstance(y, (int, float)):
             if y == 0:
                 raise Exception('Division by zero will return undefined correlator')
+            dense = self._dense_binary(y, operator.truediv)
+            if dense is not None:
+                return Corr._from_dense(*dense, prange=self.prange)
             newcontent = []
             for t in range(self.T):
                 if _check_for_none(self, self.content[t]):
@@ -1102,6 +1483,9 @@ class Corr:
             return Corr(newcontent, prange=self.prange)
         elif isinstance(y, np.ndarray):
             if y.shape == (self.T,):
+                dense = self._dense_binary(y, operator.truediv)
+                if dense is not None:
+                    return Corr._from_dense(*dense)
                 return Corr(list((np.array(self.content).T / y).T))
             else:
                 raise ValueError("operands could not be broadcast together")
@@ -1109,6 +1493,9 @@ class Corr:
             raise TypeError('Corr / wrong type')
 
     def __neg__(self):
+        dense = self._dense_binary(-1., operator.mul)
+        if dense is not None:
+            return Corr._from_dense(*dense, prange=self.prange)
         newcontent = [None if _check_for_none(self, item) else -1. * item for item in self.content]
         return Corr(newcontent, prange=self.prange)
 
@@ -1117,29 +1504,46 @@ class Corr:
 
     def __pow__(self, y):
         if isinstance(y, (Obs, int, float, CObs)):
+            dense = self._dense_binary(y, operator.pow)
+            if dense is not None:
+                return Corr._from_dense(*dense, prange=self.prange)
             newcontent = [None if _check_for_none(self, item) else item**y for item in self.content]
             return Corr(newcontent, prange=self.prange)
         else:
             raise TypeError('Type of exponent not supported')
 
     def __abs__(self):
-        newcontent = [None if _check_for_none(self, item) else np.abs(item) for item in self.content]
-        return Corr(newcontent, prange=self.prange)
+        return Corr(self._apply_ufunc(np.abs), prange=self.prange)
 
     # The numpy functions:
     def sqrt(self):
         return self ** 0.5
 
     def log(self):
-        newcontent = [None if _check_for_none(self, item) else np.log(item) for item in self.content]
-        return Corr(newcontent, prange=self.prange)
+        return Corr(self._apply_ufunc(np.log), prange=self.prange)
 
     def exp(self):
-        newcontent = [None if _check_for_none(self, item) else np.exp(item) for item in self.content]
-        return Corr(newcontent, prange=self.prange)
+        return Corr(self._apply_ufunc(np.exp), prange=self.prange)
+
+    def _apply_ufunc(self, ufunc):
+        """Applies the numpy ufunc to all defined timeslices in one batched call and returns the new content."""
+        defined = [t for t, item in enumerate(self.content) if not _check_for_none(self, item)]
+        if not defined:
+            return [None] * self.T
+        stacked = np.empty((len(defined),) + np.shape(self.content[defined[0]]), dtype=object)
+        for i, t in enumerate(defined):
+            stacked[i] = self.content[t]
+        result = _batched_ufunc(ufunc, '__call__', stacked)
+        newcontent = [None] * self.T
+        for i, t in enumerate(defined):
+            newcontent[t] = result[i]
+        return newcontent
 
     def _apply_func_to_corr(self, func):
-        newcontent = [None if _check_for_none(self, item) else func(item) for item in self.content]
+        if isinstance(func, np.ufunc):
+            newcontent = self._apply_ufunc(func)
+        else:
+            newcontent = [None if _check_for_none(self, item) else func(item) for item in self.content]
         for t in range(self.T):
             if _check_for_none(self, newcontent[t]):
                 continue
@@ -1279,37 +1683,169 @@ class Corr:
 
 
 def _sort_vectors(vec_set, ts):
-    """Helper function used to find a set of Eigenvectors consistent over all timeslices"""
+    """Helper function used to find a set of Eigenvectors consistent over all timeslices
+
+    Following arXiv:2004.10472 the vectors v_k(t) are assigned to the reference
+    states at ts such that the product of |det(R_j(v_k))| is maximal, where
+    R_j(v) is the matrix of reference vectors with the j-th row replaced by v.
+    This is a linear assignment problem for the logarithms of the
+    determinants, which is solved with scipy.optimize.linear_sum_assignment
+    instead of enumerating all permutations.
+    """
     reference_sorting = np.array(vec_set[ts])
-    N = reference_sorting.shape[0]
-    sorted_vec_set = []
-    for t in range(len(vec_set)):
-        if vec_set[t] is None:
-            sorted_vec_set.append(None)
-        elif not t == ts:
-            perms = [list(o) for o in permutations([i for i in range(N)], N)]
-            best_score = 0
-            for perm in perms:
-                current_score = 1
-                for k in range(N):
-                    new_sorting = reference_sorting.copy()
-                    new_sorting[perm[k], :] = vec_set[t][k]
-                    current_score *= abs(np.linalg.det(new_sorting))
-                if current_score > best_score:
-                    best_score = current_score
-                    best_perm = perm
-            sorted_vec_set.append([vec_set[t][k] for k in best_perm])
-        else:
-            sorted_vec_set.append(vec_set[t])
+    sorted_vec_set = list(vec_set)
+    timeslices = [t for t in range(len(vec_set)) if vec_set[t] is not None and t != ts]
+    if not timeslices:
+        return sorted_vec_set
+    dets = _replacement_determinants(reference_sorting, np.array([vec_set[t] for t in timeslices]))
+    costs = -np.log(np.maximum(np.abs(dets), np.finfo(float).tiny))
+    for t, cost in zip(timeslices, costs):
+        vectors, states = scipy.optimize.linear_sum_assignment(cost)
+        sorted_vec = [None] * len(states)
+        for k, j in zip(vectors, states):
+            sorted_vec[j] = vec_set[t][k]
+        sorted_vec_set[t] = sorted_vec
 
     return sorted_vec_set
 
 
+def _replacement_determinants(reference, vecs):
+    """Determinants of the matrix reference with the row j replaced by vecs[..., k, :], up to a common factor.
+
+    For invertible reference the determinants are given by det(reference) (v_k reference^-1)_j.
+    """
+    try:
+        return vecs @ np.linalg.inv(reference)
+    except np.linalg.LinAlgError:
+        dets = np.empty(vecs.shape)
+        for j in range(reference.shape[0]):
+            replaced = np.broadcast_to(reference, vecs.shape[:-1] + reference.shape).copy()
+            replaced[..., j, :] = vecs
+            dets[..., j] = np.linalg.det(replaced)
+        return dets
+
+
+def _m_eff_roots(ratio, t, T, sinh=False):
+    """Solve F(m (t - T / 2)) / F(m (t + 1 - T / 2)) = ratio for m > 0 for all entries at once, where F is cosh or sinh.
+
+    The logarithm of the left hand side is monotonic in m > 0, the roots are
+    thus found with Newton steps safeguarded by bisection. Returns the roots and
+    the derivatives dm / dratio from the implicit function theorem, both are nan
+    where no root could be bracketed.
+    """
+    a = t - T / 2
+    b = a + 1
+    if sinh:
+        def log_F(x):
+            return np.abs(x) + np.log1p(-np.exp(-2 * np.abs(x))) - np.log(2)
+
+        def dlog_F(x):
+            return 1 / np.tanh(x)
+    else:
+        def log_F(x):
+            return np.abs(x) + np.log1p(np.exp(-2 * np.abs(x))) - np.log(2)
+
+        def dlog_F(x):
+            return np.tanh(x)
+
+    # The roots are only defined for positive ratios, e.g. of the replica means.
+    log_ratio = np.log(np.where(ratio > 0, ratio, np.nan))
+
+    def h(m):
+        return log_F(m * a) - log_F(m * b) - log_ratio
+
+    def dh(m):
+        return a * dlog_F(m * a) - b * dlog_F(m * b)
+
+    shape = np.broadcast(ratio, a).shape
+    lo = np.full(shape, 1e-10)
+    hi = np.ones(shape)
+    sign_lo = np.sign(h(lo))
+    for _ in range(12):
+        expand = np.sign(h(hi)) == sign_lo
+        if not np.any(expand):
+            break
+        hi = np.where(expand, 2 * hi, hi)
+    bracketed = np.isfinite(sign_lo) & (sign_lo != 0) & (np.sign(h(hi)) == -sign_lo)
+
+    m = np.where(bracketed, 0.5 * (lo + hi), np.nan)
+    for _ in range(100):
+        h_m = h(m)
+        below = np.sign(h_m) == sign_lo
+        lo = np.where(below, m, lo)
+        hi = np.where(below, hi, m)
+        newton = m - h_m / dh(m)
+        m_new = np.where((newton > lo) & (newton < hi), newton, 0.5 * (lo + hi))
+        converged = ~bracketed | (h_m == 0) | (np.abs(m_new - m) <= 4 * np.finfo(float).eps * m)
+        m = np.where(bracketed, m_new, np.nan)
+        if np.all(converged):
+            break
+    m = np.where(bracketed & (np.abs(h(m)) < 1e-8), m, np.nan)
+    return m, 1 / (ratio * dh(m))
+
+
+def _m_eff_dense(arr, timeslices, T, sinh=False):
+    """Effective masses from the ratios arr[t] / arr[t + 1] of the dense content arr of a correlator for the given timeslices.
+
+    Returns an ObsArray with one row per timeslice, which is nan where the
+    root could not be bracketed, or None if no timeslices are given.
+    """
+    if len(timeslices) == 0:
+        return None
+    t = timeslices[:, np.newaxis]
+    ratio = arr[timeslices] / arr[timeslices + 1]
+    return ratio._apply([], lambda x: _m_eff_roots(x, t, T, sinh)[0], [lambda x: _m_eff_roots(x, t, T, sinh)[1]])
+
+
+def _fill_undefined(arr, defined):
+    """Expand the ObsArray arr of the defined timeslices to all timeslices.
+
+    Undefined timeslices are filled with copies of the preceding defined
+    timeslice, or of the first defined timeslice at the beginning.
+    """
+    return arr[np.maximum(np.cumsum(defined) - 1, 0)]
+
+
+def _same_dense_key(key1, key2):
+    """Compare two keys of the dense cache of a Corr, the Obs are compared by identity."""
+    return len(key1) == len(key2) and all(a is b if a is None or b is None else (a[0] is b[0] and a[1:] == b[1:]) for a, b in zip(key1, key2))
+
+
 def _check_for_none(corr, entry):
     """Checks if entry for correlator corr is None"""
     return len(list(filter(None, np.asarray(entry).flatten()))) < corr.N ** 2
 
 
+def _GEVP_values(corr):
+    """Return the central values of a correlator matrix as array of shape (T, N, N) and a boolean array of the
+    timeslices on which they are defined and finite. Undefined timeslices are filled with unit matrices."""
+    dense = corr._dense_content()
+    if dense is not None:
+        values = dense[0].value.copy()
+        defined = dense[1].copy()
+    else:
+        defined = np.array([not _check_for_none(corr, item) for item in corr.content], dtype=bool)
+        values = np.array([np.vectorize(lambda x: x.value)(item) if is_defined else np.zeros((corr.N, corr.N)) for item, is_defined in zip(corr.content, defined)])
+    defined &= np.all(np.isfinite(values), axis=(1, 2))
+    values[~defined] = np.identity(corr.N)
+    return values, defined
+
+
+def _GEVP_batched(Gt, L_inv):
+    """Solve the GEVPs for stacks of matrices Gt with the inverse L_inv of the Cholesky factor of G(t0).
+
+    Only the lower triangular part of Gt is processed. Returns the eigenvalues in
+    descending order and the corresponding eigenvectors, the eigenvector i is
+    stored in vecs[..., i, :] and normalized such that v^T G(t0) v = 1. Gt and
+    L_inv have to be broadcastable against each other.
+    """
+    Gt = np.tril(Gt) + np.swapaxes(np.tril(Gt, -1), -1, -2).conj()
+    L_inv_H = np.swapaxes(L_inv, -1, -2).conj()
+    w, y = np.linalg.eigh(L_inv @ Gt @ L_inv_H)
+    vecs = np.swapaxes(L_inv_H @ y, -1, -2)
+    return w[..., ::-1], vecs[..., ::-1, :]
+
+
 def _GEVP_solver(Gt, G0):
     """Helper function for solving the GEVP and sorting the eigenvectors.
 
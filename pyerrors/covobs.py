@@ -1,3 +1,5 @@
+import hashlib
+import weakref
 import numpy as np
 
 
@@ -39,6 +41,16 @@ class Covobs:
             self._set_grad(grad)
         self.value = mean
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_cov'] = state.pop('_cov_entry').cov
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        self._cov_entry = _register_cov(state.pop('_cov'))
+        self.__dict__.update(state)
+
     def errsq(self):
         """ Return the variance (= square of the error) of the Covobs
         """
@@ -55,29 +67,8 @@ class Covobs:
             1 dimensional list or array of lenght N: variances of multiple covobs
             2 dimensional list or array (N x N): Symmetric, positive-semidefinite covariance matrix
         """
-        self._cov = np.array(cov)
-        if self._cov.ndim == 0:
-            self.N = 1
-            self._cov = np.diag([self._cov])
-        elif self._cov.ndim == 1:
-            self.N = len(self._cov)
-            self._cov = np.diag(self._cov)
-        elif self._cov.ndim == 2:
-            self.N = self._cov.shape[0]
-            if self._cov.shape[1] != self.N:
-                raise Exception('Covariance matrix has to be a square matrix!')
-        else:
-            raise Exception('Covariance matrix has to be a 2 dimensional square matrix!')
-
-        for i in range(self.N):
-            for j in range(i):
-                if not self._cov[i][j] == self._cov[j][i]:
-                    raise Exception('Covariance matrix is non-symmetric for (%d, %d' % (i, j))
-
-        evals = np.linalg.eigvalsh(self._cov)
-        for ev in evals:
-            if ev < 0:
-                raise Exception('Covariance matrix is not positive-semidefinite!')
+        self._cov_entry = _register_cov(cov)
+        self.N = self._cov_entry.cov.shape[0]
 
     def _set_grad(self, grad):
         """ Set the gradient of the covobs
@@ -97,8 +88,113 @@ class Covobs:
 
     @property
     def cov(self):
-        return self._cov
+        """Covariance matrix of the Covobs.
+
+        The matrix is shared by all Covobs which refer to the same covariance
+        matrix and is thus read-only. Use a copy to modify it.
+        """
+        return self._cov_entry.cov
+
+    @property
+    def cholesky(self):
+        """Lower triangular Cholesky factor of the covariance matrix.
+
+        The factor is computed once per registered covariance matrix and
+        shared by all Covobs which refer to it. For singular,
+        positive-semidefinite matrices a lower triangular factor is
+        constructed from the eigendecomposition.
+        """
+        return self._cov_entry.cholesky
 
     @property
     def grad(self):
         return self._grad
+
+
+class _CovEntry:
+    """Validated, read-only covariance matrix shared by all Covobs that refer to it."""
+    __slots__ = ['cov', '_cholesky', '__weakref__']
+
+    def __init__(self, cov):
+        self.cov = cov
+        self._cholesky = None
+
+    @property
+    def cholesky(self):
+        if self._cholesky is None:
+            try:
+                self._cholesky = np.linalg.cholesky(self.cov)
+            except np.linalg.LinAlgError:
+                self._cholesky = _semidefinite_cholesky(self.cov)
+            self._cholesky.flags.writeable = False
+        return self._cholesky
+
+
+def _semidefinite_cholesky(cov):
+    """Lower triangular L with L @ L.T == cov for a positive-semidefinite matrix cov.
+
+    The square root V sqrt(w) obtained from the eigendecomposition is brought
+    to lower triangular form via a QR decomposition of its transpose.
+    """
+    w, v = np.linalg.eigh(cov)
+    root = v * np.sqrt(np.clip(w, 0, None))
+    r = np.linalg.qr(root.T, mode='r')
+    signs = np.where(np.diag(r) < 0, -1.0, 1.0)
+    return (signs[:, None] * r).T
+
+
+# Registered covariance matrices, addressed by their content and by the id of the stored array.
+# Entries are dropped as soon as no Covobs refers to them anymore.
+_cov_registry = weakref.WeakValueDictionary()
+_cov_registry_ids = weakref.WeakValueDictionary()
+
+
+def _register_cov(cov):
+    """Returns the registry entry for the covariance matrix cov.
+
+    Covariance matrices are validated only when they are registered for the
+    first time. Passing the array of a registered entry returns the entry
+    without any further checks.
+
+    Parameters
+    ----------
+    cov : list or array
+        Has to be either of:
+        0 dimensional number: variance of a single covobs,
+        1 dimensional list or array of lenght N: variances of multiple covobs
+        2 dimensional list or array (N x N): Symmetric, positive-semidefinite covariance matrix
+    """
+    entry = _cov_registry_ids.get(id(cov))
+    if entry is not None and entry.cov is cov:
+        return entry
+
+    cov = np.array(cov)
+    if cov.ndim == 0:
+        cov = np.diag([cov])
+    elif cov.ndim == 1:
+        cov = np.diag(cov)
+    elif cov.ndim == 2:
+        if cov.shape[1] != cov.shape[0]:
+            raise Exception('Covariance matrix has to be a square matrix!')
+    else:
+        raise Exception('Covariance matrix has to be a 2 dimensional square matrix!')
+
+    key = (cov.shape, cov.dtype.str, hashlib.sha1(np.ascontiguousarray(cov).tobytes()).hexdigest())
+    entry = _cov_registry.get(key)
+    if entry is not None:
+        return entry
+
+    asymmetric = np.argwhere(np.tril(~(cov == cov.T), -1))
+    if len(asymmetric):
+        raise Exception('Covariance matrix is non-symmetric for (%d, %d' % tuple(asymmetric[0]))
+
+    evals = np.linalg.eigvalsh(cov)
+    for ev in evals:
+        if ev < 0:
+            raise Exception('Covariance matrix is not positive-semidefinite!')
+
+    cov.flags.writeable = False
+    entry = _CovEntry(cov)
+    _cov_registry[key] = entry
+    _cov_registry_ids[id(cov)] = entry
+    return entry
@@ -14,7 +14,7 @@ from autograd import hessian as auto_hessian
 from autograd import elementwise_grad as egrad
 from numdifftools import Jacobian as num_jacobian
 from numdifftools import Hessian as num_hessian
-from .obs import Obs, derived_observable, covariance, cov_Obs
+from .obs import Obs, derived_observable, covariance, cov_Obs, gamma_method
 
 
 class Fit_result(Sequence):
@@ -44,7 +44,7 @@ class Fit_result(Sequence):
 
     def gamma_method(self, **kwargs):
         """Apply the gamma method to all fit parameters"""
-        [o.gamma_method(**kwargs) for o in self.fit_parameters]
+        gamma_method(self.fit_parameters, **kwargs)
 
     gm = gamma_method
 
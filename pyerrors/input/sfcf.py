@@ -58,6 +58,10 @@ def read_sfcf(path, prefix, name, quarks='.*', corr_type='bi', noffset=0, wf=0,
     check_configs: list[list[int]]
         list of list of supposed configs, eg. [range(1,1000)]
         for one replicum with 1000 configs
+    r_start: list
+        list which contains the first config to be read for each replicum,
+        configs with smaller numbers are skipped. Entries may be None.
+        Can be combined with `StreamingObs.next_configs` to only read new configs.
 
     Returns
     -------
@@ -138,6 +142,13 @@ def read_sfcf(path, prefix, name, quarks='.*', corr_type='bi', noffset=0, wf=0,
             new_names = _get_appended_rep_names(ls, prefix, name, ens_name)
         new_names = sort_names(new_names)
 
+    if 'r_start' in kwargs:
+        r_start = kwargs.get('r_start')
+        if len(r_start) != replica:
+            raise Exception('r_start does not match number of replicas')
+    else:
+        r_start = [None] * replica
+
     idl = []
     if not appended:
         for i, item in enumerate(ls):
@@ -148,7 +159,6 @@ def read_sfcf(path, prefix, name, quarks='.*', corr_type='bi', noffset=0, wf=0,
                 files = []
             sub_ls = _find_files(rep_path, prefix, compact, files)
             rep_idl = []
-            no_cfg = len(sub_ls)
             for cfg in sub_ls:
                 try:
                     if compact:
@@ -157,6 +167,12 @@ def read_sfcf(path, prefix, name, quarks='.*', corr_type='bi', noffset=0, wf=0,
                         rep_idl.append(int(cfg[3:]))
                 except Exception:
                     raise Exception("Couldn't parse idl from directroy, problem with file " + cfg)
+            if r_start[i] is not None:
+                sub_ls = [cfg for cfg, cfg_idl in zip(sub_ls, rep_idl) if cfg_idl >= r_start[i]]
+                rep_idl = [cfg_idl for cfg_idl in rep_idl if cfg_idl >= r_start[i]]
+                if not sub_ls:
+                    raise Exception('No configs from ' + str(r_start[i]) + ' on found for replicum ' + item)
+            no_cfg = len(sub_ls)
             rep_idl.sort()
             # maybe there is a better way to print the idls
             if not silent:
@@ -216,7 +232,9 @@ def read_sfcf(path, prefix, name, quarks='.*', corr_type='bi', noffset=0, wf=0,
         for rep, file in enumerate(ls):
             rep_idl = []
             filename = path + '/' + file
-            T, rep_idl, rep_data = _read_append_rep(filename, pattern, b2b, cfg_separator, im, single)
+            T, rep_idl, rep_data = _read_append_rep(filename, pattern, b2b, cfg_separator, im, single, r_start[rep])
+            if not rep_idl:
+                raise Exception('No configs from ' + str(r_start[rep]) + ' on found for replicum ' + file)
             if rep == 0:
                 for t in range(T):
                     deltas.append([])
@@ -345,12 +363,16 @@ def _read_compact_rep(path, rep, sub_ls, start_read, T, b2b, name, im):
     return deltas
 
 
-def _read_chunk(chunk, gauge_line, cfg_sep, start_read, T, corr_line, b2b, pattern, im, single):
+def _read_chunk_idl(chunk, gauge_line, cfg_sep):
     try:
-        idl = int(chunk[gauge_line].split(cfg_sep)[-1])
+        return int(chunk[gauge_line].split(cfg_sep)[-1])
     except Exception:
         raise Exception("Couldn't parse idl from directory, problem with chunk around line ", gauge_line)
 
+
+def _read_chunk(chunk, gauge_line, cfg_sep, start_read, T, corr_line, b2b, pattern, im, single):
+    idl = _read_chunk_idl(chunk, gauge_line, cfg_sep)
+
     found_pat = ""
     data = []
     for li in chunk[corr_line + 1:corr_line + 6 + b2b]:
@@ -362,7 +384,7 @@ def _read_chunk(chunk, gauge_line, cfg_sep, start_read, T, corr_line, b2b, patte
     return idl, data
 
 
-def _read_append_rep(filename, pattern, b2b, cfg_separator, im, single):
+def _read_append_rep(filename, pattern, b2b, cfg_separator, im, single, r_start=None):
     with open(filename, 'r') as fp:
         content = fp.readlines()
         data_starts = []
@@ -398,6 +420,9 @@ def _read_append_rep(filename, pattern, b2b, cfg_separator, im, single):
             start = data_starts[cnfg]
             stop = start + data_starts[1]
             chunk = content[start:stop]
+            if r_start is not None and _read_chunk_idl(chunk, gauge_line, cfg_separator) < r_start:
+                # Configs before r_start are skipped without parsing their data
+                continue
             idl, data = _read_chunk(chunk, gauge_line, cfg_separator, start_read, T, corr_line, b2b, pattern, im, single)
             rep_idl.append(idl)
             rep_data.append(data)
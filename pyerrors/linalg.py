@@ -1,6 +1,6 @@
 import numpy as np
 import autograd.numpy as anp  # Thinly-wrapped numpy
-from .obs import derived_observable, CObs, Obs, import_jackknife
+from .obs import derived_observable, CObs, Obs, ObsArray, cov_Obs, import_jackknife
 
 
 def matmul(*operands):
@@ -196,44 +196,97 @@ def einsum(subscripts, *operands):
 
 def inv(x):
     """Inverse of Obs or CObs valued matrices."""
-    return _mat_mat_op(anp.linalg.inv, x)
+    return _mat_mat_op(_inv_decomposition, x)
 
 
 def cholesky(x):
     """Cholesky decomposition of Obs valued matrices."""
     if any(isinstance(o, CObs) for o in x.ravel()):
         raise Exception("Cholesky decomposition is not implemented for CObs.")
-    return _mat_mat_op(anp.linalg.cholesky, x)
+    return _mat_mat_op(_cholesky_decomposition, x)
 
 
 def det(x):
     """Determinant of Obs valued matrices."""
-    return _scalar_mat_op(anp.linalg.det, x)
+    if not isinstance(x, np.ndarray):
+        raise TypeError('Unproper type of input.')
+    return _propagate(_det_decomposition, x)[0][()]
 
 
-def _scalar_mat_op(op, obs, **kwargs):
-    """Computes the matrix to scalar operation op to a given matrix of Obs."""
-    def _mat(x, **kwargs):
-        dim = int(np.sqrt(len(x)))
+def _obs_array(obs):
+    """Convert a matrix of Obs which may contain int or float entries to an ObsArray."""
+    obs = np.array(obs, dtype=object)
+    for index, entry in np.ndenumerate(obs):
+        # Workaround for matrix operations containing non Obs data, see derived_observable
+        if isinstance(entry, (int, float)):
+            obs[index] = cov_Obs(entry, 0.0, "###dummy_covobs###")
+    return ObsArray(obs)
 
-        mat = []
-        for i in range(dim):
-            row = []
-            for j in range(dim):
-                row.append(x[j + dim * i])
-            mat.append(row)
 
-        return op(anp.array(mat))
+def _propagate(decomposition, obs):
+    """Apply decomposition to a matrix of Obs, see ObsArray._linear_map."""
+    return [np.asarray(o) for o in _obs_array(obs)._linear_map(decomposition)]
 
-    if isinstance(obs, np.ndarray):
-        raveled_obs = (1 * (obs.ravel())).tolist()
-    else:
-        raise TypeError('Unproper type of input.')
-    return derived_observable(_mat, raveled_obs, **kwargs)
 
+def _inv_decomposition(x):
+    """Inverse of x and its derivative dA^-1 = -A^-1 dA A^-1."""
+    inverse = np.linalg.inv(x)
+
+    def linear(d):
+        return [-np.einsum('ij,jkc,kl->ilc', inverse, d, inverse, optimize=True)]
+
+    return [inverse], linear
+
+
+def _det_decomposition(x):
+    """Determinant of x and its derivative d det(A) = det(A) tr(A^-1 dA)."""
+    determinant = np.linalg.det(x)
+
+    def linear(d):
+        return [np.einsum('ji,ijc->c', determinant * np.linalg.inv(x), d)]
+
+    return [determinant], linear
+
+
+def _cholesky_decomposition(x):
+    """Cholesky factor of x and its derivative dL = L Phi(L^-1 dA L^-T).
+
+    Phi takes the lower triangle and halves the diagonal. As in the autograd
+    implementation the perturbation dA is symmetrized.
+    """
+    factor = np.linalg.cholesky(x)
+
+    def linear(d):
+        factor_inv = np.linalg.inv(factor)
+        sym = (d + np.swapaxes(d, 0, 1)) / 2
+        phi = np.einsum('ij,jkc,lk->ilc', factor_inv, sym, factor_inv, optimize=True)
+        phi *= (np.tril(np.ones(x.shape)) - np.identity(len(x)) / 2)[:, :, np.newaxis]
+        return [np.einsum('ij,jkc->ikc', factor, phi)]
+
+    return [factor], linear
+
+
+def _eigh_decomposition(x):
+    """Eigenvalues and eigenvectors of x and their first order perturbations.
+
+    dw_i = v_i^T dA v_i and dv_j = sum_i v_i (v_i^T dA v_j) / (w_j - w_i).
+    As np.linalg.eigh only uses the lower triangle of x, the same holds for dA.
+    """
+    w, v = np.linalg.eigh(x)
+
+    def linear(d):
+        lower = np.tril(np.ones(x.shape), -1)[:, :, np.newaxis]
+        sym = d * (lower + np.identity(len(x))[:, :, np.newaxis]) + np.swapaxes(d * lower, 0, 1)
+        rotated = np.einsum('ji,jkc,kl->ilc', v, sym, v, optimize=True)
+        off_diag = np.ones(x.shape) - np.identity(len(x))
+        F = off_diag / (w[np.newaxis, :] - w[:, np.newaxis] + np.identity(len(x)))
+        return [np.einsum('iic->ic', rotated), np.einsum('ij,jkc->ikc', v, F[:, :, np.newaxis] * rotated)]
+
+    return [w, v], linear
 
-def _mat_mat_op(op, obs, **kwargs):
-    """Computes the matrix to matrix operation op to a given matrix of Obs."""
+
+def _mat_mat_op(decomposition, obs, **kwargs):
+    """Computes the matrix to matrix operation described by decomposition for a given matrix of Obs."""
     # Use real representation to calculate matrix operations for complex matrices
     if any(isinstance(o, CObs) for o in obs.ravel()):
         A = np.empty_like(obs)
@@ -246,7 +299,7 @@ def _mat_mat_op(op, obs, **kwargs):
                 A[n, m] = entry
                 B[n, m] = 0.0
         big_matrix = np.block([[A, -B], [B, A]])
-        op_big_matrix = derived_observable(lambda x, **kwargs: op(x), [big_matrix], array_mode=True)[0]
+        op_big_matrix = _propagate(decomposition, big_matrix)[0]
         dim = op_big_matrix.shape[0]
         op_A = op_big_matrix[0: dim // 2, 0: dim // 2]
         op_B = op_big_matrix[dim // 2:, 0: dim // 2]
@@ -255,13 +308,12 @@ def _mat_mat_op(op, obs, **kwargs):
             res[n, m] = CObs(op_A[n, m], op_B[n, m])
         return res
     else:
-        return derived_observable(lambda x, **kwargs: op(x), [obs], array_mode=True)[0]
+        return _propagate(decomposition, obs)[0]
 
 
 def eigh(obs, **kwargs):
     """Computes the eigenvalues and eigenvectors of a given hermitian matrix of Obs according to np.linalg.eigh."""
-    w = derived_observable(lambda x, **kwargs: anp.linalg.eigh(x)[0], obs)
-    v = derived_observable(lambda x, **kwargs: anp.linalg.eigh(x)[1], obs)
+    w, v = _propagate(_eigh_decomposition, obs)
     return w, v
 
 
@@ -278,7 +330,12 @@ def pinv(obs, **kwargs):
 
 def svd(obs, **kwargs):
     """Computes the singular value decomposition of a matrix of Obs."""
-    u = derived_observable(lambda x, **kwargs: anp.linalg.svd(x, full_matrices=False)[0], obs)
-    s = derived_observable(lambda x, **kwargs: anp.linalg.svd(x, full_matrices=False)[1], obs)
-    vh = derived_observable(lambda x, **kwargs: anp.linalg.svd(x, full_matrices=False)[2], obs)
-    return (u, s, vh)
+    m, n = obs.shape
+    k = min(m, n)
+
+    def _svd(x, **kwargs):
+        u, s, vh = anp.linalg.svd(x, full_matrices=False)
+        return anp.concatenate([anp.ravel(u), s, anp.ravel(vh)])
+
+    usvh = derived_observable(_svd, obs)
+    return (usvh[:m * k].reshape(m, k), usvh[m * k: (m + 1) * k], usvh[(m + 1) * k:].reshape(k, n))
@@ -1,15 +1,25 @@
+import os
+import tempfile
+import threading
 import warnings
 import hashlib
 import pickle
+import weakref
+import operator
+import contextvars
+import concurrent.futures
+from contextlib import contextmanager
 from math import gcd
-from functools import reduce
+from functools import reduce, lru_cache
 import numpy as np
 import autograd.numpy as anp  # Thinly-wrapped numpy
 from autograd import jacobian
 import matplotlib.pyplot as plt
+import scipy.fft
+import scipy.signal
 from scipy.stats import skew, skewtest, kurtosis, kurtosistest
 import numdifftools as nd
-from itertools import groupby
+from itertools import groupby, count
 from .covobs import Covobs
 
 # Improve print output of numpy.ndarrays containing Obs objects.
@@ -44,12 +54,22 @@ class Obs:
     N_sigma_dict : dict
         Dictionary for N_sigma values. If an entry for a given ensemble exists
         this overwrites the standard value for that ensemble.
+    executor_global : concurrent.futures.Executor
+        Standard executor to which the autocorrelation analysis of the gamma
+        method is submitted (default None, serial evaluation).
+
+    Notes
+    -----
+    The class attributes above are shared by all threads. Parameters which
+    are local to a thread or task can be set with `analysis_context`.
     """
-    __slots__ = ['names', 'shape', 'r_values', 'deltas', 'N', '_value', '_dvalue',
+    __slots__ = ['names', 'shape', 'r_values', '_deltas', 'N', '_value', '_dvalue',
                  'ddvalue', 'reweighted', 'S', 'tau_exp', 'N_sigma',
                  'e_dvalue', 'e_ddvalue', 'e_tauint', 'e_dtauint',
                  'e_windowsize', 'e_rho', 'e_drho', 'e_n_tauint', 'e_n_dtauint',
-                 'idl', 'tag', '_covobs', '__dict__']
+                 '_idl', 'tag', '_covobs', '__dict__']
+
+    _lazy = None
 
     S_global = 2.0
     S_dict = {}
@@ -57,6 +77,7 @@ class Obs:
     tau_exp_dict = {}
     N_sigma_global = 1.0
     N_sigma_dict = {}
+    executor_global = None
 
     def __init__(self, samples, names, idl=None, **kwargs):
         """ Initialize Obs object.
@@ -101,21 +122,18 @@ class Obs:
         if idl is not None:
             for name, idx in sorted(zip(names, idl)):
                 if isinstance(idx, range):
-                    self.idl[name] = idx
+                    self.idl[name] = _intern_idl(idx)
                 elif isinstance(idx, (list, np.ndarray)):
-                    dc = np.unique(np.diff(idx))
-                    if np.any(dc < 0):
+                    self.idl[name] = _regularize_idl(_intern_idl(idx))
+                    if self.idl[name] is None:
                         raise ValueError("Unsorted idx for idl[%s]" % (name))
-                    if len(dc) == 1:
-                        self.idl[name] = range(idx[0], idx[-1] + dc[0], dc[0])
-                    else:
-                        self.idl[name] = list(idx)
                 else:
                     raise TypeError('incompatible type for idl[%s].' % (name))
         else:
             for name, sample in sorted(zip(names, samples)):
-                self.idl[name] = range(1, len(sample) + 1)
+                self.idl[name] = _intern_idl(range(1, len(sample) + 1))
 
+        store = _memmap_store.get()
         if kwargs.get("means") is not None:
             for name, sample, mean in sorted(zip(names, samples, kwargs.get("means"))):
                 self.shape[name] = len(self.idl[name])
@@ -129,16 +147,101 @@ class Obs:
                 if len(sample) != self.shape[name]:
                     raise ValueError('Incompatible samples and idx for %s: %d vs. %d' % (name, len(sample), self.shape[name]))
                 self.r_values[name] = np.mean(sample)
-                self.deltas[name] = sample - self.r_values[name]
+                if store is None:
+                    self.deltas[name] = sample - self.r_values[name]
+                else:
+                    self.deltas[name] = np.subtract(sample, self.r_values[name], out=store.allocate(len(sample)))
                 self._value += self.shape[name] * self.r_values[name]
             self._value /= self.N
 
+        if store is not None:
+            self.deltas = {name: store.store(delta) for name, delta in self.deltas.items()}
+
         self._dvalue = 0.0
         self.ddvalue = 0.0
         self.reweighted = False
 
         self.tag = None
 
+    def __getattr__(self, name):
+        # Only called for attributes which are not set, i.e. the sample related attributes of lazily evaluated Obs.
+        if name in _lazy_attributes and self._lazy is not None:
+            self._materialize()
+            return getattr(self, name)
+        raise AttributeError("'Obs' object has no attribute '%s'" % (name))
+
+    def __getstate__(self):
+        if self._lazy is not None:
+            self._materialize()
+        slots = {name: getattr(self, name) for name in Obs.__slots__ if name != '__dict__' and hasattr(self, name)}
+        state = {key: value for key, value in self.__dict__.items() if key != '_gamma_memo'}
+        return (state or None, slots)
+
+    @classmethod
+    def _from_graph(cls, value, node, reweighted):
+        """Create a lazily evaluated Obs, whose samples are only combined when they are accessed."""
+        new = cls.__new__(cls)
+        new._value = value
+        new._dvalue = 0.0
+        new.ddvalue = 0.0
+        new.reweighted = reweighted
+        new.tag = None
+        new._lazy = node
+        return new
+
+    def _materialize(self):
+        """Combine the samples of a lazily evaluated Obs.
+
+        The gradient with respect to the materialized Obs the graph is built
+        upon is accumulated in one reverse pass, the samples are then combined
+        by a single call of derived_observable.
+        """
+        order = []
+        visited = set()
+        stack = [(self, False)]
+        while stack:
+            obs, processed = stack.pop()
+            if processed:
+                order.append(obs)
+                continue
+            if id(obs) in visited:
+                continue
+            visited.add(id(obs))
+            stack.append((obs, True))
+            for parent in obs._lazy.parents:
+                if parent._lazy is not None and id(parent) not in visited:
+                    stack.append((parent, False))
+
+        adjoints = {id(self): 1.0}
+        leaves = {}
+        leaf_grads = {}
+        for obs in reversed(order):
+            adjoint = adjoints.pop(id(obs), 0.0)
+            for parent, grad in zip(obs._lazy.parents, obs._lazy.grads):
+                if parent._lazy is not None:
+                    adjoints[id(parent)] = adjoints.get(id(parent), 0.0) + adjoint * grad
+                else:
+                    leaves[id(parent)] = parent
+                    leaf_grads[id(parent)] = leaf_grads.get(id(parent), 0.0) + adjoint * grad
+        leaf_list = list(leaves.values())
+
+        def _evaluate_graph(x, **kwargs):
+            values = {id(leaf): x[i] for i, leaf in enumerate(leaf_list)}
+            for obs in order:
+                node = obs._lazy
+                values[id(obs)] = node.func(np.array([values[id(parent)] for parent in node.parents]).reshape(node.shape), **node.kwargs)
+            return np.float64(values[id(self)])
+
+        token = _lazy_mode.set(False)
+        try:
+            res = derived_observable(_evaluate_graph, leaf_list, man_grad=[leaf_grads[id(leaf)] for leaf in leaf_list])
+        finally:
+            _lazy_mode.reset(token)
+        for name in _lazy_attributes:
+            setattr(self, name, getattr(res, name))
+        self.reweighted = res.reweighted
+        del self._lazy
+
     @property
     def value(self):
         return self._value
@@ -147,6 +250,22 @@ class Obs:
     def dvalue(self):
         return self._dvalue
 
+    @property
+    def deltas(self):
+        return self._deltas
+
+    @deltas.setter
+    def deltas(self, deltas):
+        self._deltas = deltas if isinstance(deltas, _VersionedDict) else _VersionedDict(deltas)
+
+    @property
+    def idl(self):
+        return self._idl
+
+    @idl.setter
+    def idl(self, idl):
+        self._idl = idl if isinstance(idl, _VersionedDict) else _VersionedDict(idl)
+
     @property
     def e_names(self):
         return sorted(set([o.split('|')[0] for o in self.names]))
@@ -188,202 +307,36 @@ class Obs:
         N_sigma : float
             number of standard deviations from zero until the tail is
             attached to the autocorrelation function (default 1).
-        fft : bool
-            determines whether the fft algorithm is used for the computation
-            of the autocorrelation function (default True)
+        fft : bool, str or callable
+            determines how the autocorrelation function is computed. If True
+            (default), numpy.fft is used. If False, the direct sum is used.
+            'numpy', 'scipy' and 'direct' select the respective backend
+            explicitly. 'auto' uses the direct sum for short series, the pairs
+            of configurations within the summation window for gappy idl and
+            scipy.fft with padding to a fast transform length otherwise. A
+            callable f(deltas, max_gamma) which returns the unnormalized
+            autocorrelation function of the deltas on their last axis for the
+            lags 0 to max_gamma - 1 can be supplied as custom backend.
+        workers : int
+            number of threads used by scipy.fft for this call, see
+            scipy.fft.set_workers (default None, i.e. the setting of scipy.fft).
+        executor : concurrent.futures.Executor
+            executor to which the autocorrelation analysis of every ensemble
+            is submitted, e.g. a ThreadPoolExecutor or ProcessPoolExecutor
+            (default from `analysis_context` or Obs.executor_global). If None the ensembles are analysed
+            serially. The results do not depend on the executor.
+
+        Notes
+        -----
+        The results are memoized per ensemble. Repeated calls with the same
+        parameters return immediately unless the deltas or idl of the
+        ensemble were assigned in the meantime. The arrays of the deltas are
+        read-only, modifications require the assignment of a new array.
         """
-
-        e_content = self.e_content
-        self.e_dvalue = {}
-        self.e_ddvalue = {}
-        self.e_tauint = {}
-        self.e_dtauint = {}
-        self.e_windowsize = {}
-        self.e_n_tauint = {}
-        self.e_n_dtauint = {}
-        e_gamma = {}
-        self.e_rho = {}
-        self.e_drho = {}
-        self._dvalue = 0
-        self.ddvalue = 0
-
-        self.S = {}
-        self.tau_exp = {}
-        self.N_sigma = {}
-
-        if kwargs.get('fft') is False:
-            fft = False
-        else:
-            fft = True
-
-        def _parse_kwarg(kwarg_name):
-            if kwarg_name in kwargs:
-                tmp = kwargs.get(kwarg_name)
-                if isinstance(tmp, (int, float)):
-                    if tmp < 0:
-                        raise Exception(kwarg_name + ' has to be larger or equal to 0.')
-                    for e, e_name in enumerate(self.e_names):
-                        getattr(self, kwarg_name)[e_name] = tmp
-                else:
-                    raise TypeError(kwarg_name + ' is not in proper format.')
-            else:
-                for e, e_name in enumerate(self.e_names):
-                    if e_name in getattr(Obs, kwarg_name + '_dict'):
-                        getattr(self, kwarg_name)[e_name] = getattr(Obs, kwarg_name + '_dict')[e_name]
-                    else:
-                        getattr(self, kwarg_name)[e_name] = getattr(Obs, kwarg_name + '_global')
-
-        _parse_kwarg('S')
-        _parse_kwarg('tau_exp')
-        _parse_kwarg('N_sigma')
-
-        for e, e_name in enumerate(self.mc_names):
-            r_length = []
-            for r_name in e_content[e_name]:
-                if isinstance(self.idl[r_name], range):
-                    r_length.append(len(self.idl[r_name]))
-                else:
-                    r_length.append((self.idl[r_name][-1] - self.idl[r_name][0] + 1))
-
-            e_N = np.sum([self.shape[r_name] for r_name in e_content[e_name]])
-            w_max = max(r_length) // 2
-            e_gamma[e_name] = np.zeros(w_max)
-            self.e_rho[e_name] = np.zeros(w_max)
-            self.e_drho[e_name] = np.zeros(w_max)
-
-            for r_name in e_content[e_name]:
-                e_gamma[e_name] += self._calc_gamma(self.deltas[r_name], self.idl[r_name], self.shape[r_name], w_max, fft)
-
-            gamma_div = np.zeros(w_max)
-            for r_name in e_content[e_name]:
-                gamma_div += self._calc_gamma(np.ones((self.shape[r_name])), self.idl[r_name], self.shape[r_name], w_max, fft)
-            gamma_div[gamma_div < 1] = 1.0
-            e_gamma[e_name] /= gamma_div[:w_max]
-
-            if np.abs(e_gamma[e_name][0]) < 10 * np.finfo(float).tiny:  # Prevent division by zero
-                self.e_tauint[e_name] = 0.5
-                self.e_dtauint[e_name] = 0.0
-                self.e_dvalue[e_name] = 0.0
-                self.e_ddvalue[e_name] = 0.0
-                self.e_windowsize[e_name] = 0
-                continue
-
-            gaps = []
-            for r_name in e_content[e_name]:
-                if isinstance(self.idl[r_name], range):
-                    gaps.append(1)
-                else:
-                    gaps.append(np.min(np.diff(self.idl[r_name])))
-
-            if not np.all([gi == gaps[0] for gi in gaps]):
-                raise Exception(f"Replica for ensemble {e_name} are not equally spaced.", gaps)
-            else:
-                gapsize = gaps[0]
-
-            self.e_rho[e_name] = e_gamma[e_name][:w_max] / e_gamma[e_name][0]
-            self.e_n_tauint[e_name] = np.cumsum(np.concatenate(([0.5], self.e_rho[e_name][1:])))
-            # Make sure no entry of tauint is smaller than 0.5
-            self.e_n_tauint[e_name][self.e_n_tauint[e_name] <= 0.5] = 0.5 + np.finfo(np.float64).eps
-            # hep-lat/0306017 eq. (42)
-            self.e_n_dtauint[e_name] = self.e_n_tauint[e_name] * 2 * np.sqrt(np.abs(np.arange(w_max) / gapsize + 0.5 - self.e_n_tauint[e_name]) / e_N)
-            self.e_n_dtauint[e_name][0] = 0.0
-
-            def _compute_drho(i):
-                tmp = (self.e_rho[e_name][i + 1:w_max]
-                       + np.concatenate([self.e_rho[e_name][i - 1:None if i - w_max // 2 < 0 else 2 * (i - w_max // 2):-1],
-                                         self.e_rho[e_name][1:max(1, w_max - 2 * i)]])
-                       - 2 * self.e_rho[e_name][i] * self.e_rho[e_name][1:w_max - i])
-                self.e_drho[e_name][i] = np.sqrt(np.sum(tmp ** 2) / e_N)
-
-            if self.tau_exp[e_name] > 0:
-                _compute_drho(gapsize)
-                texp = self.tau_exp[e_name]
-                # Critical slowing down analysis
-                if w_max // 2 <= 1:
-                    raise Exception("Need at least 8 samples for tau_exp error analysis")
-                for n in range(gapsize, w_max // 2, gapsize):
-                    _compute_drho(n + gapsize)
-                    if (self.e_rho[e_name][n] - self.N_sigma[e_name] * self.e_drho[e_name][n]) < 0 or n >= w_max // 2 - 2:
-                        # Bias correction hep-lat/0306017 eq. (49) included
-                        self.e_tauint[e_name] = self.e_n_tauint[e_name][n] * (1 + (2 * n / gapsize + 1) / e_N) / (1 + 1 / e_N) + texp * np.abs(self.e_rho[e_name][n + 1])  # The absolute makes sure, that the tail contribution is always positive
-                        self.e_dtauint[e_name] = np.sqrt(self.e_n_dtauint[e_name][n] ** 2 + texp ** 2 * self.e_drho[e_name][n + 1] ** 2)
-                        # Error of tau_exp neglected so far, missing term: self.e_rho[e_name][n + 1] ** 2 * d_tau_exp ** 2
-                        self.e_dvalue[e_name] = np.sqrt(2 * self.e_tauint[e_name] * e_gamma[e_name][0] * (1 + 1 / e_N) / e_N)
-                        self.e_ddvalue[e_name] = self.e_dvalue[e_name] * np.sqrt((n / gapsize + 0.5) / e_N)
-                        self.e_windowsize[e_name] = n
-                        break
-            else:
-                if self.S[e_name] == 0.0:
-                    self.e_tauint[e_name] = 0.5
-                    self.e_dtauint[e_name] = 0.0
-                    self.e_dvalue[e_name] = np.sqrt(e_gamma[e_name][0] / (e_N - 1))
-                    self.e_ddvalue[e_name] = self.e_dvalue[e_name] * np.sqrt(0.5 / e_N)
-                    self.e_windowsize[e_name] = 0
-                else:
-                    # Standard automatic windowing procedure
-                    tau = self.S[e_name] / np.log((2 * self.e_n_tauint[e_name][gapsize::gapsize] + 1) / (2 * self.e_n_tauint[e_name][gapsize::gapsize] - 1))
-                    g_w = np.exp(- np.arange(1, len(tau) + 1) / tau) - tau / np.sqrt(np.arange(1, len(tau) + 1) * e_N)
-                    for n in range(1, w_max // gapsize):
-                        if g_w[n - 1] < 0 or n >= w_max // gapsize - 1:
-                            _compute_drho(gapsize * n)
-                            n *= gapsize
-                            self.e_tauint[e_name] = self.e_n_tauint[e_name][n] * (1 + (2 * n / gapsize + 1) / e_N) / (1 + 1 / e_N)  # Bias correction hep-lat/0306017 eq. (49)
-                            self.e_dtauint[e_name] = self.e_n_dtauint[e_name][n]
-                            self.e_dvalue[e_name] = np.sqrt(2 * self.e_tauint[e_name] * e_gamma[e_name][0] * (1 + 1 / e_N) / e_N)
-                            self.e_ddvalue[e_name] = self.e_dvalue[e_name] * np.sqrt((n / gapsize + 0.5) / e_N)
-                            self.e_windowsize[e_name] = n
-                            break
-
-            self._dvalue += self.e_dvalue[e_name] ** 2
-            self.ddvalue += (self.e_dvalue[e_name] * self.e_ddvalue[e_name]) ** 2
-
-        for e_name in self.cov_names:
-            self.e_dvalue[e_name] = np.sqrt(self.covobs[e_name].errsq())
-            self.e_ddvalue[e_name] = 0
-            self._dvalue += self.e_dvalue[e_name]**2
-
-        self._dvalue = np.sqrt(self._dvalue)
-        if self._dvalue == 0.0:
-            self.ddvalue = 0.0
-        else:
-            self.ddvalue = np.sqrt(self.ddvalue) / self._dvalue
-        return
+        _gamma_method([self], **kwargs)
 
     gm = gamma_method
 
-    def _calc_gamma(self, deltas, idx, shape, w_max, fft):
-        """Calculate Gamma_{AA} from the deltas, which are defined on idx.
-           idx is assumed to be a contiguous range (possibly with a stepsize != 1)
-
-        Parameters
-        ----------
-        deltas : list
-            List of fluctuations
-        idx : list
-            List or range of configurations on which the deltas are defined.
-        shape : int
-            Number of configurations in idx.
-        w_max : int
-            Upper bound for the summation window.
-        fft : bool
-            determines whether the fft algorithm is used for the computation
-            of the autocorrelation function.
-        """
-        gamma = np.zeros(w_max)
-        deltas = _expand_deltas(deltas, idx, shape)
-        new_shape = len(deltas)
-        if fft:
-            max_gamma = min(new_shape, w_max)
-            # The padding for the fft has to be even
-            padding = new_shape + max_gamma + (new_shape + max_gamma) % 2
-            gamma[:max_gamma] += np.fft.irfft(np.abs(np.fft.rfft(deltas, padding)) ** 2)[:max_gamma]
-        else:
-            for n in range(w_max):
-                if new_shape - n >= 0:
-                    gamma[n] += deltas[0:new_shape - n].dot(deltas[n:new_shape])
-
-        return gamma
-
     def details(self, ens_content=True):
         """Output detailed properties of the Obs.
 
@@ -740,8 +693,8 @@ class Obs:
             return derived_observable(lambda x, **kwargs: x[0] + x[1], [self, y], man_grad=[1, 1])
         else:
             if isinstance(y, np.ndarray):
-                return np.array([self + o for o in y])
-            elif y.__class__.__name__ in ['Corr', 'CObs']:
+                return np.add(self, y)
+            elif y.__class__.__name__ in ['Corr', 'CObs', 'ObsArray']:
                 return NotImplemented
             else:
                 return derived_observable(lambda x, **kwargs: x[0] + y, [self], man_grad=[1])
@@ -754,10 +707,10 @@ class Obs:
             return derived_observable(lambda x, **kwargs: x[0] * x[1], [self, y], man_grad=[y.value, self.value])
         else:
             if isinstance(y, np.ndarray):
-                return np.array([self * o for o in y])
+                return np.multiply(self, y)
             elif isinstance(y, complex):
                 return CObs(self * y.real, self * y.imag)
-            elif y.__class__.__name__ in ['Corr', 'CObs']:
+            elif y.__class__.__name__ in ['Corr', 'CObs', 'ObsArray']:
                 return NotImplemented
             else:
                 return derived_observable(lambda x, **kwargs: x[0] * y, [self], man_grad=[y])
@@ -770,8 +723,8 @@ class Obs:
             return derived_observable(lambda x, **kwargs: x[0] - x[1], [self, y], man_grad=[1, -1])
         else:
             if isinstance(y, np.ndarray):
-                return np.array([self - o for o in y])
-            elif y.__class__.__name__ in ['Corr', 'CObs']:
+                return np.subtract(self, y)
+            elif y.__class__.__name__ in ['Corr', 'CObs', 'ObsArray']:
                 return NotImplemented
             else:
                 return derived_observable(lambda x, **kwargs: x[0] - y, [self], man_grad=[1])
@@ -790,8 +743,8 @@ class Obs:
             return derived_observable(lambda x, **kwargs: x[0] / x[1], [self, y], man_grad=[1 / y.value, - self.value / y.value ** 2])
         else:
             if isinstance(y, np.ndarray):
-                return np.array([self / o for o in y])
-            elif y.__class__.__name__ in ['Corr', 'CObs']:
+                return np.divide(self, y)
+            elif y.__class__.__name__ in ['Corr', 'CObs', 'ObsArray']:
                 return NotImplemented
             else:
                 return derived_observable(lambda x, **kwargs: x[0] / y, [self], man_grad=[1 / y])
@@ -801,26 +754,33 @@ class Obs:
             return derived_observable(lambda x, **kwargs: x[0] / x[1], [y, self], man_grad=[1 / self.value, - y.value / self.value ** 2])
         else:
             if isinstance(y, np.ndarray):
-                return np.array([o / self for o in y])
-            elif y.__class__.__name__ in ['Corr', 'CObs']:
+                return np.divide(y, self)
+            elif y.__class__.__name__ in ['Corr', 'CObs', 'ObsArray']:
                 return NotImplemented
             else:
                 return derived_observable(lambda x, **kwargs: y / x[0], [self], man_grad=[-y / self.value ** 2])
 
     def __pow__(self, y):
         if isinstance(y, Obs):
-            return derived_observable(lambda x: x[0] ** x[1], [self, y])
+            return derived_observable(lambda x, **kwargs: x[0] ** x[1], [self, y], man_grad=[_pow_grad_base(self.value, y.value), _pow_grad_exponent(self.value, y.value)])
+        elif isinstance(y, ObsArray):
+            return NotImplemented
+        elif isinstance(y, np.ndarray):
+            return np.power(self, y)
         else:
-            return derived_observable(lambda x: x[0] ** y, [self])
+            return derived_observable(lambda x, **kwargs: x[0] ** y, [self], man_grad=[_pow_grad_base(self.value, y)])
 
     def __rpow__(self, y):
         if isinstance(y, Obs):
-            return derived_observable(lambda x: x[0] ** x[1], [y, self])
+            return derived_observable(lambda x, **kwargs: x[0] ** x[1], [y, self], man_grad=[_pow_grad_base(y.value, self.value), _pow_grad_exponent(y.value, self.value)])
         else:
-            return derived_observable(lambda x: y ** x[0], [self])
+            return derived_observable(lambda x, **kwargs: y ** x[0], [self], man_grad=[_pow_grad_exponent(y, self.value)])
 
     def __abs__(self):
-        return derived_observable(lambda x: anp.abs(x[0]), [self])
+        return derived_observable(lambda x, **kwargs: anp.abs(x[0]), [self], man_grad=[np.sign(self.value)])
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        return _batched_ufunc(ufunc, method, *inputs, **kwargs)
 
     # Overload numpy functions
     def sqrt(self):
@@ -842,13 +802,13 @@ class Obs:
         return derived_observable(lambda x, **kwargs: np.tan(x[0]), [self], man_grad=[1 / np.cos(self.value) ** 2])
 
     def arcsin(self):
-        return derived_observable(lambda x: anp.arcsin(x[0]), [self])
+        return derived_observable(lambda x, **kwargs: np.arcsin(x[0]), [self], man_grad=[1 / np.sqrt(1 - self.value ** 2)])
 
     def arccos(self):
-        return derived_observable(lambda x: anp.arccos(x[0]), [self])
+        return derived_observable(lambda x, **kwargs: np.arccos(x[0]), [self], man_grad=[-1 / np.sqrt(1 - self.value ** 2)])
 
     def arctan(self):
-        return derived_observable(lambda x: anp.arctan(x[0]), [self])
+        return derived_observable(lambda x, **kwargs: np.arctan(x[0]), [self], man_grad=[1 / (1 + self.value ** 2)])
 
     def sinh(self):
         return derived_observable(lambda x, **kwargs: np.sinh(x[0]), [self], man_grad=[np.cosh(self.value)])
@@ -860,13 +820,13 @@ class Obs:
         return derived_observable(lambda x, **kwargs: np.tanh(x[0]), [self], man_grad=[1 / np.cosh(self.value) ** 2])
 
     def arcsinh(self):
-        return derived_observable(lambda x: anp.arcsinh(x[0]), [self])
+        return derived_observable(lambda x, **kwargs: np.arcsinh(x[0]), [self], man_grad=[1 / np.sqrt(self.value ** 2 + 1)])
 
     def arccosh(self):
-        return derived_observable(lambda x: anp.arccosh(x[0]), [self])
+        return derived_observable(lambda x, **kwargs: np.arccosh(x[0]), [self], man_grad=[1 / np.sqrt(self.value ** 2 - 1)])
 
     def arctanh(self):
-        return derived_observable(lambda x: anp.arctanh(x[0]), [self])
+        return derived_observable(lambda x, **kwargs: np.arctanh(x[0]), [self], man_grad=[1 / (1 - self.value ** 2)])
 
 
 class CObs:
@@ -973,6 +933,9 @@ class CObs:
     def __eq__(self, other):
         return self.real == other.real and self.imag == other.imag
 
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        return _batched_ufunc(ufunc, method, *inputs, **kwargs)
+
     def __str__(self):
         return '(' + str(self.real) + int(self.imag >= 0.0) * '+' + str(self.imag) + 'j)'
 
@@ -980,227 +943,1100 @@ class CObs:
         return 'CObs[' + str(self) + ']'
 
 
-def _format_uncertainty(value, dvalue):
-    """Creates a string of a value and its error in paranthesis notation, e.g., 13.02(45)"""
-    if dvalue == 0.0:
-        return str(value)
-    fexp = np.floor(np.log10(dvalue))
-    if fexp < 0.0:
-        return '{:{form}}({:2.0f})'.format(value, dvalue * 10 ** (-fexp + 1), form='.' + str(-int(fexp) + 1) + 'f')
-    elif fexp == 0.0:
-        return '{:.1f}({:1.1f})'.format(value, dvalue)
-    else:
-        return '{:.0f}({:2.0f})'.format(value, dvalue)
+class ObsArray:
+    """Class for an array of observables stored in a columnar layout.
 
+    Instead of one Python object per entry, an ObsArray stores the central
+    values of all observables in one numpy array and the deltas of every
+    replicum in one contiguous array which carries the configurations on
+    its last axis. Elementwise arithmetic, scalar broadcasting and the
+    supported numpy functions are thus evaluated with one numpy call per
+    replicum instead of one derived_observable call per entry.
 
-def _expand_deltas(deltas, idx, shape):
-    """Expand deltas defined on idx to a regular, contiguous range, where holes are filled by 0.
-       If idx is of type range, the deltas are not changed
+    An ObsArray is initialized with a (nested) list or array of Obs and can be
+    converted back via indexing, `tolist` or `numpy.asarray`.
 
-    Parameters
+    Attributes
     ----------
-    deltas : list
-        List of fluctuations
-    idx : list
-        List or range of configs on which the deltas are defined, has to be sorted in ascending order.
-    shape : int
-        Number of configs in idx.
+    idl : dict
+        Configurations on which the deltas of a given replicum are defined.
+        Obs defined on a subset of these configurations are projected onto the
+        merged configurations in the same way as in derived_observable.
+    deltas : dict
+        Fluctuations of all entries on a given replicum, the shape of each
+        array is shape + (len(idl[name]),).
+    r_values : dict
+        Replicum mean values of all entries for a given replicum.
+    mask : dict
+        Boolean array for every replicum and covobs which marks the entries
+        that are defined on it.
+    cov : dict
+        Covariance matrices of all covobs.
+    grad : dict
+        Gradients of all entries with respect to the covobs, the shape of each
+        array is shape + (N,) where N is the dimension of the covariance matrix.
     """
-    if isinstance(idx, range):
-        return deltas
-    else:
-        ret = np.zeros(idx[-1] - idx[0] + 1)
-        for i in range(shape):
-            ret[idx[i] - idx[0]] = deltas[i]
-        return ret
+    __slots__ = ['_value', 'idl', 'deltas', 'r_values', 'mask', 'cov', 'grad', 'reweighted', 'tag']
 
+    def __init__(self, obs):
+        """ Initialize ObsArray object.
 
-def _merge_idx(idl):
-    """Returns the union of all lists in idl as sorted list
+        Parameters
+        ----------
+        obs : list or numpy.ndarray
+            (nested) list or array of Obs.
+        """
+        obs = _obs_object_array(obs)
+        raveled = obs.ravel()
+        if not all(isinstance(o, Obs) for o in raveled):
+            raise TypeError('All entries of an ObsArray have to be of type Obs.')
 
-    Parameters
-    ----------
-    idl : list
-        List of lists or ranges.
-    """
+        self._value = np.array([o.value for o in raveled], dtype=float).reshape(obs.shape)
+        self.reweighted = np.array([o.reweighted for o in raveled], dtype=bool).reshape(obs.shape)
+        self.tag = None
+        self.idl = {}
+        self.deltas = {}
+        self.r_values = {}
+        self.mask = {}
+        self.cov = {}
+        self.grad = {}
+
+        for name in sorted(set([name for o in raveled for name in o.deltas])):
+            self.idl[name] = _merge_idx([o.idl[name] for o in raveled if name in o.deltas])
+            deltas = np.zeros((len(raveled), len(self.idl[name])))
+            for i, o in enumerate(raveled):
+                if name in o.deltas:
+                    deltas[i] = _expand_deltas_for_merge(o.deltas[name], o.idl[name], o.shape[name], self.idl[name])
+            self.deltas[name] = deltas.reshape(obs.shape + (-1,))
+            self.r_values[name] = np.array([o.r_values.get(name, o.value) for o in raveled], dtype=float).reshape(obs.shape)
+            self.mask[name] = np.array([name in o.deltas for o in raveled], dtype=bool).reshape(obs.shape)
+
+        for name in sorted(set([name for o in raveled for name in o.cov_names])):
+            if name in self.deltas:
+                raise Exception('The same name has been used for deltas and covobs!')
+            for o in raveled:
+                if name in o.covobs:
+                    if name not in self.cov:
+                        self.cov[name] = o.covobs[name].cov
+                        grad = np.zeros((len(raveled), o.covobs[name].N))
+                    elif self.cov[name] is not o.covobs[name].cov and not np.allclose(self.cov[name], o.covobs[name].cov):
+                        raise Exception('Inconsistent covariance matrices for %s!' % (name))
+            for i, o in enumerate(raveled):
+                if name in o.covobs:
+                    grad[i] = o.covobs[name].grad.ravel()
+            self.grad[name] = grad.reshape(obs.shape + (-1,))
+            self.mask[name] = np.array([name in o.covobs for o in raveled], dtype=bool).reshape(obs.shape)
+
+    @classmethod
+    def _from_data(cls, value, idl, deltas, r_values, mask, cov, grad, reweighted):
+        """Assemble an ObsArray from its components without further checks."""
+        new = cls.__new__(cls)
+        new._value = value
+        new.idl = idl
+        new.deltas = deltas
+        new.r_values = r_values
+        new.mask = mask
+        new.cov = cov
+        new.grad = grad
+        new.reweighted = reweighted
+        new.tag = None
+        return new
 
-    # Use groupby to efficiently check whether all elements of idl are identical
-    try:
-        g = groupby(idl)
-        if next(g, True) and not next(g, False):
-            return idl[0]
-    except Exception:
-        pass
+    @property
+    def value(self):
+        return self._value
 
-    if np.all([type(idx) is range for idx in idl]):
-        if len(set([idx[0] for idx in idl])) == 1:
-            idstart = min([idx.start for idx in idl])
-            idstop = max([idx.stop for idx in idl])
-            idstep = min([idx.step for idx in idl])
-            return range(idstart, idstop, idstep)
+    @property
+    def shape(self):
+        return self._value.shape
 
-    return sorted(set().union(*idl))
+    @property
+    def ndim(self):
+        return self._value.ndim
 
+    @property
+    def size(self):
+        return self._value.size
 
-def _intersection_idx(idl):
-    """Returns the intersection of all lists in idl as sorted list
+    @property
+    def names(self):
+        return sorted(self.deltas) + sorted(self.grad)
 
-    Parameters
-    ----------
-    idl : list
-        List of lists or ranges.
-    """
+    @property
+    def cov_names(self):
+        return sorted(self.grad)
+
+    def __len__(self):
+        return len(self._value)
+
+    def __getitem__(self, idx):
+        positions = np.arange(self.size).reshape(self.shape)[idx]
+        if np.ndim(positions) == 0:
+            return self._obs_at(np.unravel_index(positions, self.shape))
+        return ObsArray._from_data(self._value[idx],
+                                   dict(self.idl),
+                                   {name: d[idx] for name, d in self.deltas.items()},
+                                   {name: r[idx] for name, r in self.r_values.items()},
+                                   {name: m[idx] for name, m in self.mask.items()},
+                                   dict(self.cov),
+                                   {name: g[idx] for name, g in self.grad.items()},
+                                   self.reweighted[idx])
+
+    def _obs_at(self, index):
+        """Return the entry at the multi-index index as Obs."""
+        names = [name for name in self.deltas if self.mask[name][index]]
+        res = Obs([self.deltas[name][index].copy() for name in names], names,
+                  means=[self.r_values[name][index] for name in names],
+                  idl=[self.idl[name] for name in names])
+        res._covobs = {name: Covobs(0, self.cov[name], name, grad=self.grad[name][index]) for name in self.grad if self.mask[name][index]}
+        res.names += list(res._covobs)
+        res._value = self._value[index]
+        res.reweighted = bool(self.reweighted[index])
+        return res
 
-    def _lcm(*args):
-        """Returns the lowest common multiple of args.
+    def tolist(self):
+        """Return the content of the ObsArray as (nested) list of Obs."""
+        return np.asarray(self).tolist()
 
-        From python 3.9 onwards the math library contains an lcm function."""
-        return reduce(lambda a, b: a * b // gcd(a, b), args)
+    def __array__(self, dtype=None, copy=None):
+        res = np.empty(self.shape, dtype=object)
+        for index in np.ndindex(self.shape):
+            res[index] = self._obs_at(index)
+        return res
 
-    # Use groupby to efficiently check whether all elements of idl are identical
-    try:
-        g = groupby(idl)
-        if next(g, True) and not next(g, False):
-            return idl[0]
-    except Exception:
-        pass
+    def __repr__(self):
+        return 'ObsArray(' + np.array2string(self._value, separator=', ') + ')'
+
+    def _r_values(self, name):
+        """Replicum mean values for name, central values if undefined on name."""
+        return self.r_values.get(name, self._value)
+
+    def _projected_deltas(self, name, idl):
+        """Deltas for name projected onto idl, which has to be a superset of self.idl[name]."""
+        idx = self.idl[name]
+        if idx is idl or (type(idx) is type(idl) and idx == idl):
+            return self.deltas[name]
+        return _expand_deltas_for_merge(self.deltas[name], idx, len(idx), idl)
+
+    def _apply(self, others, func, grads):
+        """Elementwise error propagation for func(self, *others) with the derivatives grads."""
+        operands = [self] + list(others)
+        values = [o._value for o in operands]
+        new_value = np.asarray(func(*values), dtype=float)
+        shape = new_value.shape
+        derivs = [np.broadcast_to(g(*values), shape)[..., np.newaxis] for g in grads]
+
+        new_idl, new_deltas, new_r_values, new_mask = {}, {}, {}, {}
+        for name in sorted(set([name for o in operands for name in o.deltas])):
+            new_idl[name] = _merge_idx([o.idl[name] for o in operands if name in o.deltas])
+            new_deltas[name] = sum([d * o._projected_deltas(name, new_idl[name]) for o, d in zip(operands, derivs) if name in o.deltas])
+            new_deltas[name] = np.broadcast_to(new_deltas[name], shape + new_deltas[name].shape[-1:])
+            new_r_values[name] = np.broadcast_to(func(*[o._r_values(name) for o in operands]), shape)
+            new_mask[name] = np.broadcast_to(reduce(np.logical_or, [o.mask.get(name, False) for o in operands]), shape)
+
+        new_cov, new_grad = {}, {}
+        for name in sorted(set([name for o in operands for name in o.grad])):
+            if name in new_deltas:
+                raise Exception('The same name has been used for deltas and covobs!')
+            for o in operands:
+                if name in o.cov:
+                    if name not in new_cov:
+                        new_cov[name] = o.cov[name]
+                    elif new_cov[name] is not o.cov[name] and not np.allclose(new_cov[name], o.cov[name]):
+                        raise Exception('Inconsistent covariance matrices for %s!' % (name))
+            new_grad[name] = sum([d * o.grad[name] for o, d in zip(operands, derivs) if name in o.grad])
+            new_grad[name] = np.broadcast_to(new_grad[name], shape + new_grad[name].shape[-1:])
+            new_mask[name] = np.broadcast_to(reduce(np.logical_or, [o.mask.get(name, False) for o in operands]), shape)
+
+        reweighted = np.broadcast_to(reduce(np.logical_or, [o.reweighted for o in operands]), shape)
+        return ObsArray._from_data(new_value, new_idl, new_deltas, new_r_values, new_mask, new_cov, new_grad, reweighted)
+
+    def _linear_map(self, decomposition):
+        """Error propagation for functions of the whole array with known derivative.
+
+        decomposition(x) has to return a tuple (values, linear) where values is a
+        list of the arrays computed from x and linear(d) returns the derivatives
+        of these arrays in the direction d. The leading axes of d have the shape
+        of the ObsArray, its last axis enumerates independent directions
+        (configurations or covobs). As in derived_observable every output depends
+        on all replica and covobs of the input.
+        """
+        values, linear = decomposition(self._value)
+        new_deltas = {name: linear(d) for name, d in self.deltas.items()}
+        new_grad = {name: linear(g) for name, g in self.grad.items()}
+        new_r_values = {name: decomposition(r)[0] for name, r in self.r_values.items()}
+
+        res = []
+        for i, value in enumerate(values):
+            value = np.asarray(value, dtype=float)
+            res.append(ObsArray._from_data(value,
+                                           dict(self.idl),
+                                           {name: d[i] for name, d in new_deltas.items()},
+                                           {name: np.asarray(r[i], dtype=float) for name, r in new_r_values.items()},
+                                           {name: np.full(value.shape, np.any(m)) for name, m in self.mask.items()},
+                                           dict(self.cov),
+                                           {name: g[i] for name, g in new_grad.items()},
+                                           np.full(value.shape, np.any(self.reweighted))))
+        return res
 
-    if np.all([type(idx) is range for idx in idl]):
-        if len(set([idx[0] for idx in idl])) == 1:
-            idstart = max([idx.start for idx in idl])
-            idstop = min([idx.stop for idx in idl])
-            idstep = _lcm(*[idx.step for idx in idl])
-            return range(idstart, idstop, idstep)
+    def _binary(self, y, func, grad_x, grad_y):
+        if isinstance(y, CObs) or np.iscomplexobj(y) or y.__class__.__name__ == 'Corr':
+            return NotImplemented
+        other = _as_obs_array(y)
+        if other is None:
+            return self._apply([], lambda x: func(x, y), [lambda x: grad_x(x, y)])
+        return self._apply([other], func, [grad_x, grad_y])
 
-    return sorted(set.intersection(*[set(o) for o in idl]))
+    # Overload math operations
+    def __add__(self, y):
+        return self._binary(y, lambda x, y: x + y, lambda x, y: 1, lambda x, y: 1)
 
+    def __radd__(self, y):
+        return self + y
 
-def _expand_deltas_for_merge(deltas, idx, shape, new_idx):
-    """Expand deltas defined on idx to the list of configs that is defined by new_idx.
-       New, empty entries are filled by 0. If idx and new_idx are of type range, the smallest
-       common divisor of the step sizes is used as new step size.
+    def __sub__(self, y):
+        return self._binary(y, lambda x, y: x - y, lambda x, y: 1, lambda x, y: -1)
 
-    Parameters
-    ----------
-    deltas : list
-        List of fluctuations
-    idx : list
-        List or range of configs on which the deltas are defined.
-        Has to be a subset of new_idx and has to be sorted in ascending order.
-    shape : list
-        Number of configs in idx.
-    new_idx : list
-        List of configs that defines the new range, has to be sorted in ascending order.
-    """
+    def __rsub__(self, y):
+        return self._binary(y, lambda x, y: y - x, lambda x, y: -1, lambda x, y: 1)
 
-    if type(idx) is range and type(new_idx) is range:
-        if idx == new_idx:
-            return deltas
-    ret = np.zeros(new_idx[-1] - new_idx[0] + 1)
-    for i in range(shape):
-        ret[idx[i] - new_idx[0]] = deltas[i]
-    return np.array([ret[new_idx[i] - new_idx[0]] for i in range(len(new_idx))]) * len(new_idx) / len(idx)
+    def __mul__(self, y):
+        return self._binary(y, lambda x, y: x * y, lambda x, y: y, lambda x, y: x)
 
+    def __rmul__(self, y):
+        return self * y
 
-def derived_observable(func, data, array_mode=False, **kwargs):
-    """Construct a derived Obs according to func(data, **kwargs) using automatic differentiation.
+    def __truediv__(self, y):
+        return self._binary(y, lambda x, y: x / y, lambda x, y: 1 / y, lambda x, y: -x / y ** 2)
 
-    Parameters
-    ----------
-    func : object
-        arbitrary function of the form func(data, **kwargs). For the
-        automatic differentiation to work, all numpy functions have to have
-        the autograd wrapper (use 'import autograd.numpy as anp').
-    data : list
-        list of Obs, e.g. [obs1, obs2, obs3].
-    num_grad : bool
-        if True, numerical derivatives are used instead of autograd
-        (default False). To control the numerical differentiation the
-        kwargs of numdifftools.step_generators.MaxStepGenerator
-        can be used.
-    man_grad : list
-        manually supply a list or an array which contains the jacobian
-        of func. Use cautiously, supplying the wrong derivative will
-        not be intercepted.
+    def __rtruediv__(self, y):
+        return self._binary(y, lambda x, y: y / x, lambda x, y: -y / x ** 2, lambda x, y: 1 / x)
 
-    Notes
-    -----
-    For simple mathematical operations it can be practical to use anonymous
-    functions. For the ratio of two observables one can e.g. use
+    def __pow__(self, y):
+        return self._binary(y, lambda x, y: x ** y, lambda x, y: y * x ** (y - 1), lambda x, y: x ** y * np.log(x))
 
-    new_obs = derived_observable(lambda x: x[0] / x[1], [obs1, obs2])
-    """
+    def __rpow__(self, y):
+        return self._binary(y, lambda x, y: y ** x, lambda x, y: y ** x * np.log(y), lambda x, y: x * y ** (x - 1))
 
-    data = np.asarray(data)
-    raveled_data = data.ravel()
+    def __pos__(self):
+        return self
 
-    # Workaround for matrix operations containing non Obs data
-    if not all(isinstance(x, Obs) for x in raveled_data):
-        for i in range(len(raveled_data)):
-            if isinstance(raveled_data[i], (int, float)):
-                raveled_data[i] = cov_Obs(raveled_data[i], 0.0, "###dummy_covobs###")
+    def __neg__(self):
+        return -1 * self
 
-    allcov = {}
-    for o in raveled_data:
-        for name in o.cov_names:
-            if name in allcov:
-                if not np.allclose(allcov[name], o.covobs[name].cov):
-                    raise Exception('Inconsistent covariance matrices for %s!' % (name))
-            else:
-                allcov[name] = o.covobs[name].cov
+    def __abs__(self):
+        return self._apply([], np.abs, [np.sign])
 
-    n_obs = len(raveled_data)
-    new_names = sorted(set([y for x in [o.names for o in raveled_data] for y in x]))
-    new_cov_names = sorted(set([y for x in [o.cov_names for o in raveled_data] for y in x]))
-    new_sample_names = sorted(set(new_names) - set(new_cov_names))
+    # Overload numpy functions
+    def sqrt(self):
+        return self._apply([], np.sqrt, [lambda x: 1 / 2 / np.sqrt(x)])
 
-    reweighted = len(list(filter(lambda o: o.reweighted is True, raveled_data))) > 0
+    def log(self):
+        return self._apply([], np.log, [lambda x: 1 / x])
 
-    if data.ndim == 1:
-        values = np.array([o.value for o in data])
-    else:
-        values = np.vectorize(lambda x: x.value)(data)
+    def exp(self):
+        return self._apply([], np.exp, [np.exp])
 
-    new_values = func(values, **kwargs)
+    def sin(self):
+        return self._apply([], np.sin, [np.cos])
 
-    multi = int(isinstance(new_values, np.ndarray))
+    def cos(self):
+        return self._apply([], np.cos, [lambda x: -np.sin(x)])
 
-    new_r_values = {}
-    new_idl_d = {}
-    for name in new_sample_names:
-        idl = []
-        tmp_values = np.zeros(n_obs)
-        for i, item in enumerate(raveled_data):
-            tmp_values[i] = item.r_values.get(name, item.value)
-            tmp_idl = item.idl.get(name)
-            if tmp_idl is not None:
-                idl.append(tmp_idl)
-        if multi > 0:
+    def tan(self):
+        return self._apply([], np.tan, [lambda x: 1 / np.cos(x) ** 2])
+
+    def sinh(self):
+        return self._apply([], np.sinh, [np.cosh])
+
+    def cosh(self):
+        return self._apply([], np.cosh, [np.sinh])
+
+    def tanh(self):
+        return self._apply([], np.tanh, [lambda x: 1 / np.cosh(x) ** 2])
+
+    def arcsin(self):
+        return self._apply([], np.arcsin, [lambda x: 1 / np.sqrt(1 - x ** 2)])
+
+    def arccos(self):
+        return self._apply([], np.arccos, [lambda x: -1 / np.sqrt(1 - x ** 2)])
+
+    def arctan(self):
+        return self._apply([], np.arctan, [lambda x: 1 / (1 + x ** 2)])
+
+    def arcsinh(self):
+        return self._apply([], np.arcsinh, [lambda x: 1 / np.sqrt(x ** 2 + 1)])
+
+    def arccosh(self):
+        return self._apply([], np.arccosh, [lambda x: 1 / np.sqrt(x ** 2 - 1)])
+
+    def arctanh(self):
+        return self._apply([], np.arctanh, [lambda x: 1 / (1 - x ** 2)])
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        if len(inputs) == 2 and ufunc.__name__ in _binary_ufunc_methods:
+            op, rop = _binary_ufunc_methods[ufunc.__name__]
+            if inputs[0] is self:
+                return getattr(self, op)(inputs[1])
+            return getattr(self, rop)(inputs[0])
+        if len(inputs) == 1 and ufunc.__name__ in _unary_ufunc_methods:
+            return getattr(self, _unary_ufunc_methods[ufunc.__name__])()
+        return NotImplemented
+
+
+_binary_ufunc_methods = {'add': ('__add__', '__radd__'),
+                         'subtract': ('__sub__', '__rsub__'),
+                         'multiply': ('__mul__', '__rmul__'),
+                         'divide': ('__truediv__', '__rtruediv__'),
+                         'true_divide': ('__truediv__', '__rtruediv__'),
+                         'power': ('__pow__', '__rpow__')}
+
+_unary_ufunc_methods = {'negative': '__neg__', 'positive': '__pos__', 'absolute': '__abs__',
+                        'sqrt': 'sqrt', 'log': 'log', 'exp': 'exp',
+                        'sin': 'sin', 'cos': 'cos', 'tan': 'tan',
+                        'sinh': 'sinh', 'cosh': 'cosh', 'tanh': 'tanh',
+                        'arcsin': 'arcsin', 'arccos': 'arccos', 'arctan': 'arctan',
+                        'arcsinh': 'arcsinh', 'arccosh': 'arccosh', 'arctanh': 'arctanh'}
+
+_ufunc_operators = {'add': operator.add, 'subtract': operator.sub, 'multiply': operator.mul,
+                    'divide': operator.truediv, 'true_divide': operator.truediv, 'power': operator.pow}
+
+
+class StreamingObs:
+    """Observable which accumulates the samples of growing Monte Carlo chains.
+
+    Samples can be appended replicum by replicum as new configurations
+    arrive. Besides the samples, a StreamingObs keeps the running sums and the
+    sums of lagged products of the samples for the lags below max_lag, such
+    that appending k samples costs O(k max_lag) and an up to date error
+    estimate via `gamma_method` costs O(max_lag) operations per replicum,
+    independent of the number of configurations already accumulated. An Obs
+    for further error propagation can be obtained via `to_obs`.
+
+    Only replica with equally spaced configurations are supported.
+
+    Attributes
+    ----------
+    max_lag : int
+        Number of lags of the autocorrelation function which are accumulated.
+        If max_lag is at least half the length of the longest replicum of an
+        ensemble, the results of the gamma method agree with the ones of the
+        corresponding Obs. Otherwise the autocorrelation function is truncated
+        at max_lag.
+    """
+    __slots__ = ['max_lag', '_replica', 'S', 'tau_exp', 'N_sigma',
+                 'e_dvalue', 'e_ddvalue', 'e_tauint', 'e_dtauint',
+                 'e_windowsize', 'e_rho', 'e_drho', 'e_n_tauint', 'e_n_dtauint',
+                 '_dvalue', 'ddvalue']
+
+    def __init__(self, max_lag=1000):
+        """ Initialize StreamingObs object.
+
+        Parameters
+        ----------
+        max_lag : int
+            Number of lags of the autocorrelation function which are accumulated (default 1000).
+        """
+        if not isinstance(max_lag, int) or max_lag < 1:
+            raise ValueError('max_lag has to be a positive integer.')
+        self.max_lag = max_lag
+        self._replica = {}
+        self._dvalue = 0.0
+        self.ddvalue = 0.0
+
+    @property
+    def names(self):
+        return sorted(self._replica.keys())
+
+    @property
+    def e_names(self):
+        return sorted(set([o.split('|')[0] for o in self.names]))
+
+    @property
+    def e_content(self):
+        res = {}
+        for e_name in self.e_names:
+            res[e_name] = sorted(filter(lambda x: x.startswith(e_name + '|'), self.names))
+            if e_name in self.names:
+                res[e_name].append(e_name)
+        return res
+
+    @property
+    def shape(self):
+        return {name: rep.n for name, rep in self._replica.items()}
+
+    @property
+    def idl(self):
+        return {name: range(rep.start, rep.start + rep.n * rep.step, rep.step) for name, rep in self._replica.items()}
+
+    @property
+    def N(self):
+        return sum(rep.n for rep in self._replica.values())
+
+    @property
+    def r_values(self):
+        return {name: rep.mean() for name, rep in self._replica.items()}
+
+    @property
+    def value(self):
+        if not self._replica:
+            raise Exception('No samples have been appended to the StreamingObs.')
+        return sum(rep.n * rep.mean() for rep in self._replica.values()) / self.N
+
+    @property
+    def dvalue(self):
+        return self._dvalue
+
+    def next_configs(self, names=None):
+        """Number of the next configuration expected for every replicum.
+
+        The result can be passed as r_start to the readers in
+        `pyerrors.input.openQCD` and `pyerrors.input.sfcf` such that only
+        configurations which were not appended yet are read.
+
+        Parameters
+        ----------
+        names : list
+            Names of the replica (default all replica in sorted order).
+        """
+        if names is None:
+            names = self.names
+        return [self._replica[name].start + self._replica[name].n * self._replica[name].step for name in names]
+
+    def append(self, samples, name, idl=None):
+        """Append samples of new configurations to a replicum.
+
+        Parameters
+        ----------
+        samples : list or numpy.ndarray
+            Samples of the new configurations.
+        name : str
+            Name of the replicum. Unknown replica are created.
+        idl : range or list
+            Equally spaced configuration numbers of the new samples, which have
+            to continue the configurations already appended to the replicum. By
+            default the configurations are continued with the spacing of the
+            replicum, new replica start at configuration 1.
+        """
+        samples = np.asarray(samples, dtype=float)
+        if samples.ndim != 1:
+            raise ValueError('samples have to be one dimensional.')
+        if len(samples) == 0:
+            return
+        rep = self._replica.get(name)
+        step = 1 if rep is None else rep.step
+        if idl is not None:
+            if len(idl) != len(samples):
+                raise ValueError('Length of samples and idl do not match for ' + name + '.')
+            configs = np.asarray(idl, dtype=int)
+            if rep is not None:
+                configs = np.concatenate(([rep.start + (rep.n - 1) * rep.step], configs))
+            spacing = np.diff(configs)
+            if len(spacing):
+                step = int(spacing[0])
+                if step <= 0 or np.any(spacing != step) or (rep is not None and rep.n > 1 and step != rep.step):
+                    raise Exception('StreamingObs only supports equally spaced configurations, the configurations of ' + name + ' do not continue the replicum.')
+        if rep is None:
+            rep = _StreamingReplicum(1 if idl is None else int(idl[0]), step, self.max_lag)
+            self._replica[name] = rep
+        rep.step = step
+        rep.append(samples)
+
+    def append_obs(self, obs):
+        """Append the samples of an Obs, e.g. the result of a reader, to the respective replica.
+
+        Parameters
+        ----------
+        obs : Obs
+            Observable without covobs whose configurations continue the replica of the StreamingObs.
+        """
+        if len(obs.cov_names):
+            raise Exception('Obs with covobs cannot be appended to a StreamingObs.')
+        for name in obs.names:
+            self.append(obs.deltas[name] + obs.r_values[name], name, obs.idl[name])
+
+    def gamma_method(self, **kwargs):
+        """Estimate the error of the accumulated samples.
+
+        The autocorrelation function of every replicum is obtained from the
+        accumulated sums, the windowing procedure is the same as in
+        `Obs.gamma_method`.
+
+        Parameters
+        ----------
+        S : float
+            specifies a custom value for the parameter S (default 2.0).
+        tau_exp : float
+            positive value triggers the critical slowing down analysis
+            (default 0.0).
+        N_sigma : float
+            number of standard deviations from zero until the tail is
+            attached to the autocorrelation function (default 1).
+
+        Notes
+        -----
+        The arguments fft, workers and executor of `Obs.gamma_method` are not
+        supported, since no transform of the samples is involved.
+        """
+        unsupported = set(kwargs) - set(_analysis_parameters)
+        if unsupported:
+            raise TypeError('StreamingObs.gamma_method does not support the arguments ' + ', '.join(sorted(unsupported)) + '.')
+        for name in _gamma_method_results + _analysis_parameters:
+            setattr(self, name, {})
+        self._dvalue = 0.0
+        self.ddvalue = 0.0
+        for e_name, r_names in self.e_content.items():
+            for kwarg_name in _analysis_parameters:
+                getattr(self, kwarg_name)[e_name] = _parse_kwarg(kwarg_name, e_name, kwargs)
+            replica = [self._replica[r_name] for r_name in r_names]
+            e_N = sum(rep.n for rep in replica)
+            w_max = min(max(rep.n for rep in replica) // 2, self.max_lag)
+            e_gamma = np.zeros(w_max)
+            gamma_div = np.zeros(w_max)
+            for rep in replica:
+                e_gamma += rep.gamma(w_max)
+                gamma_div += np.maximum(rep.n - np.arange(w_max), 0)
+            gamma_div[gamma_div < 1] = 1.0
+            e_gamma /= gamma_div
+            params = (self.S[e_name], self.tau_exp[e_name], self.N_sigma[e_name])
+            res, = _gamma_windowing(e_name, e_gamma[np.newaxis], e_N, [1] * len(replica), params)
+            for name, value in res.items():
+                getattr(self, name)[e_name] = value
+            self._dvalue += self.e_dvalue[e_name] ** 2
+            self.ddvalue += (self.e_dvalue[e_name] * self.e_ddvalue[e_name]) ** 2
+        self._dvalue = np.sqrt(self._dvalue)
+        if self._dvalue == 0.0:
+            self.ddvalue = 0.0
+        else:
+            self.ddvalue = np.sqrt(self.ddvalue) / self._dvalue
+
+    gm = gamma_method
+
+    def to_obs(self):
+        """Obs defined on all accumulated samples."""
+        names = self.names
+        idl = self.idl
+        return Obs([self._replica[name].samples() for name in names], names, idl=[idl[name] for name in names])
+
+    def __repr__(self):
+        return 'StreamingObs[' + str(self) + ']'
+
+    def __str__(self):
+        return _format_uncertainty(self.value, self._dvalue)
+
+
+class _StreamingReplicum:
+    """Samples and running sums of one replicum of a StreamingObs.
+
+    The samples are stored relative to the mean of the first appended samples
+    to avoid cancellations in the running sums. products[t] holds the sum of
+    x_i * x_{i + t} over all i.
+    """
+    __slots__ = ['start', 'step', 'n', 'shift', 'total', 'products', '_buffer']
+
+    def __init__(self, start, step, max_lag):
+        self.start = start
+        self.step = step
+        self.n = 0
+        self.shift = None
+        self.total = 0.0
+        self.products = np.zeros(max_lag)
+        self._buffer = np.zeros(0)
+
+    def append(self, samples):
+        if self.shift is None:
+            self.shift = np.mean(samples)
+        k = len(samples)
+        if self.n + k > len(self._buffer):
+            # The capacity is doubled such that appending is amortized linear in the number of samples
+            buffer = np.zeros(max(2 * len(self._buffer), self.n + k))
+            buffer[:self.n] = self._buffer[:self.n]
+            self._buffer = buffer
+        self._buffer[self.n:self.n + k] = samples - self.shift
+        max_lag = len(self.products)
+        # Products of the new samples with the last max_lag - 1 samples and with each other
+        new = self._buffer[self.n:self.n + k]
+        previous = self._buffer[max(0, self.n - max_lag + 1):self.n + k]
+        padded = np.concatenate((np.zeros(max_lag - 1 - min(self.n, max_lag - 1)), previous))
+        # correlation[s] = sum_q padded[s + q] * new[q], the lag t corresponds to s = max_lag - 1 - t
+        correlation = scipy.signal.correlate(padded, new, mode='valid')
+        self.products += correlation[::-1]
+        self.total += np.sum(new)
+        self.n += k
+
+    def mean(self):
+        return self.shift + self.total / self.n
+
+    def samples(self):
+        return self._buffer[:self.n] + self.shift
+
+    def gamma(self, w_max):
+        """Unnormalized autocorrelation function of the deltas for the lags below w_max."""
+        gamma = np.zeros(w_max)
+        w = min(w_max, self.n)
+        t = np.arange(w)
+        head = np.concatenate(([0.0], np.cumsum(self._buffer[:w - 1])))
+        tail = np.concatenate(([0.0], np.cumsum(self._buffer[self.n - w + 1:self.n][::-1])))
+        m = self.total / self.n
+        # sum_i (x_i - m) (x_{i + t} - m) = P(t) - m (sum_{i < n - t} x_i + sum_{i >= t} x_i) + (n - t) m^2
+        gamma[:w] = self.products[:w] - m * (2 * self.total - head - tail) + (self.n - t) * m ** 2
+        return gamma
+
+
+def _obs_object_array(obs):
+    """Convert a (nested) list or array of Obs to an object array without unpacking the Obs."""
+    if isinstance(obs, (Obs, CObs)):
+        res = np.empty((), dtype=object)
+        res[()] = obs
+        return res
+    return np.asarray(obs, dtype=object)
+
+
+def _has_common_idl(raveled):
+    """Checks whether all Obs in raveled are defined on the same idl for every replicum they share."""
+    idl = {}
+    for o in raveled:
+        for name, idx in o.idl.items():
+            known = idl.setdefault(name, idx)
+            if known is not idx and known != idx:
+                return False
+    return True
+
+
+def _batched_ufunc(ufunc, method, *inputs, **kwargs):
+    """Evaluate a numpy ufunc for inputs which contain Obs or CObs.
+
+    Obs valued arrays are processed in a single step via ObsArray, provided
+    all involved Obs share their idl. Arithmetic with CObs valued arrays, whose
+    real and imaginary parts are Obs which share their idl, is carried out on
+    ObsArrays of the real and imaginary parts. In all other cases the ufunc is
+    applied entry by entry by the numpy object loop.
+    """
+    name = ufunc.__name__
+    supported = (len(inputs) == 2 and name in _binary_ufunc_methods) or (len(inputs) == 1 and name in _unary_ufunc_methods)
+    if method == '__call__' and not kwargs and supported:
+        inputs = [x.item() if isinstance(x, np.generic) else x for x in inputs]
+        inputs = [np.asarray(x) if isinstance(x, list) else x for x in inputs]
+        if not any(isinstance(x, np.ndarray) and x.ndim > 0 for x in inputs):
+            inputs = [x.item() if isinstance(x, np.ndarray) else x for x in inputs]
+            if len(inputs) == 2:
+                return _ufunc_operators[name](*inputs)
+            if isinstance(inputs[0], Obs) or name in ['negative', 'positive', 'absolute']:
+                return getattr(inputs[0], _unary_ufunc_methods[name])()
+        else:
+            obs_valued = [isinstance(x, (Obs, CObs)) or (isinstance(x, np.ndarray) and x.dtype == object) for x in inputs]
+            raveled = [o for x, is_obs in zip(inputs, obs_valued) if is_obs for o in _obs_object_array(x).ravel()]
+            numeric = [x for x, is_obs in zip(inputs, obs_valued) if not is_obs]
+            if raveled and all(isinstance(o, Obs) for o in raveled) and not any(np.iscomplexobj(x) for x in numeric) and _has_common_idl(raveled):
+                operands = [ObsArray(x) if is_obs else x for x, is_obs in zip(inputs, obs_valued)]
+                if len(operands) == 1:
+                    return np.asarray(getattr(operands[0], _unary_ufunc_methods[name])())
+                op, rop = _binary_ufunc_methods[name]
+                if obs_valued[0]:
+                    return np.asarray(getattr(operands[0], op)(operands[1]))
+                return np.asarray(getattr(operands[1], rop)(operands[0]))
+            parts = [p for o in raveled if isinstance(o, CObs) for p in (o.real, o.imag)]
+            if name in _complex_ufuncs and raveled and all(isinstance(o, CObs) for o in raveled) and all(isinstance(p, Obs) for p in parts) and _has_common_idl(parts):
+                return _batched_complex_ufunc(name, inputs, obs_valued)
+
+    wrapped = [_obs_object_array(x) if isinstance(x, (Obs, CObs)) else x for x in inputs]
+    return getattr(ufunc, method)(*wrapped, **kwargs)
+
+
+_complex_ufuncs = ['add', 'subtract', 'multiply', 'divide', 'true_divide', 'negative', 'positive']
+
+
+def _batched_complex_ufunc(name, inputs, obs_valued):
+    """Evaluate the arithmetic ufunc name for CObs valued arrays via ObsArrays of their real and imaginary parts.
+
+    The operations are carried out in the same order as in the corresponding
+    methods of CObs.
+    """
+    parts = []
+    for x, is_obs in zip(inputs, obs_valued):
+        if is_obs:
+            x = _obs_object_array(x)
+            parts.append((ObsArray(np.vectorize(lambda o: o.real, otypes=[object])(x)),
+                          ObsArray(np.vectorize(lambda o: o.imag, otypes=[object])(x))))
+        elif np.iscomplexobj(x):
+            parts.append((np.real(x), np.imag(x)))
+        else:
+            # Real numbers are treated like in the CObs methods, where no imaginary part enters products.
+            parts.append((x, None))
+
+    if len(parts) == 1:
+        re, im = parts[0]
+        if name == 'negative':
+            re, im = -1 * re, -1 * im
+    else:
+        (ar, ai), (br, bi) = parts
+        if name in ['add', 'subtract']:
+            sign = 1 if name == 'add' else -1
+            re = ar + sign * br
+            im = (ai if ai is not None else 0.0) + sign * (bi if bi is not None else 0.0)
+        elif name == 'multiply':
+            if ai is None:
+                re, im = br * ar, bi * ar
+            elif bi is None:
+                re, im = ar * br, ai * br
+            else:
+                re, im = ar * br - ai * bi, ai * br + ar * bi
+        else:
+            if bi is None:
+                re, im = ar / br, ai / br
+            else:
+                ai = ai if ai is not None else 0.0
+                r = br ** 2 + bi ** 2
+                re, im = (ar * br + ai * bi) / r, (ai * br - ar * bi) / r
+
+    re, im = np.broadcast_arrays(np.asarray(re), np.asarray(im))
+    res = np.empty(re.shape, dtype=object)
+    for index in np.ndindex(res.shape):
+        res[index] = CObs(re[index], im[index])
+    return res
+
+
+def _as_obs_array(y):
+    """Return y as ObsArray if it is Obs valued and None otherwise."""
+    if isinstance(y, ObsArray):
+        return y
+    if isinstance(y, Obs):
+        return ObsArray(y)
+    if isinstance(y, (list, np.ndarray)):
+        y = np.asarray(y)
+        if y.dtype == object and y.size and all(isinstance(o, Obs) for o in y.ravel()):
+            return ObsArray(y)
+    return None
+
+
+def _format_uncertainty(value, dvalue):
+    """Creates a string of a value and its error in paranthesis notation, e.g., 13.02(45)"""
+    if dvalue == 0.0:
+        return str(value)
+    fexp = np.floor(np.log10(dvalue))
+    if fexp < 0.0:
+        return '{:{form}}({:2.0f})'.format(value, dvalue * 10 ** (-fexp + 1), form='.' + str(-int(fexp) + 1) + 'f')
+    elif fexp == 0.0:
+        return '{:.1f}({:1.1f})'.format(value, dvalue)
+    else:
+        return '{:.0f}({:2.0f})'.format(value, dvalue)
+
+
+def _expand_deltas(deltas, idx, shape):
+    """Expand deltas defined on idx to a regular, contiguous range, where holes are filled by 0.
+       If idx is of type range, the deltas are not changed
+
+    Parameters
+    ----------
+    deltas : list or numpy.ndarray
+        Fluctuations, the configurations are expected on the last axis.
+    idx : list
+        List or range of configs on which the deltas are defined, has to be sorted in ascending order.
+    shape : int
+        Number of configs in idx.
+    """
+    if isinstance(idx, range):
+        return np.asarray(deltas)
+    else:
+        deltas = np.asarray(deltas)
+        ret = np.zeros(deltas.shape[:-1] + (idx[-1] - idx[0] + 1,))
+        ret[..., _index_map(_idl_key(idx), range(idx[0], idx[-1] + 1))[:shape]] = deltas[..., :shape]
+        return ret
+
+
+@lru_cache(maxsize=64)
+def _index_map(idx, new_idx):
+    """Positions of the configurations in idx within new_idx.
+
+    Both arguments have to be hashable (see `_idl_key`), sorted in ascending
+    order and idx has to be a subset of new_idx. The index maps are cached,
+    repeated expansions of deltas between the same configuration sets thus
+    reduce to a single fancy indexing operation. The returned array must
+    not be modified.
+    """
+    positions = np.searchsorted(np.asarray(new_idx), np.asarray(idx))
+    positions.flags.writeable = False
+    return positions
+
+
+class _IdlList(list):
+    """Immutable and hashable list of configuration numbers.
+
+    Lists of configurations are interned via `_intern_idl`, such that all Obs
+    defined on the same configurations share one _IdlList object. The hash is
+    computed once on construction.
+    """
+    __slots__ = ['_hash', '_interned', '_regular', '__weakref__']
+    _unknown = object()
+    _irregular = object()
+
+    def __init__(self, idx):
+        super().__init__(idx)
+        self._hash = hash(tuple(self))
+        self._interned = False
+        self._regular = _IdlList._unknown
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (_intern_idl, (list(self),))
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('idl lists are immutable.')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+
+
+# Interned lists are only referenced weakly, a list is released as soon as
+# no Obs is defined on it anymore.
+_interned_idl_lists = weakref.WeakValueDictionary()
+
+
+@lru_cache(maxsize=256)
+def _intern(idx):
+    return idx
+
+
+def _intern_idl(idx):
+    """Returns the canonical object for the range or list of configurations idx.
+
+    Equal ranges and lists are mapped onto the same object, which allows
+    for identity checks instead of elementwise comparisons. Lists are
+    converted to _IdlList. Lists which are already interned are returned
+    as they are, such that the idl of an Obs is only hashed once when the
+    Obs is created.
+    """
+    if isinstance(idx, range):
+        return _intern(idx)
+    if type(idx) is _IdlList and idx._interned:
+        return idx
+    if not isinstance(idx, _IdlList):
+        idx = _IdlList(idx)
+    key = (idx._hash, len(idx))
+    known = _interned_idl_lists.get(key)
+    if known is None:
+        idx._interned = True
+        _interned_idl_lists[key] = idx
+        return idx
+    if known == idx:
+        return known
+    return idx
+
+
+def _regularize_idl(idx):
+    """Returns the interned list idx as range if it is equally spaced and None if it is not sorted.
+
+    The result is stored on the _IdlList, such that it is only computed once per list.
+    """
+    if idx._regular is not _IdlList._unknown:
+        return idx if idx._regular is _IdlList._irregular else idx._regular
+    dc = np.unique(np.diff(idx))
+    if np.any(dc < 0):
+        regular = None
+    elif len(dc) == 1:
+        regular = _intern_idl(range(idx[0], idx[-1] + dc[0], dc[0]))
+    else:
+        regular = _IdlList._irregular
+    idx._regular = regular
+    return idx if regular is _IdlList._irregular else regular
+
+
+def _idl_key(idx):
+    """Hashable representation of the idl of a replicum."""
+    return _intern_idl(idx)
+
+
+def _merge_idx(idl):
+    """Returns the union of all lists in idl as sorted list
+
+    Parameters
+    ----------
+    idl : list
+        List of lists or ranges.
+    """
+    if all(idx is idl[0] for idx in idl):
+        return idl[0]
+    return _merge_interned_idx(tuple(_intern_idl(idx) for idx in idl))
+
+
+@lru_cache(maxsize=64)
+def _merge_interned_idx(idl):
+    """Memoized union of the interned ranges or lists in the tuple idl."""
+
+    # Use groupby to efficiently check whether all elements of idl are identical
+    try:
+        g = groupby(idl)
+        if next(g, True) and not next(g, False):
+            return idl[0]
+    except Exception:
+        pass
+
+    if np.all([type(idx) is range for idx in idl]):
+        if len(set([idx[0] for idx in idl])) == 1:
+            idstart = min([idx.start for idx in idl])
+            idstop = max([idx.stop for idx in idl])
+            idstep = min([idx.step for idx in idl])
+            return _intern_idl(range(idstart, idstop, idstep))
+
+    return _intern_idl(sorted(set().union(*idl)))
+
+
+def _intersection_idx(idl):
+    """Returns the intersection of all lists in idl as sorted list
+
+    Parameters
+    ----------
+    idl : list
+        List of lists or ranges.
+    """
+    if all(idx is idl[0] for idx in idl):
+        return idl[0]
+    return _intersection_interned_idx(tuple(_intern_idl(idx) for idx in idl))
+
+
+@lru_cache(maxsize=64)
+def _intersection_interned_idx(idl):
+    """Memoized intersection of the interned ranges or lists in the tuple idl."""
+
+    def _lcm(*args):
+        """Returns the lowest common multiple of args.
+
+        From python 3.9 onwards the math library contains an lcm function."""
+        return reduce(lambda a, b: a * b // gcd(a, b), args)
+
+    # Use groupby to efficiently check whether all elements of idl are identical
+    try:
+        g = groupby(idl)
+        if next(g, True) and not next(g, False):
+            return idl[0]
+    except Exception:
+        pass
+
+    if np.all([type(idx) is range for idx in idl]):
+        if len(set([idx[0] for idx in idl])) == 1:
+            idstart = max([idx.start for idx in idl])
+            idstop = min([idx.stop for idx in idl])
+            idstep = _lcm(*[idx.step for idx in idl])
+            return _intern_idl(range(idstart, idstop, idstep))
+
+    return _intern_idl(sorted(set.intersection(*[set(o) for o in idl])))
+
+
+def _expand_deltas_for_merge(deltas, idx, shape, new_idx):
+    """Expand deltas defined on idx to the list of configs that is defined by new_idx.
+       New, empty entries are filled by 0. If idx and new_idx are of type range, the smallest
+       common divisor of the step sizes is used as new step size.
+
+    Parameters
+    ----------
+    deltas : list or numpy.ndarray
+        Fluctuations, the configurations are expected on the last axis.
+    idx : list
+        List or range of configs on which the deltas are defined.
+        Has to be a subset of new_idx and has to be sorted in ascending order.
+    shape : list
+        Number of configs in idx.
+    new_idx : list
+        List of configs that defines the new range, has to be sorted in ascending order.
+    """
+
+    if type(idx) is range and type(new_idx) is range:
+        if idx == new_idx:
+            return deltas
+    deltas = np.asarray(deltas)
+    ret = np.zeros(deltas.shape[:-1] + (len(new_idx),))
+    ret[..., _index_map(_idl_key(idx), _idl_key(new_idx))[:shape]] = deltas[..., :shape]
+    return ret * len(new_idx) / len(idx)
+
+
+def derived_observable(func, data, array_mode=False, **kwargs):
+    """Construct a derived Obs according to func(data, **kwargs) using automatic differentiation.
+
+    Parameters
+    ----------
+    func : object
+        arbitrary function of the form func(data, **kwargs). For the
+        automatic differentiation to work, all numpy functions have to have
+        the autograd wrapper (use 'import autograd.numpy as anp').
+    data : list
+        list of Obs, e.g. [obs1, obs2, obs3].
+    num_grad : bool
+        if True, numerical derivatives are used instead of autograd
+        (default False). To control the numerical differentiation the
+        kwargs of numdifftools.step_generators.MaxStepGenerator
+        can be used.
+    man_grad : list
+        manually supply a list or an array which contains the jacobian
+        of func. Use cautiously, supplying the wrong derivative will
+        not be intercepted.
+
+    Notes
+    -----
+    For simple mathematical operations it can be practical to use anonymous
+    functions. For the ratio of two observables one can e.g. use
+
+    new_obs = derived_observable(lambda x: x[0] / x[1], [obs1, obs2])
+    """
+
+    data = np.asarray(data)
+    raveled_data = data.ravel()
+
+    # Workaround for matrix operations containing non Obs data
+    if not all(isinstance(x, Obs) for x in raveled_data):
+        for i in range(len(raveled_data)):
+            if isinstance(raveled_data[i], (int, float)):
+                raveled_data[i] = cov_Obs(raveled_data[i], 0.0, "###dummy_covobs###")
+
+    if _lazy_mode.get() and not array_mode and all(isinstance(x, Obs) for x in raveled_data):
+        res = _lazy_derived_observable(func, data, raveled_data, **kwargs)
+        if res is not None:
+            return res
+
+    allcov = {}
+    for o in raveled_data:
+        for name in o.cov_names:
+            if name in allcov:
+                if allcov[name] is not o.covobs[name].cov and not np.allclose(allcov[name], o.covobs[name].cov):
+                    raise Exception('Inconsistent covariance matrices for %s!' % (name))
+            else:
+                allcov[name] = o.covobs[name].cov
+
+    n_obs = len(raveled_data)
+    new_names = sorted(set([y for x in [o.names for o in raveled_data] for y in x]))
+    new_cov_names = sorted(set([y for x in [o.cov_names for o in raveled_data] for y in x]))
+    new_sample_names = sorted(set(new_names) - set(new_cov_names))
+
+    reweighted = len(list(filter(lambda o: o.reweighted is True, raveled_data))) > 0
+
+    if data.ndim == 1:
+        values = np.array([o.value for o in data])
+    else:
+        values = np.vectorize(lambda x: x.value)(data)
+
+    new_values = func(values, **kwargs)
+
+    multi = int(isinstance(new_values, np.ndarray))
+
+    new_r_values = {}
+    new_idl_d = {}
+    for name in new_sample_names:
+        idl = []
+        tmp_values = np.zeros(n_obs)
+        for i, item in enumerate(raveled_data):
+            tmp_values[i] = item.r_values.get(name, item.value)
+            tmp_idl = item.idl.get(name)
+            if tmp_idl is not None:
+                idl.append(tmp_idl)
+        if multi > 0:
             tmp_values = np.array(tmp_values).reshape(data.shape)
         new_r_values[name] = func(tmp_values, **kwargs)
         new_idl_d[name] = _merge_idx(idl)
 
-    if 'man_grad' in kwargs:
-        deriv = np.asarray(kwargs.get('man_grad'))
-        if new_values.shape + data.shape != deriv.shape:
-            raise Exception('Manual derivative does not have correct shape.')
-    elif kwargs.get('num_grad') is True:
-        if multi > 0:
-            raise Exception('Multi mode currently not supported for numerical derivative')
-        options = {
-            'base_step': 0.1,
-            'step_ratio': 2.5}
-        for key in options.keys():
-            kwarg = kwargs.get(key)
-            if kwarg is not None:
-                options[key] = kwarg
-        tmp_df = nd.Gradient(func, order=4, **{k: v for k, v in options.items() if v is not None})(values, **kwargs)
-        if tmp_df.size == 1:
-            deriv = np.array([tmp_df.real])
-        else:
-            deriv = tmp_df.real
-    else:
-        deriv = jacobian(func)(values, **kwargs)
+    deriv = _derivative(func, values, new_values, data.shape, multi, **kwargs)
 
     final_result = np.zeros(new_values.shape, dtype=object)
 
@@ -1224,13 +2060,17 @@ def derived_observable(func, data, array_mode=False, **kwargs):
             for i_dat, dat in enumerate(data):
                 g_extracted[name].append(np.array([o.covobs.get(name, zero_grad).grad for o in dat.reshape(np.prod(dat.shape))]).reshape(dat.shape + (new_covobs_lengths[name], 1)))
 
+    # Within memmap_deltas the fluctuations are accumulated in the memory-mapped files directly
+    store = _memmap_store.get()
+    new_zeros = np.zeros if store is None else store.allocate
+
     for i_val, new_val in np.ndenumerate(new_values):
         new_deltas = {}
         new_grad = {}
         if array_mode is True:
             for name in new_sample_names:
                 ens_length = d_extracted[name][0].shape[-1]
-                new_deltas[name] = np.zeros(ens_length)
+                new_deltas[name] = new_zeros(ens_length)
                 for i_dat, dat in enumerate(d_extracted[name]):
                     new_deltas[name] += np.tensordot(deriv[i_val + (i_dat, )], dat)
             for name in new_cov_names:
@@ -1243,7 +2083,9 @@ def derived_observable(func, data, array_mode=False, **kwargs):
                     if name in obs.cov_names:
                         new_grad[name] = new_grad.get(name, 0) + deriv[i_val + j_obs] * obs.covobs[name].grad
                     else:
-                        new_deltas[name] = new_deltas.get(name, 0) + deriv[i_val + j_obs] * _expand_deltas_for_merge(obs.deltas[name], obs.idl[name], obs.shape[name], new_idl_d[name])
+                        if name not in new_deltas:
+                            new_deltas[name] = new_zeros(len(new_idl_d[name]))
+                        new_deltas[name] += deriv[i_val + j_obs] * _expand_deltas_for_merge(obs.deltas[name], obs.idl[name], obs.shape[name], new_idl_d[name])
 
         new_covobs = {name: Covobs(0, allcov[name], name, grad=new_grad[name]) for name in new_grad}
 
@@ -1272,6 +2114,320 @@ def derived_observable(func, data, array_mode=False, **kwargs):
     return final_result
 
 
+def _derivative(func, values, new_values, shape, multi, **kwargs):
+    """Jacobian of func at values according to the kwargs of derived_observable."""
+    if 'man_grad' in kwargs:
+        deriv = np.asarray(kwargs.get('man_grad'))
+        if new_values.shape + shape != deriv.shape:
+            raise Exception('Manual derivative does not have correct shape.')
+    elif kwargs.get('num_grad') is True:
+        if multi > 0:
+            raise Exception('Multi mode currently not supported for numerical derivative')
+        options = {
+            'base_step': 0.1,
+            'step_ratio': 2.5}
+        for key in options.keys():
+            kwarg = kwargs.get(key)
+            if kwarg is not None:
+                options[key] = kwarg
+        tmp_df = nd.Gradient(func, order=4, **{k: v for k, v in options.items() if v is not None})(values, **kwargs)
+        if tmp_df.size == 1:
+            deriv = np.array([tmp_df.real])
+        else:
+            deriv = tmp_df.real
+    elif func in _gradient_registry:
+        deriv = np.asarray(_gradient_registry[func](values, **kwargs))
+    else:
+        deriv = jacobian(func)(values, **kwargs)
+    return deriv
+
+
+# Analytic gradients registered via register_gradient, dropped together with the function object.
+_gradient_registry = weakref.WeakKeyDictionary()
+
+
+def register_gradient(func, grad):
+    """Register the analytic jacobian of a function which is used with derived_observable.
+
+    Whenever derived_observable is called with func and without man_grad,
+    grad is used instead of automatic differentiation.
+
+    Parameters
+    ----------
+    func : object
+        function of the form func(data, **kwargs) as used in derived_observable.
+    grad : object
+        function of the form grad(values, **kwargs) which returns the jacobian
+        of func at the array of values, i.e. an array of shape
+        func(values).shape + values.shape.
+    """
+    _gradient_registry[func] = grad
+
+
+def _pow_grad_base(x, y):
+    """Derivative of x ** y with respect to x, following the convention of autograd for y == 0."""
+    return y * x ** (y - 1 if y != 0 else 1.)
+
+
+def _pow_grad_exponent(x, y):
+    """Derivative of x ** y with respect to y, following the convention of autograd for x == 0."""
+    return np.log(x if x != 0 else 1.) * x ** y
+
+
+_lazy_mode = contextvars.ContextVar('lazy_mode', default=False)
+
+# Attributes of Obs which are only set once a lazily evaluated Obs is materialized.
+_lazy_attributes = ['names', 'shape', 'r_values', 'deltas', 'N', 'idl', '_covobs']
+
+
+class _LazyNode:
+    """Operation in the computation graph of a lazily evaluated Obs."""
+    __slots__ = ['func', 'kwargs', 'parents', 'grads', 'shape']
+
+    def __init__(self, func, kwargs, parents, grads, shape):
+        self.func = func
+        self.kwargs = kwargs
+        self.parents = parents
+        self.grads = grads
+        self.shape = shape
+
+
+@contextmanager
+def lazy():
+    """Context manager in which operations on Obs are evaluated lazily.
+
+    Within the context, derived_observable only records the value and the
+    local derivatives of each scalar operation. The samples of the result are
+    combined in one pass over the computation graph as soon as they are
+    needed, e.g. by the gamma_method, the covariance or an export. Operations
+    which return arrays are evaluated immediately.
+
+    Notes
+    -----
+    Errors which depend on the samples, e.g. inconsistent covariance
+    matrices, are only raised when the result is materialized.
+
+    Examples
+    --------
+    >>> with pe.lazy():
+    >>>     res = (a * b + c) / d
+    >>> res.gamma_method()
+    """
+    token = _lazy_mode.set(True)
+    try:
+        yield
+    finally:
+        _lazy_mode.reset(token)
+
+
+# Parameters of the gamma method which can be scoped via analysis_context
+_analysis_parameters = ['S', 'tau_exp', 'N_sigma']
+_analysis_context = contextvars.ContextVar('analysis_context', default={})
+
+
+@contextmanager
+def analysis_context(**kwargs):
+    """Context manager which scopes the parameters of the gamma method.
+
+    Within the context the given parameters are used by the gamma method
+    instead of the process wide defaults `Obs.S_global`, `Obs.S_dict`, ...
+    The parameters are stored in a `contextvars.ContextVar` and are thus
+    local to the current thread or asyncio task, such that analyses with
+    different settings can run concurrently. Contexts can be nested, inner
+    contexts only override the parameters they specify. Arguments passed to
+    the gamma method still dominate over the context.
+
+    Parameters
+    ----------
+    S : float or dict
+        value of S for all ensembles or dictionary which maps ensemble names to values.
+    tau_exp : float or dict
+        value of tau_exp for all ensembles or dictionary which maps ensemble names to values.
+    N_sigma : float or dict
+        value of N_sigma for all ensembles or dictionary which maps ensemble names to values.
+    executor : concurrent.futures.Executor
+        executor to which the autocorrelation analysis is submitted, None for serial evaluation.
+
+    Examples
+    --------
+    >>> with pe.analysis_context(S=3.0, tau_exp={'ensemble2': 8.0}):
+    >>>     my_obs.gamma_method()
+    """
+    context = dict(_analysis_context.get())
+    for name, value in kwargs.items():
+        if name == 'executor':
+            context[name] = value
+            continue
+        if name not in _analysis_parameters:
+            raise TypeError(f"analysis_context got an unexpected keyword argument '{name}'.")
+        values = value if isinstance(value, dict) else {None: value}
+        for tmp in values.values():
+            if not isinstance(tmp, (int, float)):
+                raise TypeError(name + ' is not in proper format.')
+            if tmp < 0:
+                raise Exception(name + ' has to be larger or equal to 0.')
+        if isinstance(value, dict):
+            # Ensemble specific values extend the enclosing context
+            values = {**context.get(name, {}), **values}
+        context[name] = values
+    token = _analysis_context.set(context)
+    try:
+        yield
+    finally:
+        _analysis_context.reset(token)
+
+
+_memmap_store = contextvars.ContextVar('memmap_store', default=None)
+
+
+class _MemmapStore:
+    """Memory-mapped .npy files in which deltas are stored one after another.
+
+    Deltas of all lengths are packed into the current block file, such that
+    the number of open memory maps is bounded by the number of blocks rather
+    than the number of Obs. A block file is removed as soon as no array refers
+    to its memory map anymore.
+    """
+
+    def __init__(self, directory, block_size):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.block_size = block_size
+        self.block = None
+        self.offset = 0
+        self.files = set()
+        self.lock = threading.Lock()
+
+    def allocate(self, length):
+        """Return the next free, zero initialized segment of length entries of the current block."""
+        with self.lock:
+            if self.block is None or self.offset + length > len(self.block):
+                fd, path = tempfile.mkstemp(suffix='.npy', prefix='deltas_', dir=self.directory)
+                os.close(fd)
+                self.block = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(max(length, self.block_size // 8),))
+                self.offset = 0
+                self.files.add(path)
+                weakref.finalize(self.block, _remove_block_file, path)
+            res = self.block[self.offset:self.offset + length]
+            self.offset += length
+        return res
+
+    def store(self, deltas):
+        """Return a read-only segment of a block file with the content of deltas.
+
+        Segments which were obtained from `allocate` are returned as they are,
+        other arrays are copied to a new segment.
+        """
+        if not (isinstance(deltas, np.memmap) and deltas.filename in self.files):
+            res = self.allocate(len(deltas))
+            res[:] = deltas
+            deltas = res
+        deltas.flags.writeable = False
+        return deltas
+
+
+def _remove_block_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@contextmanager
+def memmap_deltas(directory, block_size=2 ** 26):
+    """Context manager in which the deltas of all newly created Obs are stored in memory-mapped files.
+
+    Within the context, the deltas of every Obs which is created, e.g. by an
+    input routine or as result of a derived observable, are written to
+    memory-mapped .npy files in directory and the Obs only holds read-only
+    views of segments of these files. The samples are thus paged in by the
+    operating system only when they are accessed and analyses of datasets
+    which do not fit into memory become possible. The fluctuations of derived
+    observables are accumulated in the files directly. The Obs remain valid
+    after the context is left, a file is removed as soon as no Obs refers to
+    it anymore.
+
+    Parameters
+    ----------
+    directory : str
+        Directory for the .npy files, created if it does not exist.
+    block_size : int
+        Size of a single .npy file in bytes (default 64 MiB). Deltas of
+        all lengths are packed into common files.
+
+    Examples
+    --------
+    >>> with pe.memmap_deltas('/scratch/spill'):
+    >>>     corr = pe.input.sfcf.read_sfcf(...)
+    >>>     ratio = corr[0] / corr[1]
+    """
+    token = _memmap_store.set(_MemmapStore(directory, block_size))
+    try:
+        yield
+    finally:
+        _memmap_store.reset(token)
+
+
+def to_memmap(obs, directory, block_size=2 ** 26):
+    """Move the deltas of existing Obs to memory-mapped files.
+
+    The deltas of every replicum of all given Obs are packed into common
+    .npy files in directory, see `memmap_deltas`.
+
+    Parameters
+    ----------
+    obs : list or numpy.ndarray
+        (Nested) list or array of Obs.
+    directory : str
+        Directory for the .npy files, created if it does not exist.
+    block_size : int
+        Size of a single .npy file in bytes (default 64 MiB).
+    """
+    store = _MemmapStore(directory, block_size)
+    for o in _obs_object_array(obs).ravel():
+        if not isinstance(o, Obs):
+            raise TypeError('to_memmap can only be applied to Obs, not ' + str(type(o)) + '.')
+        o.deltas = {name: store.store(delta) for name, delta in o.deltas.items()}
+
+
+def _parse_kwarg(kwarg_name, e_name, kwargs):
+    """Value of the gamma method parameter kwarg_name for the ensemble e_name.
+
+    Explicit arguments dominate over the analysis context which dominates over the
+    class attributes `Obs.<kwarg_name>_dict` and `Obs.<kwarg_name>_global`.
+    """
+    if kwarg_name in kwargs:
+        tmp = kwargs.get(kwarg_name)
+        if isinstance(tmp, (int, float)):
+            if tmp < 0:
+                raise Exception(kwarg_name + ' has to be larger or equal to 0.')
+            return tmp
+        raise TypeError(kwarg_name + ' is not in proper format.')
+    context = _analysis_context.get().get(kwarg_name, {})
+    if e_name in context:
+        return context[e_name]
+    if None in context:
+        return context[None]
+    return getattr(Obs, kwarg_name + '_dict').get(e_name, getattr(Obs, kwarg_name + '_global'))
+
+
+def _lazy_derived_observable(func, data, raveled_data, **kwargs):
+    """Record a scalar operation in the computation graph, returns None for array valued results."""
+    if data.ndim == 1:
+        values = np.array([o.value for o in data])
+    else:
+        values = np.vectorize(lambda x: x.value)(data)
+
+    new_values = func(values, **kwargs)
+    if isinstance(new_values, np.ndarray) and new_values.ndim > 0:
+        return None
+
+    deriv = np.reshape(_derivative(func, values, new_values, data.shape, 0, **kwargs), -1)
+    node = _LazyNode(func, kwargs, list(raveled_data), deriv, data.shape)
+    reweighted = any(o.reweighted is True for o in raveled_data)
+    return Obs._from_graph(new_values, node, reweighted)
+
+
 def _reduce_deltas(deltas, idx_old, idx_new):
     """Extract deltas defined on idx_old on all configs of idx_new.
 
@@ -1391,7 +2547,541 @@ def correlate(obs_a, obs_b):
     return o
 
 
-def covariance(obs, visualize=False, correlation=False, smooth=None, **kwargs):
+def gamma_method(obs, **kwargs):
+    """Estimate the errors of a list or array of observables in a batched way.
+
+    The Obs are grouped by the replica and idl they are defined on and the
+    autocorrelation functions of every group are computed with one stacked
+    fft per replicum. The results are identical to calling
+    `Obs.gamma_method` for every Obs individually.
+
+    Parameters
+    ----------
+    obs : list or numpy.ndarray
+        (Nested) list or array of Obs or CObs.
+    kwargs
+        Parameters of `Obs.gamma_method`.
+    """
+    raveled = []
+    for o in _obs_object_array(obs).ravel():
+        if isinstance(o, Obs):
+            raveled.append(o)
+        elif isinstance(o, CObs):
+            raveled += [part for part in [o.real, o.imag] if isinstance(part, Obs)]
+        else:
+            raise TypeError('gamma_method can only be applied to Obs and CObs, not ' + str(type(o)) + '.')
+    _gamma_method(raveled, **kwargs)
+
+
+def _gamma_method(obs, **kwargs):
+    """Apply the gamma method to all Obs in the list obs."""
+    fft = _gamma_backend(kwargs.get('fft', True))
+    workers = kwargs.get('workers')
+    obs = list({id(o): o for o in obs}.values())
+
+    groups = {}
+    for o in obs:
+        previous = {name: getattr(o, name, {}) for name in _gamma_method_results}
+        memo = o.__dict__.get('_gamma_memo', {})
+        for name in _gamma_method_results:
+            setattr(o, name, {})
+        o.S = {}
+        o.tau_exp = {}
+        o.N_sigma = {}
+
+        for kwarg_name in _analysis_parameters:
+            for e_name in o.e_names:
+                getattr(o, kwarg_name)[e_name] = _parse_kwarg(kwarg_name, e_name, kwargs)
+
+        e_content = o.e_content
+        o._gamma_memo = {}
+        for e_name in o.mc_names:
+            o._gamma_memo[e_name] = (o.S[e_name], o.tau_exp[e_name], o.N_sigma[e_name], fft,
+                                     tuple((o.deltas.versions[r_name], o.idl.versions[r_name]) for r_name in e_content[e_name]))
+            if memo.get(e_name) == o._gamma_memo[e_name]:
+                # Neither the samples nor the parameters changed since the last call, the results are reused
+                for name in _gamma_method_results:
+                    if e_name in previous[name]:
+                        getattr(o, name)[e_name] = previous[name][e_name]
+                continue
+            key = (e_name,) + tuple((r_name, o.shape[r_name], _idl_key(o.idl[r_name])) for r_name in e_content[e_name])
+            groups.setdefault(key, []).append(o)
+
+    executor = kwargs.get('executor', _analysis_context.get().get('executor', Obs.executor_global))
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor) and callable(fft):
+        try:
+            pickle.dumps(fft)
+        except Exception as e:
+            raise ValueError("The custom fft backend cannot be pickled and thus not be used with a ProcessPoolExecutor. Define it at module level or use a ThreadPoolExecutor.") from e
+    tasks = [(group, key[0], _gamma_method_group(group, key[0], fft, executor, workers)) for key, group in groups.items()]
+    for group, e_name, results in tasks:
+        if executor is not None:
+            results = [res for future in results for res in future.result()]
+        for o, res in zip(group, results):
+            for name, value in res.items():
+                getattr(o, name)[e_name] = value
+
+    for o in obs:
+        o._dvalue = 0
+        o.ddvalue = 0
+        for e_name in o.mc_names:
+            o._dvalue += o.e_dvalue[e_name] ** 2
+            o.ddvalue += (o.e_dvalue[e_name] * o.e_ddvalue[e_name]) ** 2
+
+        for e_name in o.cov_names:
+            o.e_dvalue[e_name] = np.sqrt(o.covobs[e_name].errsq())
+            o.e_ddvalue[e_name] = 0
+            o._dvalue += o.e_dvalue[e_name]**2
+
+        o._dvalue = np.sqrt(o._dvalue)
+        if o._dvalue == 0.0:
+            o.ddvalue = 0.0
+        else:
+            o.ddvalue = np.sqrt(o.ddvalue) / o._dvalue
+
+
+# Results of the gamma method per ensemble which are reused if neither samples nor parameters changed
+_gamma_method_results = ['e_dvalue', 'e_ddvalue', 'e_tauint', 'e_dtauint', 'e_windowsize', 'e_n_tauint', 'e_n_dtauint', 'e_rho', 'e_drho']
+
+
+# Version numbers of the entries of _VersionedDict, unique across all dictionaries
+_versions = count()
+
+
+class _VersionedDict(dict):
+    """Dictionary which assigns a new version number to an entry whenever it is set.
+
+    Obs store their deltas and idl in such dictionaries and the gamma method
+    keys its memo on the version numbers of the replica. numpy arrays are
+    made read-only when they are stored, modifications thus require the
+    assignment of a new array, which is detected.
+    """
+    __slots__ = ['versions']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for value in self.values():
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+        self.versions = dict.fromkeys(self, next(_versions))
+
+    def __setitem__(self, key, value):
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+        dict.__setitem__(self, key, value)
+        self.versions[key] = next(_versions)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        del self.versions[key]
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return (_VersionedDict, (dict(self),))
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        self.versions.pop(key, None)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        del self.versions[key]
+        return key, value
+
+    def clear(self):
+        super().clear()
+        self.versions.clear()
+
+
+def _gamma_method_group(group, e_name, fft, executor=None, workers=None):
+    """Apply the gamma method for ensemble e_name to a group of Obs defined on identical replica and idl.
+
+    The autocorrelation functions of all Obs in the group are computed from
+    stacked deltas and the automatic windowing procedure is carried out for
+    all of them at once. If an executor is given, the analysis is submitted
+    to it in chunks of Obs and a future is returned instead of the results.
+    """
+    ref = group[0]
+    r_names = ref.e_content[e_name]
+    idl = [ref.idl[r_name] for r_name in r_names]
+    shape = [ref.shape[r_name] for r_name in r_names]
+    # S, tau_exp and N_sigma only depend on the ensemble and are thus the same for the whole group
+    params = (ref.S[e_name], ref.tau_exp[e_name], ref.N_sigma[e_name])
+    if executor is None:
+        return _gamma_analysis(e_name, [np.array([o.deltas[r_name] for o in group]) for r_name in r_names], idl, shape, params, fft, workers)
+    futures = []
+    chunk = -(-len(group) // _executor_workers(executor))
+    for start in range(0, len(group), chunk):
+        deltas = [np.array([o.deltas[r_name] for o in group[start:start + chunk]]) for r_name in r_names]
+        futures.append(executor.submit(_gamma_analysis, e_name, deltas, idl, shape, params, fft, workers))
+    return futures
+
+
+def _executor_workers(executor):
+    """Number of workers of a concurrent.futures executor, the number of CPUs if it is not known."""
+    return getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+
+
+def _gamma_analysis(e_name, deltas, idl, shape, params, fft, workers=None):
+    """Autocorrelation analysis of stacked deltas of one ensemble.
+
+    The function does not depend on any Obs such that it can be executed in
+    a separate process.
+
+    Parameters
+    ----------
+    e_name : str
+        Name of the ensemble.
+    deltas : list
+        Stacked deltas of shape (n, shape[r]) for every replicum r.
+    idl : list
+        idl of the replica.
+    shape : list
+        Number of configurations of the replica.
+    params : tuple
+        The parameters S, tau_exp and N_sigma of the ensemble.
+    fft : str or callable
+        Backend for the computation of the autocorrelation function, see `_gamma_backend`.
+    workers : int
+        Number of threads used by scipy.fft, None for the setting of scipy.fft.
+
+    Returns
+    -------
+    list
+        Dictionaries which map the names in `_gamma_method_results` to the
+        results for the ensemble, one for every row of the deltas.
+    """
+    n_obs = len(deltas[0])
+    r_length = []
+    for idx in idl:
+        if isinstance(idx, range):
+            r_length.append(len(idx))
+        else:
+            r_length.append((idx[-1] - idx[0] + 1))
+
+    e_N = np.sum(shape)
+    w_max = max(r_length) // 2
+    e_gamma = np.zeros((n_obs, w_max))
+
+    for r_deltas, idx, r_shape in zip(deltas, idl, shape):
+        e_gamma += _calc_gamma(r_deltas, idx, r_shape, w_max, fft, workers)
+
+    gamma_div = np.zeros(w_max)
+    for idx, r_shape in zip(idl, shape):
+        gamma_div += _gamma_div(_idl_key(idx), r_shape, w_max, fft)
+    gamma_div[gamma_div < 1] = 1.0
+    e_gamma /= gamma_div[:w_max]
+
+    gaps = []
+    for idx in idl:
+        if isinstance(idx, range):
+            gaps.append(1)
+        else:
+            gaps.append(np.min(np.diff(idx)))
+
+    return _gamma_windowing(e_name, e_gamma, e_N, gaps, params)
+
+
+def _gamma_windowing(e_name, e_gamma, e_N, gaps, params):
+    """Windowing procedure for the normalized autocorrelation functions e_gamma of one ensemble.
+
+    Parameters
+    ----------
+    e_name : str
+        Name of the ensemble.
+    e_gamma : numpy.ndarray
+        Normalized autocorrelation functions of shape (n, w_max).
+    e_N : int
+        Number of configurations of the ensemble.
+    gaps : list
+        Spacing of the configurations of every replicum.
+    params : tuple
+        The parameters S, tau_exp and N_sigma of the ensemble.
+
+    Returns
+    -------
+    list
+        Dictionaries which map the names in `_gamma_method_results` to the
+        results for the ensemble, one for every row of e_gamma.
+    """
+    S, texp, N_sigma = params
+    w_max = e_gamma.shape[1]
+    results = [{} for _ in range(len(e_gamma))]
+
+    for res in results:
+        res['e_rho'] = np.zeros(w_max)
+        res['e_drho'] = np.zeros(w_max)
+
+    vanishing = np.abs(e_gamma[:, 0]) < 10 * np.finfo(float).tiny  # Prevent division by zero
+    for res in [res for res, v in zip(results, vanishing) if v]:
+        res['e_tauint'] = 0.5
+        res['e_dtauint'] = 0.0
+        res['e_dvalue'] = 0.0
+        res['e_ddvalue'] = 0.0
+        res['e_windowsize'] = 0
+    if np.all(vanishing):
+        return results
+    group = [res for res, v in zip(results, vanishing) if not v]
+    e_gamma = e_gamma[~vanishing]
+
+    if not np.all([gi == gaps[0] for gi in gaps]):
+        raise Exception(f"Replica for ensemble {e_name} are not equally spaced.", gaps)
+    else:
+        gapsize = gaps[0]
+
+    e_rho = e_gamma[:, :w_max] / e_gamma[:, :1]
+    e_n_tauint = np.cumsum(np.concatenate((np.full((len(group), 1), 0.5), e_rho[:, 1:]), axis=1), axis=1)
+    # Make sure no entry of tauint is smaller than 0.5
+    e_n_tauint[e_n_tauint <= 0.5] = 0.5 + np.finfo(np.float64).eps
+    # hep-lat/0306017 eq. (42)
+    e_n_dtauint = e_n_tauint * 2 * np.sqrt(np.abs(np.arange(w_max) / gapsize + 0.5 - e_n_tauint) / e_N)
+    e_n_dtauint[:, 0] = 0.0
+
+    for i, res in enumerate(group):
+        res['e_rho'] = e_rho[i]
+        res['e_n_tauint'] = e_n_tauint[i]
+        res['e_n_dtauint'] = e_n_dtauint[i]
+
+    if texp > 0:
+        if w_max // 2 <= 1:
+            raise Exception("Need at least 8 samples for tau_exp error analysis")
+        # Critical slowing down analysis, the tail is attached at the first window n for which rho(n) - N_sigma * drho(n) < 0.
+        # drho is evaluated window by window for all Obs which have not found their window yet.
+        e_drho = np.zeros((len(group), w_max))
+        e_drho[:, gapsize] = _compute_drho(e_rho, np.full(len(group), gapsize), e_N)
+        window = np.full(len(group), -1)
+        active = np.arange(len(group))
+        rho_active = e_rho
+        for n in range(gapsize, w_max // 2, gapsize):
+            e_drho[active, n + gapsize] = _compute_drho(rho_active, np.full(len(active), n + gapsize), e_N)
+            found = (e_rho[active, n] - N_sigma * e_drho[active, n] < 0) | (n >= w_max // 2 - 2)
+            if np.any(found):
+                window[active[found]] = n
+                active = active[~found]
+                if len(active) == 0:
+                    break
+                rho_active = e_rho[active]
+        for i, res in enumerate(group):
+            res['e_drho'] = e_drho[i]
+            if window[i] < 0:
+                continue
+            n = window[i]
+            # Bias correction hep-lat/0306017 eq. (49) included
+            res['e_tauint'] = e_n_tauint[i][n] * (1 + (2 * n / gapsize + 1) / e_N) / (1 + 1 / e_N) + texp * np.abs(e_rho[i][n + 1])  # The absolute makes sure, that the tail contribution is always positive
+            res['e_dtauint'] = np.sqrt(e_n_dtauint[i][n] ** 2 + texp ** 2 * e_drho[i][n + 1] ** 2)
+            # Error of tau_exp neglected so far, missing term: e_rho[i][n + 1] ** 2 * d_tau_exp ** 2
+            res['e_dvalue'] = np.sqrt(2 * res['e_tauint'] * e_gamma[i][0] * (1 + 1 / e_N) / e_N)
+            res['e_ddvalue'] = res['e_dvalue'] * np.sqrt((n / gapsize + 0.5) / e_N)
+            res['e_windowsize'] = int(n)
+    elif S == 0.0:
+        for i, res in enumerate(group):
+            res['e_tauint'] = 0.5
+            res['e_dtauint'] = 0.0
+            res['e_dvalue'] = np.sqrt(e_gamma[i][0] / (e_N - 1))
+            res['e_ddvalue'] = res['e_dvalue'] * np.sqrt(0.5 / e_N)
+            res['e_windowsize'] = 0
+    else:
+        # Standard automatic windowing procedure, the first window with g_w < 0 is determined for all Obs at once
+        n_max = w_max // gapsize - 1
+        if n_max < 1:
+            return results
+        tau = S / np.log((2 * e_n_tauint[:, gapsize::gapsize] + 1) / (2 * e_n_tauint[:, gapsize::gapsize] - 1))
+        steps = np.arange(1, tau.shape[1] + 1)
+        g_w = np.exp(- steps / tau) - tau / np.sqrt(steps * e_N)
+        crossing = np.concatenate((g_w[:, :n_max - 1] < 0, np.ones((len(group), 1), dtype=bool)), axis=1)
+        window = gapsize * (np.argmax(crossing, axis=1) + 1)
+        rows = np.arange(len(group))
+        e_tauint = e_n_tauint[rows, window] * (1 + (2 * window / gapsize + 1) / e_N) / (1 + 1 / e_N)  # Bias correction hep-lat/0306017 eq. (49)
+        e_dvalue = np.sqrt(2 * e_tauint * e_gamma[:, 0] * (1 + 1 / e_N) / e_N)
+        e_ddvalue = e_dvalue * np.sqrt((window / gapsize + 0.5) / e_N)
+        e_drho = _compute_drho(e_rho, window, e_N)
+        for i, res in enumerate(group):
+            res['e_drho'][window[i]] = e_drho[i]
+            res['e_tauint'] = e_tauint[i]
+            res['e_dtauint'] = e_n_dtauint[i, window[i]]
+            res['e_dvalue'] = e_dvalue[i]
+            res['e_ddvalue'] = e_ddvalue[i]
+            res['e_windowsize'] = int(window[i])
+    return results
+
+
+@lru_cache(maxsize=128)
+def _gamma_div(idx, shape, w_max, fft):
+    """Normalization of the autocorrelation function for a replicum defined on idx.
+
+    The normalization only depends on the idl and the summation window and is
+    thus cached. The returned array must not be modified.
+    """
+    gamma_div = _calc_gamma(np.ones(shape), idx, shape, w_max, fft)
+    gamma_div.flags.writeable = False
+    return gamma_div
+
+
+def gamma_div_cache_info():
+    """Hit and miss statistics of the cache for the normalization of the autocorrelation function.
+
+    Returns
+    -------
+    functools._CacheInfo
+        named tuple with the entries hits, misses, maxsize and currsize.
+    """
+    return _gamma_div.cache_info()
+
+
+def _compute_drho(rho, window, e_N):
+    """Error of the normalized autocorrelation functions rho at the given windows, hep-lat/0306017 eq. (E.11).
+
+    Parameters
+    ----------
+    rho : numpy.ndarray
+        Normalized autocorrelation functions with shape (n, w_max).
+    window : numpy.ndarray
+        Integer array of length n with the window at which the error of the respective row of rho is evaluated.
+    e_N : int
+        Number of configurations.
+    """
+    w_max = rho.shape[1]
+    res = np.empty(len(rho))
+    # Rows which share a window are evaluated together such that the sum over k = 1, ..., w_max - i - 1 only requires slices
+    for i in np.unique(window):
+        sel = window == i
+        r = rho if np.all(sel) else rho[sel]
+        # rho(|i - k|) is composed of rho(i - 1), ..., rho(0) followed by rho(1), rho(2), ...
+        tmp = np.concatenate((r[:, max(0, 2 * i - w_max + 1):i][:, ::-1], r[:, 1:max(1, w_max - 2 * i)]), axis=1)
+        tmp += r[:, i + 1:]
+        tmp -= 2 * r[:, i:i + 1] * r[:, 1:w_max - i]
+        res[sel] = np.sqrt(np.einsum('ij,ij->i', tmp, tmp) / e_N)
+    return res
+
+
+def _calc_gamma(deltas, idx, shape, w_max, fft, workers=None):
+    """Calculate Gamma_{AA} from the deltas, which are defined on idx.
+       idx is assumed to be a contiguous range (possibly with a stepsize != 1)
+
+    Parameters
+    ----------
+    deltas : numpy.ndarray
+        Fluctuations, the configurations are expected on the last axis.
+        Leading axes are treated as independent observables.
+    idx : list
+        List or range of configurations on which the deltas are defined.
+    shape : int
+        Number of configurations in idx.
+    w_max : int
+        Upper bound for the summation window.
+    fft : str or callable
+        Backend for the computation of the autocorrelation function, see `_gamma_backend`.
+    workers : int
+        Number of threads used by scipy.fft, None for the setting of scipy.fft.
+    """
+    if fft == 'auto' and not isinstance(idx, range):
+        pairs = _sparse_pairs(_idl_key(idx), w_max)
+        if pairs is not None:
+            first, second, lags, starts = pairs
+            deltas = np.asarray(deltas)[..., :shape]
+            gamma = np.zeros(deltas.shape[:-1] + (w_max,))
+            gamma[..., lags] = np.add.reduceat(deltas[..., first] * deltas[..., second], starts, axis=-1)
+            return gamma
+    deltas = _expand_deltas(deltas, idx, shape)
+    gamma = np.zeros(deltas.shape[:-1] + (w_max,))
+    new_shape = deltas.shape[-1]
+    max_gamma = min(new_shape, w_max)
+    if fft == 'auto':
+        # The choice only depends on the length of the series such that batched and individual evaluations agree
+        fft = 'direct' if new_shape * max_gamma <= 2000 else 'scipy'
+    if isinstance(fft, str):
+        fft = _gamma_backends[fft]
+    if workers is None:
+        gamma[..., :max_gamma] = fft(deltas, max_gamma)
+    else:
+        with scipy.fft.set_workers(workers):
+            gamma[..., :max_gamma] = fft(deltas, max_gamma)
+
+    return gamma
+
+
+@lru_cache(maxsize=32)
+def _sparse_pairs(idx, w_max):
+    """Pairs of configurations in idx which are separated by less than w_max, sorted by their separation.
+
+    For widely spaced or gappy idl the autocorrelation function can be
+    accumulated from these pairs instead of an fft of the deltas expanded to
+    the full range of configurations. Returns None if the number of pairs
+    makes the fft of the expanded deltas cheaper. Otherwise the indices of
+    the first and second configuration of all pairs, the separations which
+    occur and the positions where each separation starts are returned.
+    The returned arrays must not be modified.
+    """
+    configs = np.asarray(idx)
+    n = len(configs)
+    counts = np.searchsorted(configs, configs + w_max) - np.arange(n)
+    n_pairs = int(np.sum(counts))
+    span = configs[-1] - configs[0] + 1
+    padding = scipy.fft.next_fast_len(span + min(span, w_max), real=True)
+    # Accumulating one pair costs about as much as eight elementary steps of the fft
+    if n_pairs == 0 or 8 * n_pairs > padding * np.log2(padding):
+        return None
+    first = np.repeat(np.arange(n), counts)
+    second = first + np.arange(n_pairs) - np.repeat(np.cumsum(counts) - counts, counts)
+    lags = configs[second] - configs[first]
+    order = np.argsort(lags, kind='stable')
+    lags, starts = np.unique(lags[order], return_index=True)
+    res = (first[order], second[order], lags, starts)
+    for arr in res:
+        arr.flags.writeable = False
+    return res
+
+
+def _gamma_numpy(deltas, max_gamma):
+    """Autocorrelation function via numpy.fft."""
+    new_shape = deltas.shape[-1]
+    # The padding for the fft has to be even
+    padding = new_shape + max_gamma + (new_shape + max_gamma) % 2
+    return np.fft.irfft(np.abs(np.fft.rfft(deltas, padding, axis=-1)) ** 2, axis=-1)[..., :max_gamma]
+
+
+def _gamma_scipy(deltas, max_gamma):
+    """Autocorrelation function via scipy.fft, padded to a fast transform length."""
+    padding = scipy.fft.next_fast_len(deltas.shape[-1] + max_gamma, real=True)
+    return scipy.fft.irfft(np.abs(scipy.fft.rfft(deltas, padding, axis=-1)) ** 2, padding, axis=-1)[..., :max_gamma]
+
+
+def _gamma_direct(deltas, max_gamma):
+    """Autocorrelation function via the direct sum over configurations."""
+    new_shape = deltas.shape[-1]
+    gamma = np.empty(deltas.shape[:-1] + (max_gamma,))
+    for index in np.ndindex(deltas.shape[:-1]):
+        gamma[index] = np.correlate(deltas[index], deltas[index], 'full')[new_shape - 1:new_shape - 1 + max_gamma]
+    return gamma
+
+
+_gamma_backends = {'numpy': _gamma_numpy, 'scipy': _gamma_scipy, 'direct': _gamma_direct}
+
+
+def _gamma_backend(fft):
+    """Translate the fft argument of the gamma method to a backend of _calc_gamma."""
+    if fft is True:
+        return 'numpy'
+    if fft is False:
+        return 'direct'
+    if callable(fft) or fft == 'auto' or fft in _gamma_backends:
+        return fft
+    raise ValueError("fft has to be a bool, 'auto', one of " + str(list(_gamma_backends)) + " or a callable.")
+
+
+def covariance(obs, visualize=False, correlation=False, smooth=None, windowing=None, **kwargs):
     r'''Calculates the error covariance matrix of a set of observables.
 
     WARNING: This function should be used with care, especially for observables with support on multiple
@@ -1412,6 +3102,13 @@ def covariance(obs, visualize=False, correlation=False, smooth=None, **kwargs):
         smoothing procedure of hep-lat/9412087 is applied to the correlation matrix which leaves the
         largest E eigenvalues essentially unchanged and smoothes the smaller eigenvalues to avoid extremely
         small ones.
+    windowing : None or str
+        If None (default) the covariance is estimated from the correlation matrix at windowsize 0 as
+        described in the notes. If 'shared' or 'pairwise' the autocorrelation functions of all pairs of
+        observables are computed with the gamma method and summed up to the largest summation window of
+        all observables on the respective ensemble ('shared') or to the larger of the two windows of the
+        respective pair ('pairwise'). This mode requires all observables defined on an ensemble to share their
+        replica and configurations and neglects the exponential tail of the autocorrelation function.
 
     Notes
     -----
@@ -1431,11 +3128,14 @@ def covariance(obs, visualize=False, correlation=False, smooth=None, **kwargs):
     if max_samples <= length and not [item for sublist in [o.cov_names for o in obs] for item in sublist]:
         warnings.warn(f"The dimension of the covariance matrix ({length}) is larger or equal to the number of samples ({max_samples}). This will result in a rank deficient matrix.", RuntimeWarning)
 
-    cov = np.zeros((length, length))
-    for i in range(length):
-        for j in range(i, length):
-            cov[i, j] = _covariance_element(obs[i], obs[j])
-    cov = cov + cov.T - np.diag(np.diag(cov))
+    if windowing is None:
+        cov = _covariance_matrix(obs)
+        errors = [o.dvalue for o in obs]
+    elif windowing in ['shared', 'pairwise']:
+        cov = _gamma_covariance_matrix(obs, windowing)
+        errors = np.sqrt(np.diag(cov))
+    else:
+        raise ValueError("windowing has to be None, 'shared' or 'pairwise'.")
 
     corr = np.diag(1 / np.sqrt(np.diag(cov))) @ cov @ np.diag(1 / np.sqrt(np.diag(cov)))
 
@@ -1451,7 +3151,6 @@ def covariance(obs, visualize=False, correlation=False, smooth=None, **kwargs):
     if correlation is True:
         return corr
 
-    errors = [o.dvalue for o in obs]
     cov = np.diag(errors) @ corr @ np.diag(errors)
 
     eigenvalues = np.linalg.eigh(cov)[0]
@@ -1478,64 +3177,167 @@ def _smooth_eigenvalues(corr, E):
     return vec @ np.diag(vals) @ vec.T
 
 
-def _covariance_element(obs1, obs2):
-    """Estimates the covariance of two Obs objects, neglecting autocorrelations."""
-
-    def calc_gamma(deltas1, deltas2, idx1, idx2, new_idx):
-        deltas1 = _reduce_deltas(deltas1, idx1, new_idx)
-        deltas2 = _reduce_deltas(deltas2, idx2, new_idx)
-        return np.sum(deltas1 * deltas2)
-
-    if set(obs1.names).isdisjoint(set(obs2.names)):
-        return 0.0
-
-    if not hasattr(obs1, 'e_dvalue') or not hasattr(obs2, 'e_dvalue'):
-        raise Exception('The gamma method has to be applied to both Obs first.')
-
-    dvalue = 0.0
+def _covariance_matrix(obs):
+    """Estimates the covariance of all pairs of Obs in obs, neglecting autocorrelations.
 
-    for e_name in obs1.mc_names:
-
-        if e_name not in obs2.mc_names:
-            continue
+    For every replicum the deltas of all Obs are placed on the union of
+    their idl (without rescaling) and stacked into one matrix D, such that the sums over the
+    common configurations of all pairs are obtained from the single product
+    D @ D.T. The normalization per pair is computed from the squared deltas
+    restricted to the configurations of the respective partner.
+    The contribution of covobs is given by G @ C @ G.T with the stacked gradients G.
+    """
+    length = len(obs)
+    if not all(hasattr(o, 'e_dvalue') for o in obs):
+        raise Exception('The gamma method has to be applied to all Obs first.')
 
-        idl_d = {}
-        for r_name in obs1.e_content[e_name]:
-            if r_name not in obs2.e_content[e_name]:
-                continue
-            idl_d[r_name] = _intersection_idx([obs1.idl[r_name], obs2.idl[r_name]])
+    replica = {}
+    for i, o in enumerate(obs):
+        for e_name in o.mc_names:
+            for r_name in o.e_content[e_name]:
+                replica.setdefault(e_name, {}).setdefault(r_name, []).append(i)
 
-        gamma = 0.0
+    cov = np.zeros((length, length))
+    for e_name in sorted(replica):
+        gamma = np.zeros((length, length))
+        gamma_div = np.zeros((length, length))
+        for r_name, members in sorted(replica[e_name].items()):
+            idl = _merge_idx([obs[i].idl[r_name] for i in members])
+            deltas = np.zeros((len(members), len(idl)))
+            mask = np.zeros((len(members), len(idl)), dtype=bool)
+            for k, i in enumerate(members):
+                positions = _index_map(_idl_key(obs[i].idl[r_name]), _idl_key(idl))
+                deltas[k, positions] = obs[i].deltas[r_name]
+                mask[k, positions] = True
+            block = np.ix_(members, members)
+            gamma[block] += deltas @ deltas.T
+            if np.all(mask):
+                norm = np.einsum('ij,ij->i', deltas, deltas)
+                gamma_div[block] += np.sqrt(np.outer(norm, norm))
+            else:
+                norm = (deltas ** 2) @ mask.T
+                gamma_div[block] += np.sqrt(norm * norm.T)
+        nonzero = gamma != 0.0
+        cov[nonzero] += gamma[nonzero] / gamma_div[nonzero]
 
-        for r_name in obs1.e_content[e_name]:
-            if r_name not in obs2.e_content[e_name]:
-                continue
-            if len(idl_d[r_name]) == 0:
-                continue
-            gamma += calc_gamma(obs1.deltas[r_name], obs2.deltas[r_name], obs1.idl[r_name], obs2.idl[r_name], idl_d[r_name])
+    for name in sorted(set([name for o in obs for name in o.cov_names])):
+        members = [i for i, o in enumerate(obs) if name in o.covobs]
+        grad = np.array([obs[i].covobs[name].grad.ravel() for i in members])
+        cov[np.ix_(members, members)] += grad @ obs[members[0]].covobs[name].cov @ grad.T
 
-        if gamma == 0.0:
-            continue
+    return (cov + cov.T) / 2
 
-        gamma_div = 0.0
-        for r_name in obs1.e_content[e_name]:
-            if r_name not in obs2.e_content[e_name]:
-                continue
-            if len(idl_d[r_name]) == 0:
-                continue
-            gamma_div += np.sqrt(calc_gamma(obs1.deltas[r_name], obs1.deltas[r_name], obs1.idl[r_name], obs1.idl[r_name], idl_d[r_name]) * calc_gamma(obs2.deltas[r_name], obs2.deltas[r_name], obs2.idl[r_name], obs2.idl[r_name], idl_d[r_name]))
-        gamma /= gamma_div
 
-        dvalue += gamma
+def _gamma_covariance_matrix(obs, windowing):
+    """Estimates the covariance of all pairs of Obs in obs including autocorrelations.
 
-    for e_name in obs1.cov_names:
+    For every ensemble the cross autocorrelation functions of all pairs of Obs
+    are obtained from the stacked deltas of every replicum. The error
+    covariance is then given by
+    (Gamma_ij(0) + sum_{t=1}^{W_ij} (Gamma_ij(t) + Gamma_ji(t))) (1 + (2 W_ij + 1) / N) / N,
+    which reduces to the squared error of the gamma method on the diagonal.
+    """
+    length = len(obs)
+    if not all(hasattr(o, 'e_dvalue') for o in obs):
+        raise Exception('The gamma method has to be applied to all Obs first.')
 
-        if e_name not in obs2.cov_names:
-            continue
+    ensembles = {}
+    for i, o in enumerate(obs):
+        e_content = o.e_content
+        for e_name in o.mc_names:
+            key = tuple((r_name, o.shape[r_name], _idl_key(o.idl[r_name])) for r_name in e_content[e_name])
+            ensembles.setdefault(e_name, {}).setdefault(key, []).append(i)
 
-        dvalue += float(np.dot(np.transpose(obs1.covobs[e_name].grad), np.dot(obs1.covobs[e_name].cov, obs2.covobs[e_name].grad)))
+    cov = np.zeros((length, length))
+    for e_name in sorted(ensembles):
+        if len(ensembles[e_name]) > 1:
+            raise Exception(f"All Obs have to be defined on the same replica and configurations of ensemble {e_name} to estimate their autocorrelated covariance.")
+        key, members = list(ensembles[e_name].items())[0]
+        ref = obs[members[0]]
+        r_names = [r_name for r_name, _, _ in key]
+
+        e_N = np.sum([ref.shape[r_name] for r_name in r_names])
+        if isinstance(ref.idl[r_names[0]], range):
+            gapsize = 1
+        else:
+            gapsize = np.min(np.diff(ref.idl[r_names[0]]))
+        windows = np.array([obs[i].e_windowsize[e_name] for i in members])
+        if windowing == 'shared':
+            window = np.full((len(members), len(members)), np.max(windows))
+        else:
+            window = np.maximum.outer(windows, windows)
+        w_max = np.max(windows) + 1
+
+        e_gamma = np.zeros((len(members), len(members), w_max))
+        gamma_div = np.zeros(w_max)
+        for r_name in r_names:
+            e_gamma += _calc_cross_gamma(np.array([obs[i].deltas[r_name] for i in members]), ref.idl[r_name], ref.shape[r_name], w_max)
+            gamma_div += _gamma_div(_idl_key(ref.idl[r_name]), ref.shape[r_name], w_max, 'auto')
+        gamma_div[gamma_div < 1] = 1.0
+        e_gamma /= gamma_div
+
+        summed = np.cumsum(np.concatenate((e_gamma[:, :, :1], e_gamma[:, :, 1:] + np.swapaxes(e_gamma, 0, 1)[:, :, 1:]), axis=2), axis=2)
+        summed = np.take_along_axis(summed, window[:, :, np.newaxis], axis=2)[:, :, 0]
+        # As in the gamma method the integrated autocorrelation time of the diagonal elements is at least 0.5.
+        # Rows and columns of clipped elements are rescaled accordingly, which keeps identical Obs fully correlated.
+        # Rows and columns with a sum which is not positive cannot be rescaled and fall back to their values at lag 0.
+        diagonal = np.diag_indices(len(members))
+        clipped = np.maximum(summed[diagonal], 2 * (0.5 + np.finfo(np.float64).eps) * e_gamma[:, :, 0][diagonal])
+        negative = summed[diagonal] <= 0
+        summed[negative, :] = e_gamma[negative, :, 0]
+        summed[:, negative] = e_gamma[:, negative, 0]
+        scale = np.ones(len(members))
+        positive = summed[diagonal] > 0
+        scale[positive] = np.sqrt(clipped[positive] / summed[diagonal][positive])
+        summed *= np.outer(scale, scale)
+        summed[diagonal] = clipped
+        with np.errstate(divide='ignore'):
+            norm = np.where(window == 0, 1 / (e_N - 1), (1 + (2 * window / gapsize + 1) / e_N) / e_N)
+        cov[np.ix_(members, members)] += summed * norm
+
+    for name in sorted(set([name for o in obs for name in o.cov_names])):
+        members = [i for i, o in enumerate(obs) if name in o.covobs]
+        grad = np.array([obs[i].covobs[name].grad.ravel() for i in members])
+        cov[np.ix_(members, members)] += grad @ obs[members[0]].covobs[name].cov @ grad.T
+
+    return (cov + cov.T) / 2
+
+
+def _calc_cross_gamma(deltas, idx, shape, w_max):
+    """Calculate Gamma_{AB}(t) = sum_s delta_A(s) delta_B(s + t) for all pairs of rows of deltas.
+
+    Depending on the number of lags either one matrix product per lag or one
+    stacked fft of all rows with a chunked inverse transform of the cross
+    spectra is used.
 
-    return dvalue
+    Parameters
+    ----------
+    deltas : numpy.ndarray
+        Fluctuations of n observables with shape (n, shape).
+    idx : list
+        List or range of configurations on which the deltas are defined.
+    shape : int
+        Number of configurations in idx.
+    w_max : int
+        Number of lags to be computed.
+    """
+    deltas = _expand_deltas(deltas, idx, shape)
+    n, new_shape = deltas.shape
+    gamma = np.zeros((n, n, w_max))
+    max_gamma = min(new_shape, w_max)
+    padding = scipy.fft.next_fast_len(new_shape + max_gamma, real=True)
+    if max_gamma <= 8 * np.log2(padding):
+        # For short windows one matrix product per lag is cheaper than the inverse fft of all cross spectra
+        for t in range(max_gamma):
+            gamma[:, :, t] = deltas[:, :new_shape - t] @ deltas[:, t:].T
+        return gamma
+    transformed = scipy.fft.rfft(deltas, padding, axis=-1)
+    # The cross spectra are transformed back in chunks of rows to bound the memory footprint
+    chunk = max(1, 2 ** 22 // (n * transformed.shape[-1]))
+    for start in range(0, n, chunk):
+        cross = np.conj(transformed[start:start + chunk, np.newaxis]) * transformed[np.newaxis]
+        gamma[start:start + chunk, :, :max_gamma] = scipy.fft.irfft(cross, padding, axis=-1)[..., :max_gamma]
+    return gamma
 
 
 def import_jackknife(jacks, name, idl=None):
@@ -46,3 +46,11 @@ def test_b_cmatmul(benchmark):
 def test_b_gamma(benchmark):
     my_obs = pe.Obs([np.random.rand(length)], ['t1'])
     benchmark(my_obs.gamma_method)
+
+
+@pytest.mark.parametrize("fft", ["numpy", "scipy"])
+@pytest.mark.parametrize("n", [10007, 99991])
+def test_b_calc_gamma_prime_length(benchmark, fft, n):
+    deltas = np.random.normal(0.0, 0.1, (4, n))
+
+    benchmark(pe.obs._calc_gamma, deltas, range(1, n + 1), n, n // 2, fft)
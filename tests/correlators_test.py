@@ -1,5 +1,7 @@
 import os
+import warnings
 import numpy as np
+import autograd.numpy as anp
 import scipy
 import matplotlib.pyplot as plt
 import pyerrors as pe
@@ -566,3 +568,213 @@ def test_corr_symmetric():
         assert scorr[1] == scorr[3]
         assert scorr[2] == corr[2]
         assert scorr[0] == corr[0]
+
+
+def test_corr_dense():
+    T, N = 10, 3
+    mat = []
+    for t in range(T):
+        m = np.array([[pe.pseudo_Obs(np.exp(-0.2 * t) * (1 + i + j), 0.01, 'e1', samples=40) for j in range(N)] for i in range(N)])
+        mat.append(0.5 * (m + m.T))
+    cm = pe.Corr(mat)
+    cm.content[7] = None
+    vec = np.array([1., 0.5, 0.25])
+    obs = pe.pseudo_Obs(1.3, 0.1, 'e1', samples=40)
+
+    c = cm.item(0, 1)
+    assert c._dense is not None
+    res = {"add": (c + obs * c) / c - 2, "pow": c ** 2, "roll": c.roll(3), "reverse": c.reverse(),
+           "symmetric": c.symmetric(), "deriv": c.deriv("improved"), "second_deriv": c.second_deriv(),
+           "log": c.deriv("log"), "projected": (cm * c).projected(vec, normalize=True)}
+    expected = {"add": lambda t: (c[t] + obs * c[t]) / c[t] - 2, "pow": lambda t: c[t] ** 2,
+                "roll": lambda t: c[t - 3], "reverse": lambda t: c[T - 1 - t], "symmetric": lambda t: 0.5 * (c[t] + c[-t]),
+                "deriv": lambda t: (1 / 12) * (c[t - 2] - 8 * c[t - 1] + 8 * c[t + 1] - c[t + 2]),
+                "second_deriv": lambda t: c[t + 1] - 2 * c[t] + c[t - 1],
+                "log": lambda t: c[t] * 0.5 * (np.log(c[t + 1]) - np.log(c[t - 1])),
+                "projected": lambda t: vec @ (cm[t] * c[t]) @ vec / (vec @ vec)}
+    for key, corr in res.items():
+        assert corr._dense is not None
+        for t in range(T):
+            try:
+                exp = expected[key](t)
+            except (TypeError, IndexError):
+                exp = None
+            if key in ["deriv", "second_deriv", "log"] and not (2 if key == "deriv" else 1) <= t < T - (2 if key == "deriv" else 1):
+                exp = None
+            if exp is None:
+                assert corr[t] is None
+            else:
+                exp.gm()
+                corr[t].gm()
+                assert np.isclose(corr[t].value, exp.value)
+                assert np.isclose(corr[t].dvalue, exp.dvalue)
+        assert corr._dense is None
+
+    proj = cm.projected([vec if t % 2 else None for t in range(T)], vec)
+    assert [t for t in range(T) if proj[t] is not None] == [1, 3, 5, 9]
+
+    with pytest.raises(Exception):
+        (c * 0).deriv("log")
+    with pytest.raises(Exception):
+        (c * 0) / (c * 0)
+
+
+def test_corr_dense_cache():
+    obs = [pe.Obs([np.array([1., 2., 3., 4., 6.]) * (t + 1)], ['e1']) for t in range(6)]
+    corr = pe.Corr(obs)
+    dense = corr._dense_content()
+    assert corr._dense_content() is dense
+    (corr + 1).content
+    assert corr._dense_content() is dense
+
+    corr.content[2] = np.asarray([obs[0]])
+    assert corr._dense_content() is not dense
+    dense = corr._dense_content()
+    obs[1].deltas['e1'] = -obs[1].deltas['e1']
+    assert corr._dense_content() is not dense
+    assert np.allclose((2 * corr)[1].deltas['e1'], 2 * obs[1].deltas['e1'])
+
+    derived = corr * corr
+    content = derived.content
+    content[3] = None
+    assert (derived + 1)[3] is None
+
+
+def test_corr_dense_masking():
+    obs = [pe.Obs([np.array([1., 2., 3., 4., 6.]) * t], ['e1']) for t in range(6)]
+    num = pe.Corr([None] + obs[1:]) + 0.
+    den = pe.Corr(obs) + 0.
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        ratio = num / den
+        log = den.deriv("log")
+    assert ratio[0] is None
+    assert all(np.isclose(ratio[t].value, 1.) for t in range(1, 6))
+    assert [t for t in range(6) if log[t] is not None] == [2, 3, 4]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        ratio = den / den
+    assert ratio._dense[0][0].value == 1.
+    assert ratio[0] is None
+
+
+def test_corr_roll_matrix():
+    T, N = 5, 2
+    samples = np.array([1., 2., 3., 4., 6.])
+    mat = [np.array([[pe.Obs([samples * (10 * t + 2 * i + j + 1)], ['e1']) for j in range(N)] for i in range(N)]) for t in range(T)]
+    gappy = np.array([[pe.Obs([samples * (2 * i + j)], ['e1'], idl=[range(1, 10, 2)]) for j in range(N)] for i in range(N)])
+    for corr in [pe.Corr(mat), pe.Corr(mat + [gappy])]:
+        rolled = corr.roll(2)
+        for t in range(corr.T):
+            for i in range(N):
+                for j in range(N):
+                    assert rolled[t][i, j].value == corr[t - 2][i, j].value
+
+
+def test_GEVP_t0_scan():
+    N, T = 4, 12
+    energies = np.linspace(0.3, 1.2, N)
+    amplitudes = np.identity(N) + 0.2 * np.random.rand(N, N)
+    mat = []
+    for t in range(T):
+        m = amplitudes @ np.diag(np.exp(-energies * t)) @ amplitudes.T
+        mat.append(np.array([[pe.pseudo_Obs(m[i, j], 1e-4 * abs(m[i, j]), 'e', samples=20) for j in range(N)] for i in range(N)]))
+    corr = pe.Corr(mat).matrix_symmetric()
+
+    for sort, ts in [("Eigenvalue", None), ("Eigenvector", 6), (None, 6)]:
+        scan = corr.GEVP([1, 2, 3], ts=ts, sort=sort)
+        assert len(scan) == 3
+        for t0, vecs in zip([1, 2, 3], scan):
+            G0 = np.vectorize(lambda x: x.value)(corr[t0])
+            for t in range(t0 + 1, T) if sort is not None else [ts]:
+                Gt = np.vectorize(lambda x: x.value)(corr[t])
+                ref = pe.correlators._GEVP_solver(Gt, G0)
+                for s in range(N):
+                    vec = vecs[s][t] if sort is not None else vecs[s]
+                    if sort == "Eigenvector":
+                        assert np.isclose(np.max(np.abs(ref @ G0 @ vec)), 1)
+                    else:
+                        assert np.allclose(np.abs(vec), np.abs(ref[s]))
+            single = corr.GEVP(t0, ts=ts, sort=sort, state=1)
+            if sort is None:
+                assert np.allclose(single, vecs[1])
+            else:
+                for t in range(T):
+                    assert (single[t] is None and vecs[1][t] is None) or np.allclose(single[t], vecs[1][t])
+
+
+def test_GEVP_eigenvalues():
+    N, T, t0 = 3, 10, 2
+    energies = np.linspace(0.3, 1.2, N)
+    amplitudes = np.identity(N) + 0.2 * np.random.rand(N, N)
+    mat = []
+    for t in range(T):
+        m = amplitudes @ np.diag(np.exp(-energies * t)) @ amplitudes.T
+        mat.append(np.array([[pe.pseudo_Obs(m[i, j], 1e-3 * abs(m[i, j]), 'e', samples=30) for j in range(N)] for i in range(N)]))
+    corr = pe.Corr(mat).matrix_symmetric()
+
+    eigenvalues = corr.GEVP_eigenvalues(t0)
+    vecs = corr.GEVP(t0)
+    for s in range(N):
+        projected = corr.Eigenvalue(t0, state=s)
+        for t in range(T):
+            if t <= t0:
+                assert eigenvalues[s][t] is None
+                continue
+            v = vecs[s][t]
+            rayleigh = (v @ corr[t] @ v) / (v @ corr[t0] @ v)
+            pe.gamma_method([rayleigh, eigenvalues[s][t]])
+            assert np.isclose(eigenvalues[s][t].value, projected[t].value)
+            assert np.isclose(eigenvalues[s][t].dvalue, rayleigh.dvalue)
+        assert np.isclose(np.log(eigenvalues[s][5].value / eigenvalues[s][6].value), energies[s])
+
+    state = corr.GEVP_eigenvalues(t0, ts=4, sort="Eigenvector", state=1)
+    assert np.isclose(state[6].value, eigenvalues[1][6].value)
+
+    with pytest.raises(Exception):
+        corr.GEVP_eigenvalues(t0, sort=None)
+
+
+def test_sort_vectors():
+    N = 10
+    reference = np.linalg.qr(np.cos(np.arange(N * N).reshape(N, N)))[0]
+    permutation = np.arange(N)[[1, 0] + list(range(2, N))]
+    vec_set = [None, reference, reference[permutation] + 0.01 * np.sin(np.arange(N * N).reshape(N, N)), reference[::-1]]
+    sorted_vec_set = pe.correlators._sort_vectors(vec_set, 1)
+    assert sorted_vec_set[0] is None
+    assert np.all(sorted_vec_set[1] == reference)
+    for t in [2, 3]:
+        assert np.allclose(np.abs(np.array(sorted_vec_set[t]) @ reference.T), np.identity(N), atol=0.1)
+
+    cycle = [2, 0, 1]
+    sorted_cycle = pe.correlators._sort_vectors([np.identity(3), np.identity(3)[cycle]], 0)[1]
+    assert np.all(np.array(sorted_cycle) == np.identity(3))
+
+    singular_reference = np.ones((3, 3))
+    vecs = np.identity(3)[[2, 0, 1]]
+    assert len(pe.correlators._sort_vectors([singular_reference, vecs], 0)[1]) == 3
+
+
+def test_m_eff_periodic_batched():
+    T, mass = 24, 0.35
+    for variant, func in [("cosh", anp.cosh), ("periodic", anp.cosh), ("sinh", anp.sinh)]:
+        corr = pe.Corr([pe.pseudo_Obs(func(mass * (t - T / 2)) + (0.1 if t == T / 2 else 0), 0.002, 'e', samples=40) for t in range(T)])
+        corr.content[3] = None
+        m_eff = corr.m_eff(variant)
+        assert m_eff[2] is None and m_eff[3] is None and m_eff[T - 1] is None
+        assert all(np.isfinite(m_eff[t].value) for t in range(T) if m_eff[t] is not None)
+        # The root is not bracketed on the timeslices 11 and 12 next to the offset at T / 2.
+        for t in [0, 7, 15, 20] + ([11, 12] if variant != "sinh" else []):
+            def root_function(x, d):
+                return func(x * (t - T / 2)) / func(x * (t + 1 - T / 2)) - d
+            ref = np.abs(pe.roots.find_root(corr[t] / corr[t + 1], root_function))
+            pe.gamma_method([ref, m_eff[t]])
+            if t in [11, 12]:
+                assert m_eff[t].value == ref.value
+                continue
+            assert np.isclose(m_eff[t].value, mass)
+            assert np.isclose(m_eff[t].value, ref.value, rtol=1e-7)
+            assert np.isclose(m_eff[t].dvalue, ref.dvalue, rtol=1e-6)
+        if variant == "sinh":
+            assert m_eff[T // 2].value == m_eff[T // 2 - 1].value == m_eff[T // 2 - 2].value
@@ -108,3 +108,24 @@ def test_covobs_exceptions():
         covobs = pe.cov_Obs([1.5, 0.1], [[1., .2,], [.3, .5]] , 'test')
     with pytest.raises(Exception):
         covobs = pe.cov_Obs([1.5, 0.1], [[8, 4,], [4, -2]] , 'test')
+
+
+def test_covobs_registry():
+    cov = np.array([[2.0, 0.5, 0.1], [0.5, 1.0, 0.2], [0.1, 0.2, 0.5]])
+    ol = pe.cov_Obs([1.0, 2.0, 3.0], cov, 'registry_test')
+    res = ol[0] * ol[1] + ol[2]
+    assert res.covobs['registry_test'].cov is ol[0].covobs['registry_test'].cov
+    assert pe.cov_Obs([1.0, 2.0, 3.0], cov.copy(), 'other')[0].covobs['other'].cov is ol[0].covobs['registry_test'].cov
+    assert not res.covobs['registry_test'].cov.flags.writeable
+
+    chol = res.covobs['registry_test'].cholesky
+    assert np.allclose(chol @ chol.T, cov)
+    assert chol is ol[2].covobs['registry_test'].cholesky
+
+    singular = np.array([[0.02, 0.02, 0.0], [0.02, 0.02, 0.0], [0.0, 0.0, 0.0]])
+    chol = pe.cov_Obs([0.5, 0.5, 0.1], singular, 'singular')[0].covobs['singular'].cholesky
+    assert np.allclose(chol, np.tril(chol))
+    assert np.allclose(chol @ chol.T, singular)
+
+    with pytest.raises(Exception):
+        pe.cov_Obs([1.0, 2.0], [[1.0, 0.1], [0.2, 1.0]], 'asym')
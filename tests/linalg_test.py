@@ -355,3 +355,25 @@ def test_complex_matrix_real_entries():
     my_mat[0, 1] = 4
     my_mat[2, 0] = pe.Obs([np.random.normal(1.0, 0.1, 100)], ['t'])
     assert np.all((my_mat @ pe.linalg.inv(my_mat) - np.identity(4)) == 0)
+
+
+def test_analytic_matrix_derivatives():
+    dim = 4
+    matrix = np.array([[pe.Obs([np.random.normal(1.0, 0.1, 100), np.random.normal(1.0, 0.1, 50)], ['e1', 'e2'], idl=[range(1, 101), range(1, 100, 2)]) for j in range(dim)] for i in range(dim)])
+    matrix = matrix * pe.cov_Obs(1.0, 0.01, 'cov') + 3 * np.identity(dim)
+    sym = matrix @ matrix.T
+
+    def check(res, ref):
+        for r, f in zip(np.ravel(res), np.ravel(ref)):
+            assert sorted(r.names) == sorted(f.names)
+            assert (r - f).is_zero(atol=1e-10)
+
+    check(pe.linalg.inv(matrix), pe.derived_observable(lambda x, **kwargs: anp.linalg.inv(x), [matrix], array_mode=True)[0])
+    check(pe.linalg.cholesky(sym), pe.derived_observable(lambda x, **kwargs: anp.linalg.cholesky(x), [sym], array_mode=True)[0])
+    check([pe.linalg.det(matrix)], [pe.derived_observable(lambda x, **kwargs: anp.linalg.det(anp.array(x).reshape(dim, dim)), matrix.ravel().tolist())])
+    w, v = pe.linalg.eigh(sym)
+    check(w, pe.derived_observable(lambda x, **kwargs: anp.linalg.eigh(x)[0], sym))
+    check(v, pe.derived_observable(lambda x, **kwargs: anp.linalg.eigh(x)[1], sym))
+    u, s, vh = pe.linalg.svd(matrix[:, :3])
+    assert u.shape == (dim, 3) and s.shape == (3,) and vh.shape == (3, 3)
+    check(s, pe.derived_observable(lambda x, **kwargs: anp.linalg.svd(x, full_matrices=False)[1], matrix[:, :3]))
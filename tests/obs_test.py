@@ -1,6 +1,10 @@
 import autograd.numpy as np
 import os
 import copy
+import concurrent.futures
+import pickle
+import weakref
+import gc
 import matplotlib.pyplot as plt
 import pyerrors as pe
 import pytest
@@ -866,6 +870,57 @@ def test_covariance_idl():
     pe.covariance([obs1, obs2])
 
 
+def test_covariance_pairwise_consistency():
+    obs = []
+    for i in range(6):
+        o = pe.Obs([np.random.normal(1.0, 0.1, 100), np.random.normal(1.0, 0.1, 50)], ["ens|r1", "ens|r2"], idl=[range(1, 101), range(1 + i % 2, 101, 2)])
+        if i % 2:
+            o *= pe.Obs([np.random.normal(1.0, 0.1, 40)], ["ens2"], idl=[range(1 + i, 41 + i)])
+        if i % 3:
+            o *= pe.cov_Obs(1.0, 0.01, "cov")
+        o.gamma_method()
+        obs.append(o)
+
+    cov = pe.covariance(obs)
+    for i in range(len(obs)):
+        for j in range(len(obs)):
+            assert np.isclose(cov[i, j], pe.covariance([obs[i], obs[j]])[0, 1], rtol=1e-12, atol=1e-16)
+
+
+def test_covariance_windowing():
+    obs = []
+    for i in range(5):
+        o = pe.Obs([np.cumsum(np.random.normal(0.0, 0.1, 500)) % 1 + 1, np.random.normal(1.0, 0.1, 300)], ["ens|r1", "ens|r2"])
+        o *= pe.Obs([np.cumsum(np.random.normal(0.0, 0.1, 40)) + 1], ["ens2"], idl=[range(2, 82, 2)]) * pe.cov_Obs(1.0, 0.01, "cov")
+        o.gamma_method()
+        obs.append(o)
+    obs.append(obs[0])
+
+    for windowing in ["shared", "pairwise"]:
+        cov = pe.covariance(obs, windowing=windowing)
+        assert np.allclose(cov, cov.T)
+        # Identical Obs stay fully correlated if the integrated autocorrelation time is clipped
+        assert np.isclose(cov[0, -1], cov[0, 0])
+        assert np.isclose(pe.covariance(obs, correlation=True, windowing=windowing)[0, -1], 1.0)
+    assert np.allclose(np.diag(pe.covariance(obs, windowing="pairwise")), [o.dvalue ** 2 for o in obs])
+
+    # Anticorrelated samples have a negative integrated autocorrelation time before clipping
+    n = np.arange(400)
+    alternating = pe.Obs([1 + 0.1 * (-1.0) ** n + 0.05 * np.sin(n)], ["ens_alt"])
+    smooth = pe.Obs([1 + 0.1 * np.cos(0.05 * n) + 0.02 * np.sin(n)], ["ens_alt"])
+    pe.gamma_method([alternating, smooth])
+    for windowing in ["shared", "pairwise"]:
+        corr = pe.covariance([alternating, smooth, alternating], correlation=True, windowing=windowing)
+        assert np.isclose(corr[0, 2], 1.0)
+
+    with pytest.raises(ValueError):
+        pe.covariance(obs, windowing="full")
+    other = pe.Obs([np.random.normal(1.0, 0.1, 250)], ["ens|r1"], idl=[range(1, 500, 2)])
+    other.gamma_method()
+    with pytest.raises(Exception):
+        pe.covariance([obs[0], other], windowing="shared")
+
+
 def test_correlation_intersection_of_idls():
     range1 = range(1, 2000, 2)
     range2 = range(2, 2001, 2)
@@ -1156,3 +1211,514 @@ def test_nan_obs():
     o.idl['test'] = [1, 5] + list(range(7, 2002, 2))
     no = np.NaN * o
     no.gamma_method()
+
+
+def test_obs_array_arithmetic():
+    a = [pe.Obs([np.random.normal(1.0, 0.1, 100)], ['e|r1']) for _ in range(4)]
+    b = [pe.Obs([np.random.normal(2.0, 0.1, 50)], ['e|r1'], idl=[range(1, 100, 2)]) for _ in range(4)]
+    c = pe.cov_Obs(1.3, 0.01, 'cov')
+    b = [o * c for o in b]
+    A = pe.ObsArray(a)
+    B = pe.ObsArray(b)
+
+    for res, ref in [(A + B, [x + y for x, y in zip(a, b)]),
+                     (A - 2.0, [x - 2.0 for x in a]),
+                     (A * B, [x * y for x, y in zip(a, b)]),
+                     (A / B, [x / y for x, y in zip(a, b)]),
+                     (3 / A, [3 / x for x in a]),
+                     (np.exp(A) - 2 * B, [np.exp(x) - 2 * y for x, y in zip(a, b)]),
+                     (np.log(B) * c, [np.log(y) * c for y in b]),
+                     (a[0] ** B, [a[0] ** y for y in b]),
+                     (a + B, [x + y for x, y in zip(a, b)])]:
+        assert isinstance(res, pe.ObsArray)
+        for o_res, o_ref in zip(res.tolist(), ref):
+            assert (o_res - o_ref).is_zero()
+            assert o_res.names == o_ref.names
+            for name in o_ref.r_values:
+                assert np.isclose(o_res.r_values[name], o_ref.r_values[name])
+            o_res.gamma_method()
+            o_ref.gamma_method()
+            assert np.isclose(o_res.dvalue, o_ref.dvalue)
+
+
+def test_obs_array_conversion():
+    ol = [pe.pseudo_Obs(1.0, 0.1, 'e1'), pe.pseudo_Obs(2.0, 0.3, 'e2'), pe.cov_Obs(3.0, 0.2, 'cov'),
+          pe.Obs([np.random.rand(6)], ['e1'], idl=[[1, 3, 4, 7, 8, 10]])]
+    arr = pe.ObsArray(ol)
+    assert len(arr) == 4
+    assert arr.shape == (4,)
+    for o_arr, o in zip(arr.tolist(), ol):
+        assert o_arr.names == o.names
+        assert o_arr.value == o.value
+        assert (o_arr - o).is_zero()
+    assert isinstance(arr[1], pe.Obs)
+    assert isinstance(arr[1:3], pe.ObsArray)
+    assert arr[1:3].shape == (2,)
+
+    matrix = pe.ObsArray([ol[:2], ol[2:]])
+    assert matrix.shape == (2, 2)
+    assert np.asarray(matrix).shape == (2, 2)
+    assert (matrix[1, 0] - ol[2]).is_zero()
+    assert (matrix * np.array([1.0, 2.0])).shape == (2, 2)
+
+    with pytest.raises(TypeError):
+        pe.ObsArray([1.0, 2.0])
+
+
+def test_obs_ufunc_dispatch():
+    a = [pe.pseudo_Obs(1.5 + i, 0.1, 'e1') for i in range(3)]
+    arr = np.empty(3, dtype=object)
+    arr[:] = a
+    weights = np.array([0.5, 2.0, 3.0])
+    gappy = pe.Obs([np.random.rand(5)], ['e1'], idl=[[1, 3, 4, 7, 9]])
+
+    for res, ref in [(np.exp(arr), [np.exp(x) for x in a]),
+                     (np.arctan(arr), [np.arctan(x) for x in a]),
+                     (np.abs(-arr), [x for x in a]),
+                     (a[0] * weights, [a[0] * w for w in weights]),
+                     (weights - a[1], [w - a[1] for w in weights]),
+                     (a[2] / arr, [a[2] / x for x in a]),
+                     (gappy + arr, [gappy + x for x in a]),
+                     (np.power(arr, 2), [x ** 2 for x in a])]:
+        assert isinstance(res, np.ndarray)
+        assert res.shape == (3,)
+        for o_res, o_ref in zip(res, ref):
+            assert (o_res - o_ref).is_zero()
+            o_res.gamma_method()
+            o_ref.gamma_method()
+            assert np.isclose(o_res.dvalue, o_ref.dvalue)
+
+    assert (np.sqrt(a[0]) - a[0].sqrt()).is_zero()
+    assert (np.float64(2.0) * a[0] - 2 * a[0]).is_zero()
+    assert np.all((arr < a[1]) == np.array([True, False, False]))
+    assert isinstance(np.multiply(a[0], 1j), pe.CObs)
+
+
+def test_obs_ufunc_dispatch_return_type():
+    a = pe.pseudo_Obs(1.5, 0.1, 'e1')
+    weights = np.array([[0.5, 2.0], [3.0, 4.0]])
+    arr = np.empty((2, 2), dtype=object)
+    arr[:] = [[pe.pseudo_Obs(1.5 + i + j, 0.1, 'e1') for j in range(2)] for i in range(2)]
+    # ndarray (op) Obs returns object arrays of Obs as before the introduction of __array_ufunc__
+    for res in [weights + a, a + weights, weights * a, weights / a, a - weights, arr * a, a / arr, weights ** a]:
+        assert type(res) is np.ndarray
+        assert res.dtype == object
+        assert res.shape == (2, 2)
+        assert all(type(o) is pe.Obs for o in res.ravel())
+
+
+def test_cobs_ufunc_dispatch():
+    c = [pe.CObs(pe.pseudo_Obs(1.5 + i, 0.1, 'e1'), pe.pseudo_Obs(0.5 - i, 0.1, 'e1')) for i in range(3)]
+    arr = np.empty(3, dtype=object)
+    arr[:] = c
+    weights = np.array([0.5, 2.0, 3.0])
+    cweights = weights * (1 + 0.5j)
+
+    for res, ref in [(c[0] + weights, [c[0] + w for w in weights]),
+                     (weights - c[0], [w - c[0] for w in weights]),
+                     (c[0] * arr, [c[0] * x for x in c]),
+                     (cweights * c[0], [c[0] * w for w in cweights]),
+                     (arr / c[0], [x / c[0] for x in c]),
+                     (weights / c[0], [w / c[0] for w in weights]),
+                     (-arr, [-x for x in c])]:
+        assert type(res) is np.ndarray
+        assert res.dtype == object
+        for o_res, o_ref in zip(res, ref):
+            assert isinstance(o_res, pe.CObs)
+            assert (o_res.real - o_ref.real).is_zero()
+            assert (o_res.imag - o_ref.imag).is_zero()
+            pe.gamma_method([o_res.real, o_res.imag, o_ref.real, o_ref.imag])
+            assert np.isclose(o_res.real.dvalue, o_ref.real.dvalue)
+            assert np.isclose(o_res.imag.dvalue, o_ref.imag.dvalue)
+
+
+def test_gamma_method_batched():
+    corr_data = np.cumsum(np.random.normal(0.0, 1.0, 400)) * 0.01 + 1.0
+    a = pe.Obs([corr_data, np.random.normal(1.0, 0.1, 200)], ['e|r1', 'e|r2'])
+    b = pe.Obs([np.random.normal(2.0, 0.1, 100)], ['f'], idl=[range(1, 200, 2)])
+    c = pe.Obs([np.random.normal(2.0, 0.1, 6)], ['g'], idl=[[1, 3, 4, 7, 8, 10]])
+    d = pe.cov_Obs(1.0, 0.01, 'cov')
+    ol = [a, a * b, a + c, 0 * b + 2, d * a, d, pe.CObs(a, b)]
+
+    for kwargs in [{}, {'S': 0}, {'tau_exp': 4.0}, {'S': 3.0, 'fft': False}]:
+        batched = [o * 1 for o in ol]
+        pe.gamma_method([[o] for o in batched], **kwargs)
+        for o, ref in zip(batched, ol):
+            ref.gamma_method(**kwargs)
+            for part, ref_part in ([(o.real, ref.real), (o.imag, ref.imag)] if isinstance(o, pe.CObs) else [(o, ref)]):
+                assert part.dvalue == ref_part.dvalue
+                assert part.ddvalue == ref_part.ddvalue
+                assert part.e_windowsize == ref_part.e_windowsize
+                assert part.e_tauint == ref_part.e_tauint
+
+    with pytest.raises(TypeError):
+        pe.gamma_method([a, 1.0])
+
+
+def test_gamma_div_cache():
+    idl = [1, 2, 4, 5, 6, 8, 9, 10, 11, 13]
+    a = pe.Obs([np.random.normal(1.0, 0.1, 10)], ['e_cache'], idl=[idl])
+    b = pe.Obs([np.random.normal(1.0, 0.1, 10)], ['e_cache'], idl=[list(idl)])
+    a.gamma_method()
+    info = pe.obs.gamma_div_cache_info()
+    b.gamma_method()
+    assert pe.obs.gamma_div_cache_info().hits == info.hits + 1
+    assert pe.obs.gamma_div_cache_info().misses == info.misses
+    b.gamma_method(fft=False)
+    assert pe.obs.gamma_div_cache_info().misses == info.misses + 1
+
+
+def test_gamma_method_memo():
+    a = pe.Obs([np.random.normal(1.0, 0.1, 100), np.random.normal(1.0, 0.1, 80)], ['e_memo|r1', 'e_memo2'])
+    a.gamma_method()
+    rho = a.e_rho['e_memo']
+    dvalue = a.dvalue
+    a.gamma_method()
+    assert a.e_rho['e_memo'] is rho
+    assert a.dvalue == dvalue
+    a.gamma_method(S=3.0)
+    assert a.e_rho['e_memo'] is not rho
+    assert a.S['e_memo'] == 3.0
+    a.gamma_method(S=0)
+    rho2 = a.e_rho['e_memo2']
+    a.deltas['e_memo|r1'] = 2 * a.deltas['e_memo|r1']
+    a.gamma_method(S=0)
+    assert a.e_rho['e_memo2'] is rho2
+    assert np.isclose(a.e_dvalue['e_memo'], 2 * np.sqrt(np.var(a.deltas['e_memo|r1'] / 2, ddof=1) / 100))
+    dvalue = a.e_dvalue['e_memo']
+    with pytest.raises(ValueError):
+        a.deltas['e_memo|r1'][:] = 0.0
+    # The memo does not keep replaced deltas alive
+    replaced = weakref.ref(a.deltas['e_memo|r1'])
+    a.deltas.update({'e_memo|r1': a.deltas['e_memo|r1'] / 2})
+    gc.collect()
+    assert replaced() is None
+    a.gamma_method(S=0)
+    assert np.isclose(2 * a.e_dvalue['e_memo'], dvalue)
+    assert a.e_rho['e_memo2'] is rho2
+    a.idl['e_memo2'] = range(1, 81)
+    a.gamma_method(S=0)
+    assert a.e_rho['e_memo2'] is not rho2
+    b = pickle.loads(pickle.dumps(a))
+    assert not hasattr(b, '_gamma_memo')
+    assert b.dvalue == a.dvalue
+
+
+def test_gamma_method_fft_backends():
+    for n in [30, 1009]:
+        obs = pe.Obs([np.random.normal(1.0, 0.1, n)], ['e_backend'], idl=[range(1, 2 * n, 2)])
+        obs.gamma_method(fft='numpy')
+        reference = obs.dvalue
+        for fft in [True, False, 'auto', 'scipy', 'direct', pe.obs._gamma_numpy]:
+            obs.gamma_method(fft=fft)
+            assert np.isclose(obs.dvalue, reference, rtol=1e-12)
+        obs.gamma_method(fft='scipy', workers=2)
+        assert np.isclose(obs.dvalue, reference, rtol=1e-12)
+        assert pe.obs._gamma_backend(True) == 'numpy'
+        deltas = np.random.normal(0.0, 0.1, (3, n))
+        assert np.allclose(pe.obs._calc_gamma(deltas, range(n), n, n // 2, 'scipy'), pe.obs._calc_gamma(deltas, range(n), n, n // 2, 'direct'))
+
+    with pytest.raises(ValueError):
+        obs.gamma_method(fft='cuda')
+
+
+def test_gamma_method_sparse_idl():
+    idl = np.cumsum(np.random.randint(1, 2000, 200)).tolist()
+    obs = pe.Obs([np.random.normal(1.0, 0.1, len(idl))], ['e_sparse'], idl=[idl])
+    assert pe.obs._sparse_pairs(pe.obs._idl_key(obs.idl['e_sparse']), (idl[-1] - idl[0] + 1) // 2) is not None
+    obs.gamma_method(fft='scipy')
+    reference = (obs.dvalue, obs.e_windowsize['e_sparse'])
+    obs.gamma_method(fft='auto')
+    assert np.isclose(obs.dvalue, reference[0], rtol=1e-10)
+    assert obs.e_windowsize['e_sparse'] == reference[1]
+
+    dense_idl = [1, 2, 3, 5, 6, 7, 8, 10, 11, 12]
+    assert pe.obs._sparse_pairs(pe.obs._idl_key(pe.obs._intern_idl(dense_idl)), 6) is None
+
+
+def test_gamma_method_executor():
+    names = ['ens1', 'ens2', 'ens3']
+    obs = [pe.Obs([np.random.normal(1.0, 0.1, 500 + 10 * i) for i in range(len(names))], names) for _ in range(5)]
+    reference = [o * 1 for o in obs]
+    pe.gamma_method(reference, tau_exp=5)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        pe.gamma_method(obs, tau_exp=5, executor=executor)
+        single = obs[0] * 2
+        pe.Obs.executor_global = executor
+        try:
+            single.gamma_method()
+        finally:
+            pe.Obs.executor_global = None
+    for o, r in zip(obs, reference):
+        assert o.dvalue == r.dvalue
+        for name in names:
+            assert o.e_windowsize[name] == r.e_windowsize[name]
+            assert np.array_equal(o.e_drho[name], r.e_drho[name])
+    ref_single = obs[0] * 2
+    ref_single.gamma_method()
+    assert single.dvalue == ref_single.dvalue
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        assert pe.obs._executor_workers(executor) == 2
+        pe.gamma_method(obs, S=1.5, executor=executor)
+        assert len(pe.obs._gamma_method_group(obs, 'ens1', 'numpy', executor)) == 2
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(ValueError):
+            pe.gamma_method(obs, S=1.6, executor=executor, fft=lambda deltas, max_gamma: pe.obs._gamma_numpy(deltas, max_gamma))
+
+
+def test_analysis_context():
+    obs = pe.Obs([np.random.normal(1.0, 0.1, 500), np.random.normal(1.0, 0.1, 500)], ['ens1', 'ens2'])
+    with pe.analysis_context(S=3.0, tau_exp={'ens2': 4.0}):
+        obs.gamma_method()
+        assert obs.S == {'ens1': 3.0, 'ens2': 3.0}
+        assert obs.tau_exp == {'ens1': pe.Obs.tau_exp_global, 'ens2': 4.0}
+        with pe.analysis_context(S={'ens1': 1.5}, N_sigma=2.0):
+            obs.gamma_method()
+            assert obs.S == {'ens1': 1.5, 'ens2': 3.0}
+            assert obs.N_sigma == {'ens1': 2.0, 'ens2': 2.0}
+            obs.gamma_method(S=2.5)
+            assert obs.S == {'ens1': 2.5, 'ens2': 2.5}
+    obs.gamma_method()
+    assert obs.S == {'ens1': pe.Obs.S_global, 'ens2': pe.Obs.S_global}
+
+    def analyse(S, res):
+        with pe.analysis_context(S=S):
+            for _ in range(20):
+                o = obs * 1
+                o.gamma_method()
+                res.append(o.S['ens1'])
+
+    results = [[] for _ in range(4)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(analyse, [0.0, 1.0, 2.0, 3.0], results))
+    for S, res in zip([0.0, 1.0, 2.0, 3.0], results):
+        assert res == [S] * 20
+
+    with pytest.raises(TypeError):
+        with pe.analysis_context(S_global=2.0):
+            pass
+    with pytest.raises(Exception):
+        with pe.analysis_context(tau_exp={'ens1': -1.0}):
+            pass
+
+
+def test_streaming_obs():
+    samples = np.cumsum(np.random.normal(0.0, 0.1, 3000)) + np.random.normal(5.0, 0.1, 3000)
+    stream = pe.StreamingObs(max_lag=2000)
+    for chunk in np.array_split(samples, 7):
+        stream.append(chunk, 'ens|r1')
+    stream.append(np.random.normal(5.0, 0.1, 10), 'ens|r2', idl=range(4, 24, 2))
+    stream.append(np.random.normal(5.0, 0.1, 290), 'ens|r2')
+    stream.append(np.random.normal(1.0, 0.1, 100), 'ens2')
+    assert stream.next_configs() == [101, 3001, 604]
+    obs = stream.to_obs()
+    assert obs.idl['ens|r2'] == range(4, 604, 2)
+    assert np.isclose(stream.value, obs.value)
+    for kwargs in [{}, {'S': 0}, {'tau_exp': 10}]:
+        stream.gamma_method(**kwargs)
+        obs.gamma_method(**kwargs)
+        assert np.isclose(stream.dvalue, obs.dvalue)
+        assert stream.e_windowsize == obs.e_windowsize
+        assert np.allclose(stream.e_rho['ens'], obs.e_rho['ens'])
+
+    stream.append_obs(pe.Obs([np.random.normal(1.0, 0.1, 50)], ['ens2'], idl=[range(101, 151)]))
+    assert stream.shape['ens2'] == 150
+    with pytest.raises(Exception):
+        stream.append([1.0, 2.0], 'ens2', idl=[152, 153])
+    with pytest.raises(Exception):
+        stream.append([1.0, 2.0, 3.0], 'ens3', idl=[1, 4, 5])
+
+    short = pe.StreamingObs(max_lag=50)
+    short.append(samples, 'ens')
+    short.gamma_method()
+    assert len(short.e_rho['ens']) == 50
+    with pytest.raises(TypeError):
+        short.gamma_method(fft=False)
+
+
+def test_memmap_deltas(tmp_path):
+    a = pe.Obs([np.random.normal(1.0, 0.1, 1000)], ['ens'])
+    b = pe.Obs([np.random.normal(2.0, 0.1, 1000), np.random.normal(2.0, 0.1, 200)], ['ens', 'ens2'])
+    reference = [a * b, (pe.ObsArray([a, b]) * 2).tolist()]
+    spill = str(tmp_path / "spill")
+    with pe.memmap_deltas(spill, block_size=8 * 1200):
+        res = [a * b, (pe.ObsArray([a, b]) * 2).tolist()]
+    assert isinstance(res[0].deltas['ens'], np.memmap)
+    assert not res[0].deltas['ens'].flags.writeable
+    assert isinstance(res[1][1].deltas['ens2'], np.memmap)
+    assert res[0] == reference[0]
+    assert res[1] == reference[1]
+    # Deltas of different lengths are packed into common files
+    assert len(os.listdir(spill)) == 3
+    assert res[1][1].deltas['ens'].filename == res[1][1].deltas['ens2'].filename
+
+    c = a * 1
+    pe.to_memmap([[a], [b]], str(tmp_path / "blocks"))
+    assert isinstance(a.deltas['ens'], np.memmap)
+    assert a == c
+    assert len(os.listdir(str(tmp_path / "blocks"))) == 1
+    a.gamma_method()
+    c.gamma_method()
+    assert a.dvalue == c.dvalue
+
+    store = pe.obs._MemmapStore(str(tmp_path / "segments"), 8 * 100)
+    segment = store.allocate(10)
+    assert store.store(segment) is segment
+    assert store.store(np.ones(10)) is not segment
+    del store, segment
+
+    # The files are removed together with the last Obs which refers to them
+    del res
+    gc.collect()
+    assert os.listdir(spill) == []
+    del a, b
+    gc.collect()
+    assert os.listdir(str(tmp_path / "blocks")) == []
+
+
+def test_compute_drho():
+    w_max = 17
+    rho = np.random.normal(0.0, 0.3, (3, w_max))
+    rho[:, 0] = 1.0
+    window = np.array([3, 9, 3])
+    drho = pe.obs._compute_drho(rho, window, 1000)
+    for row, i, res in zip(rho, window, drho):
+        ref = sum((row[i + k] + row[abs(i - k)] - 2 * row[i] * row[k]) ** 2 for k in range(1, w_max - i))
+        assert np.isclose(res, np.sqrt(ref / 1000))
+
+
+def test_gamma_method_tau_exp_batched():
+    for length in [9, 11, 200]:
+        obs = [pe.Obs([np.cumsum(np.random.normal(0.0, 0.1, length)) + 1.0], ['e']) for _ in range(4)]
+        pe.gamma_method(obs, tau_exp=10)
+        for o in obs:
+            single = pe.Obs([o.deltas['e'] + o.r_values['e']], ['e'])
+            single.gamma_method(tau_exp=10)
+            assert np.isclose(o.dvalue, single.dvalue)
+            assert o.e_windowsize['e'] == single.e_windowsize['e']
+            assert np.allclose(o.e_drho['e'], single.e_drho['e'])
+            w = o.e_windowsize['e']
+            assert np.isclose(o.e_drho['e'][w], pe.obs._compute_drho(o.e_rho['e'][np.newaxis], np.array([w]), length)[0])
+
+
+def test_expand_deltas_index_maps():
+    idx = [2, 3, 7, 9]
+    new_idx = [1, 2, 3, 5, 7, 8, 9]
+    deltas = np.array([[1.0, 2.0, 3.0, 4.0], [-1.0, 0.5, 0.0, 2.0]])
+    expanded = pe.obs._expand_deltas_for_merge(deltas, idx, len(idx), new_idx)
+    assert expanded.shape == (2, len(new_idx))
+    for row, ref_row in zip(expanded, deltas):
+        assert np.allclose(row, pe.obs._expand_deltas_for_merge(ref_row, idx, len(idx), new_idx))
+    assert np.allclose(expanded[0], np.array([0.0, 1.0, 2.0, 0.0, 3.0, 0.0, 4.0]) * 7 / 4)
+    assert np.allclose(pe.obs._expand_deltas(deltas, idx, len(idx))[1], [-1.0, 0.5, 0, 0, 0, 0.0, 0, 2.0])
+    assert pe.obs._index_map(tuple(idx), tuple(new_idx)) is pe.obs._index_map(tuple(idx), tuple(new_idx))
+
+
+def test_idl_interning():
+    idx = [1, 2, 5, 7, 8, 11]
+    a = pe.Obs([np.random.normal(1.0, 0.1, 6)], ['ens'], idl=[idx])
+    b = pe.Obs([np.random.normal(1.0, 0.1, 6)], ['ens'], idl=[np.array(idx)])
+    c = pe.Obs([np.random.normal(1.0, 0.1, 6)], ['ens'], idl=[[1, 2, 3, 5, 7, 8]])
+    assert a.idl['ens'] is b.idl['ens']
+    assert a.idl['ens'] == idx
+    assert pe.Obs([np.random.normal(1.0, 0.1, 6)], ['ens'], idl=[[2, 4, 6, 8, 10, 12]]).idl['ens'] == range(2, 13, 2)
+
+    merged = (a + c).idl['ens']
+    assert merged == sorted(set(idx) | set(c.idl['ens']))
+    assert (b * c).idl['ens'] is merged
+    assert pe.obs._intersection_idx([a.idl['ens'], list(c.idl['ens'])]) == [1, 2, 5, 7, 8]
+
+    with pytest.raises(TypeError):
+        a.idl['ens'].append(12)
+    with pytest.raises(TypeError):
+        a.idl['ens'][0] = 0
+
+    loaded = pickle.loads(pickle.dumps(a))
+    assert loaded.idl['ens'] is a.idl['ens']
+    assert (loaded - a).is_zero()
+    assert pe.obs._intern_idl(a.idl['ens']) is a.idl['ens']
+
+    # Interned lists are released together with the last Obs defined on them
+    d = pe.Obs([np.arange(5.0)], ['ens'], idl=[[3, 4, 9, 10, 17]])
+    ref = weakref.ref(d.idl['ens'])
+    del d
+    gc.collect()
+    assert ref() is None
+
+
+def test_lazy_evaluation():
+    a = pe.pseudo_Obs(1.0, 0.1, 'e1')
+    b = pe.pseudo_Obs(2.0, 0.2, 'e2')
+    c = pe.Obs([np.random.normal(1.0, 0.1, 50)], ['e1'], idl=[range(1, 100, 2)])
+    d = pe.cov_Obs(3.0, 0.1, 'cov')
+
+    with pe.lazy():
+        x = a * b + c
+        res = np.exp(x / d) * a ** 2 - x
+        cres = pe.CObs(a, b) * x
+    assert res._lazy is not None
+    assert x._lazy is not None
+    ref_x = a * b + c
+    ref = np.exp(ref_x / d) * a ** 2 - ref_x
+
+    assert np.isclose(res.value, ref.value)
+    assert res.names == ref.names
+    assert res.idl == ref.idl
+    for name in ref.r_values:
+        assert np.isclose(res.r_values[name], ref.r_values[name])
+    assert res._lazy is None
+    pe.gamma_method([res, ref, cres])
+    assert np.isclose(res.dvalue, ref.dvalue)
+    assert np.isclose(res.covobs['cov'].grad[0][0], ref.covobs['cov'].grad[0][0])
+    ref_imag = b * ref_x
+    ref_imag.gamma_method()
+    assert np.isclose(cres.imag.dvalue, ref_imag.dvalue)
+
+    with pe.lazy():
+        y = a * b / a
+    loaded = pickle.loads(pickle.dumps(y))
+    assert (loaded - b).is_zero()
+    assert (copy.deepcopy(y) - b).is_zero()
+    with pytest.raises(AttributeError):
+        y.not_an_attribute
+
+
+def test_register_gradient():
+    a = pe.pseudo_Obs(1.3, 0.1, 'e1')
+    b = pe.pseudo_Obs(0.4, 0.05, 'e2')
+
+    def func(x, **kwargs):
+        return x[0] ** 2 * np.sin(x[1])
+
+    ref = pe.derived_observable(func, [a, b])
+    calls = []
+
+    def grad(x, **kwargs):
+        calls.append(1)
+        return np.array([2 * x[0] * np.sin(x[1]), x[0] ** 2 * np.cos(x[1])])
+
+    class SlottedFunc:
+        __slots__ = []
+
+        def __call__(self, x, **kwargs):
+            return func(x)
+
+    assert (pe.derived_observable(SlottedFunc(), [a, b]) - ref).is_zero()
+
+    pe.obs.register_gradient(func, grad)
+    res = pe.derived_observable(func, [a, b])
+    assert len(calls) == 1
+    assert (res - ref).is_zero()
+    res.gamma_method()
+    ref.gamma_method()
+    assert np.isclose(res.dvalue, ref.dvalue)
+
+    for x in [a, -a, 0 * a]:
+        for res, ref in [(x ** 2, pe.derived_observable(lambda y: y[0] ** 2, [x])),
+                         (2 ** x, pe.derived_observable(lambda y: 2 ** y[0], [x])),
+                         (abs(x), pe.derived_observable(lambda y: np.abs(y[0]), [x])),
+                         (np.arctan(x), pe.derived_observable(lambda y: np.arctan(y[0]), [x])),
+                         (np.arcsinh(x), pe.derived_observable(lambda y: np.arcsinh(y[0]), [x]))]:
+            assert (res - ref).is_zero()
+    assert (b ** a - pe.derived_observable(lambda y: y[0] ** y[1], [b, a])).is_zero()
@@ -1,6 +1,7 @@
 import os
 import sys
 import inspect
+import numpy as np
 import pyerrors as pe
 import pyerrors.input.sfcf as sfin
 import shutil
@@ -87,6 +88,14 @@ def test_c_bib(tmp_path):
     assert f_V0[1] == 661.3188585582334
     assert f_V0[2] == 683.6776090081005
 
+def test_c_r_start(tmp_path):
+    build_test_environment(str(tmp_path), "c",10,3)
+    f_A = sfin.read_sfcf(str(tmp_path) + "/data_c", "data_c", "f_A", quarks="lquark lquark", wf = 0, version = "2.0c", r_start=[3, None, 6])
+    assert [f_A[0].idl[name] for name in f_A[0].names] == [range(3, 11), range(1, 11), range(6, 11)]
+    assert np.isclose(f_A[0].value, 65.4711887279723)
+    with pytest.raises(Exception):
+        sfin.read_sfcf(str(tmp_path) + "/data_c", "data_c", "f_A", quarks="lquark lquark", wf = 0, version = "2.0c", r_start=[3, None])
+
 def test_a_bb(tmp_path):
     build_test_environment(str(tmp_path), "a",5,3)
     f_1 = sfin.read_sfcf(str(tmp_path) + "/data_a", "data_a", "f_1", quarks="lquark lquark", wf = 0, wf2=0, version = "2.0a", corr_type="bb")
@@ -115,6 +124,28 @@ def test_a_bib(tmp_path):
     assert f_V0[1] == 661.3188585582334
     assert f_V0[2] == 683.6776090081005
 
+def test_a_r_start(tmp_path, monkeypatch):
+    build_test_environment(str(tmp_path), "a", 5, 3)
+    filename = str(tmp_path) + "/data_a/data_a_r0.f_A"
+    pattern = sfin._make_pattern("2.0", "f_A", 0, 0, 0, False, "lquark lquark")
+    T, full_idl, full_data = sfin._read_append_rep(filename, pattern, False, "n", 0, False)
+    calls = []
+    read_chunk = sfin._read_chunk
+
+    def counting_read_chunk(*args):
+        calls.append(1)
+        return read_chunk(*args)
+
+    monkeypatch.setattr(sfin, "_read_chunk", counting_read_chunk)
+    T_start, rep_idl, rep_data = sfin._read_append_rep(filename, pattern, False, "n", 0, False, r_start=3)
+    # Only the configs which are read are parsed
+    assert len(calls) == 3
+    assert T_start == T
+    assert rep_idl == full_idl[2:] == [3, 4, 5]
+    assert rep_data == [data_t[2:] for data_t in full_data]
+    with pytest.raises(Exception):
+        sfin.read_sfcf(str(tmp_path) + "/data_a", "data_a", "f_A", quarks="lquark lquark", wf = 0, version = "2.0a", r_start=[3, None, 20])
+
 def test_find_corr():
     pattern = 'name      ' + "f_A" + '\nquarks    ' + "lquark lquark" + '\noffset    ' + str(0) + '\nwf        ' + str(0)
     start_read, T = sfin._find_correlator("tests/data/sfcf_test/data_c/data_c_r0/data_c_r0_n1", "2.0c", pattern, False)